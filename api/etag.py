@@ -0,0 +1,46 @@
+"""変更カウンタに基づく ETag / If-None-Match 対応"""
+import hashlib
+from datetime import date
+from functools import wraps
+from flask import request, make_response
+from database import get_db, get_table_versions
+
+# 一覧・レポートが依存するテーブル
+ALL_TABLES = ('projects', 'tags', 'tasks', 'task_tags', 'ideas')
+
+def etag_value(full_path, tables, versions, daily=False):
+    """依存テーブルの変更カウンタとリクエストURL（パス?クエリ）から ETag を計算"""
+    parts = [full_path]
+    parts.extend(f'{name}={versions.get(name, 0)}' for name in sorted(tables))
+    if daily:
+        # 「今週」「今月」など当日の日付で結果が変わるエンドポイント用
+        parts.append(date.today().isoformat())
+    return hashlib.sha1('|'.join(parts).encode('utf-8')).hexdigest()
+
+def compute_etag(tables, daily=False):
+    """現在のリクエストの ETag を計算"""
+    versions = get_table_versions(get_db(), tables)
+    return etag_value(request.full_path, tables, versions, daily)
+
+def etag_for(*tables, daily=False):
+    """依存テーブルが変わっていなければ本体のクエリを実行せずに 304 を返すデコレータ
+    
+    ETag は本体のクエリより先に計算するため、途中で書き込みがあっても
+    古い ETag に新しい内容が紐付くだけで、次回のリクエストで再取得される。
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            etag = compute_etag(tables, daily)
+            if etag in request.if_none_match:
+                response = make_response('', 304)
+            else:
+                response = make_response(view(*args, **kwargs))
+                if response.status_code != 200:
+                    return response
+            response.set_etag(etag)
+            # キャッシュは保持してよいが、使う前に必ず再検証させる
+            response.headers['Cache-Control'] = 'no-cache'
+            return response
+        return wrapper
+    return decorator
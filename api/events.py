@@ -0,0 +1,104 @@
+"""変更通知の SSE（GET /api/events）"""
+import queue
+import threading
+from flask import Blueprint, Response, request, jsonify
+from database import get_db
+from events import (
+    feed, read_events, format_event, parse_version,
+    BACKLOG_LIMIT, HEARTBEAT, HEARTBEAT_INTERVAL, QUEUE_SIZE, RESET_EVENT, RETRY_MS
+)
+
+events_bp = Blueprint('events', __name__)
+
+# 接続ごとにサーバーのスレッドを1本使うため、プロセスあたりの同時接続数を制限する
+# （上限は init_app で設定する）
+_streams = None
+
+# 書き込み後にフィードを起こすブループリント
+WRITE_BLUEPRINTS = ('tasks', 'projects', 'tags', 'ideas')
+WRITE_METHODS = ('POST', 'PUT', 'PATCH', 'DELETE')
+
+@events_bp.route('/events', methods=['GET'])
+def get_events():
+    """変更通知を Server-Sent Events で配信
+    
+    各メッセージは id: <version>、data: {"entity", "id", "op", "version"}（op は upsert / delete）。
+    再接続時は Last-Event-ID（または ?since=）より後の変更から再開する。
+    取りこぼしが多すぎる場合は event: reset を送るので、/api/sync で取り直すこと。
+    本番（gunicorn / waitress）では /api/config の events_url のイベントサーバーを使う。
+    """
+    if not _streams.acquire(blocking=False):
+        response = jsonify({'error': 'Too many event streams'})
+        response.status_code = 503
+        response.headers['Retry-After'] = str(RETRY_MS // 1000)
+        return response
+    
+    unsubscribe = None
+    try:
+        since = parse_version(request.headers.get('Last-Event-ID') or request.args.get('since'))
+        messages = queue.Queue(QUEUE_SIZE)
+        overflow = threading.Event()
+        
+        def put(event):
+            try:
+                messages.put_nowait(event)
+            except queue.Full:
+                overflow.set()
+        
+        # 先に購読してから取りこぼしを読むので、その間の通知も失わない
+        unsubscribe = feed.subscribe(put)
+        backlog = read_events(get_db(), since) if since is not None else []
+    except Exception:
+        if unsubscribe:
+            unsubscribe()
+        _streams.release()
+        raise
+    
+    def generate():
+        yield f'retry: {RETRY_MS}\n\n'
+        if len(backlog) >= BACKLOG_LIMIT:
+            yield RESET_EVENT
+            return
+        
+        last = since
+        for event in backlog:
+            yield format_event(event)
+            last = event['version']
+        
+        # 読み出しが追いつかない場合は切断し、再接続で取りこぼしを読ませる
+        while not overflow.is_set():
+            try:
+                event = messages.get(timeout=HEARTBEAT_INTERVAL)
+            except queue.Empty:
+                yield HEARTBEAT
+                continue
+            if last is None or event['version'] > last:
+                yield format_event(event)
+                last = event['version']
+    
+    def close():
+        unsubscribe()
+        _streams.release()
+    
+    # ジェネレーターが始まる前に切断された場合も、サーバーが close() を呼ぶ
+    response = Response(generate(), mimetype='text/event-stream')
+    response.call_on_close(close)
+    response.headers['Cache-Control'] = 'no-cache'
+    response.headers['X-Accel-Buffering'] = 'no'
+    return response
+
+def init_app(app, max_streams):
+    """書き込みのレスポンス後にフィードを起こし、同じプロセスの購読者へすぐに通知する
+    
+    他のプロセスの購読者には、各プロセスのポーリングで届く。
+    max_streams はこのプロセスの GET /api/events の同時接続数の上限。
+    """
+    global _streams
+    _streams = threading.BoundedSemaphore(max_streams)
+    
+    @app.after_request
+    def wake_feed(response):
+        if (request.blueprint in WRITE_BLUEPRINTS and request.method in WRITE_METHODS
+                and response.status_code < 400):
+            feed.wake()
+        return response
@@ -1,160 +1,104 @@
 from flask import Blueprint, request, jsonify
-from database import get_db, dict_from_row
+from repository import get_repository
+from api.etag import etag_for
+from api.pagination import DEFAULT_LIMIT, parse_page_args, next_page
+from api.streaming import wants_stream, stream_json_array
 
 ideas_bp = Blueprint('ideas', __name__)
 
 @ideas_bp.route('/ideas', methods=['GET'])
+@etag_for('ideas')
 def get_ideas():
-    """全アイデアを取得"""
-    conn = get_db()
-    cursor = conn.cursor()
+    """全アイデアを取得
     
+    limit / cursor を指定した場合は (is_pinned, updated_at, id) のキーセットで
+    ページングし、{'ideas': [...], 'next_cursor': ...} を返す。
+    ページングしない場合は ?stream=1 で結果をストリーミングできる。
+    ?q= を指定した場合は全文検索の結果を関連度順で返す（search_ideas を参照）。
+    """
+    if request.args.get('q', '').strip():
+        return search_ideas()
+    
+    ideas = get_repository().ideas
     search = request.args.get('search', '')
     
-    if search:
-        cursor.execute('''
-            SELECT * FROM ideas
-            WHERE title LIKE ? OR content LIKE ?
-            ORDER BY is_pinned DESC, updated_at DESC
-        ''', (f'%{search}%', f'%{search}%'))
-    else:
-        cursor.execute('''
-            SELECT * FROM ideas
-            ORDER BY is_pinned DESC, updated_at DESC
-        ''')
-    
-    ideas = [dict_from_row(row) for row in cursor.fetchall()]
-    conn.close()
-    
-    return jsonify(ideas)
+    try:
+        limit, after = parse_page_args(request.args, 3)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    if not limit:
+        if wants_stream(request.args):
+            return stream_json_array(ideas.iter(search))
+        return jsonify(ideas.list(search))
+    
+    # 次ページの有無を判定するため1件多く取得
+    page, next_cursor = next_page(
+        ideas.list(search, limit + 1, after), limit,
+        lambda i: (i['is_pinned'], i['updated_at'], i['id'])
+    )
+    return jsonify({'ideas': page, 'next_cursor': next_cursor})
+
+def search_ideas():
+    """アイデアを全文検索（?q=）
+    
+    空白区切りの語をすべて含むアイデアを bm25 の関連度順で返す。
+    各アイデアには一致箇所を <mark> で囲んだ snippet と rank が付く。
+    (rank, id) のキーセットでページングし、{'ideas': [...], 'next_cursor': ...} を返す。
+    3文字未満の語を含む場合は索引を使えないため LIKE で検索する（rank は 0）。
+    """
+    try:
+        limit, after = parse_page_args(request.args, 2)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    limit = limit or DEFAULT_LIMIT
+    
+    ideas = get_repository().ideas.search(request.args.get('q', ''), limit + 1, after)
+    
+    ideas, next_cursor = next_page(ideas, limit, lambda i: (i['rank'], i['id']))
+    return jsonify({'ideas': ideas, 'next_cursor': next_cursor})
 
 @ideas_bp.route('/ideas', methods=['POST'])
 def create_idea():
     """新規アイデアを作成"""
-    data = request.json
-    conn = get_db()
-    cursor = conn.cursor()
-    
-    cursor.execute('''
-        INSERT INTO ideas (title, content, color, is_pinned)
-        VALUES (?, ?, ?, ?)
-    ''', (
-        data.get('title'),
-        data.get('content', ''),
-        data.get('color', '#6750A4'),
-        data.get('is_pinned', 0)
-    ))
-    
-    idea_id = cursor.lastrowid
-    conn.commit()
-    
-    cursor.execute('SELECT * FROM ideas WHERE id = ?', (idea_id,))
-    idea = dict_from_row(cursor.fetchone())
-    
-    conn.close()
+    idea = get_repository().ideas.create(request.json)
+    
     return jsonify(idea), 201
 
 @ideas_bp.route('/ideas/<int:idea_id>', methods=['GET'])
 def get_idea(idea_id):
     """アイデアを取得"""
-    conn = get_db()
-    cursor = conn.cursor()
-    
-    cursor.execute('SELECT * FROM ideas WHERE id = ?', (idea_id,))
-    idea = dict_from_row(cursor.fetchone())
+    idea = get_repository().ideas.get(idea_id)
     
     if not idea:
-        conn.close()
         return jsonify({'error': 'Idea not found'}), 404
     
-    conn.close()
     return jsonify(idea)
 
 @ideas_bp.route('/ideas/<int:idea_id>', methods=['PUT'])
 def update_idea(idea_id):
     """アイデアを更新"""
-    data = request.json
-    conn = get_db()
-    cursor = conn.cursor()
+    idea = get_repository().ideas.update(idea_id, request.json)
     
-    cursor.execute('SELECT * FROM ideas WHERE id = ?', (idea_id,))
-    if not cursor.fetchone():
-        conn.close()
+    if not idea:
         return jsonify({'error': 'Idea not found'}), 404
     
-    cursor.execute('''
-        UPDATE ideas SET
-            title = COALESCE(?, title),
-            content = COALESCE(?, content),
-            color = COALESCE(?, color),
-            is_pinned = COALESCE(?, is_pinned),
-            updated_at = CURRENT_TIMESTAMP
-        WHERE id = ?
-    ''', (
-        data.get('title'),
-        data.get('content'),
-        data.get('color'),
-        data.get('is_pinned'),
-        idea_id
-    ))
-    
-    conn.commit()
-    
-    cursor.execute('SELECT * FROM ideas WHERE id = ?', (idea_id,))
-    idea = dict_from_row(cursor.fetchone())
-    
-    conn.close()
     return jsonify(idea)
 
 @ideas_bp.route('/ideas/<int:idea_id>', methods=['DELETE'])
 def delete_idea(idea_id):
     """アイデアを削除"""
-    conn = get_db()
-    cursor = conn.cursor()
-    
-    cursor.execute('SELECT * FROM ideas WHERE id = ?', (idea_id,))
-    if not cursor.fetchone():
-        conn.close()
+    if not get_repository().ideas.delete(idea_id):
         return jsonify({'error': 'Idea not found'}), 404
     
-    cursor.execute('DELETE FROM ideas WHERE id = ?', (idea_id,))
-    conn.commit()
-    conn.close()
-    
     return jsonify({'message': 'Idea deleted successfully'})
 
 @ideas_bp.route('/ideas/<int:idea_id>/convert', methods=['POST'])
 def convert_to_task(idea_id):
     """アイデアをタスクに変換"""
-    conn = get_db()
-    cursor = conn.cursor()
+    task = get_repository().ideas.convert_to_task(idea_id)
     
-    cursor.execute('SELECT * FROM ideas WHERE id = ?', (idea_id,))
-    idea = dict_from_row(cursor.fetchone())
-    
-    if not idea:
-        conn.close()
+    if not task:
         return jsonify({'error': 'Idea not found'}), 404
     
-    # タスクを作成
-    cursor.execute('''
-        INSERT INTO tasks (title, description, color, status)
-        VALUES (?, ?, ?, 'todo')
-    ''', (
-        idea['title'],
-        idea['content'],
-        idea['color']
-    ))
-    
-    task_id = cursor.lastrowid
-    
-    # アイデアを削除
-    cursor.execute('DELETE FROM ideas WHERE id = ?', (idea_id,))
-    
-    conn.commit()
-    
-    cursor.execute('SELECT * FROM tasks WHERE id = ?', (task_id,))
-    task = dict_from_row(cursor.fetchone())
-    
-    conn.close()
     return jsonify(task), 201
@@ -0,0 +1,54 @@
+"""キーセット（カーソル）ページネーションのヘルパー"""
+import base64
+import json
+
+DEFAULT_LIMIT = 50
+MAX_LIMIT = 500
+
+def encode_cursor(values):
+    """ソートキーの値を不透明なカーソル文字列に変換"""
+    raw = json.dumps(list(values), separators=(',', ':')).encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+def decode_cursor(token, size):
+    """カーソル文字列をソートキーの値に戻す（不正な場合は ValueError）"""
+    try:
+        padded = token + '=' * (-len(token) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')))
+    except (ValueError, UnicodeError):
+        raise ValueError('Invalid cursor')
+    if not isinstance(values, list) or len(values) != size:
+        raise ValueError('Invalid cursor')
+    return values
+
+def parse_page_args(args, key_size):
+    """limit / cursor パラメータを解析
+    
+    どちらも指定されていなければ (None, None) を返し、従来どおり全件を返す。
+    不正な値の場合は ValueError を送出する。
+    """
+    limit = args.get('limit')
+    cursor = args.get('cursor')
+    if limit is None and cursor is None:
+        return None, None
+    
+    if limit is None:
+        limit = DEFAULT_LIMIT
+    else:
+        try:
+            limit = int(limit)
+        except ValueError:
+            raise ValueError('Invalid limit')
+        if limit < 1:
+            raise ValueError('Invalid limit')
+        limit = min(limit, MAX_LIMIT)
+    
+    after = decode_cursor(cursor, key_size) if cursor else None
+    return limit, after
+
+def next_page(rows, limit, key):
+    """limit + 1 件取得した結果からページと次のカーソルを返す"""
+    if len(rows) <= limit:
+        return rows, None
+    rows = rows[:limit]
+    return rows, encode_cursor(key(rows[-1]))
@@ -0,0 +1,128 @@
+"""レポート結果のインプロセスキャッシュ（LRU + TTL、テーブル変更カウンタで無効化）"""
+import os
+import threading
+import time
+from collections import OrderedDict
+from datetime import date
+from functools import wraps
+from flask import request, current_app
+from database import get_db, get_table_versions
+from api.streaming import wants_stream
+
+# キャッシュの設定（環境変数で調整可能）
+REPORT_CACHE_SIZE = int(os.environ.get('REPORT_CACHE_SIZE', 128))
+REPORT_CACHE_TTL = float(os.environ.get('REPORT_CACHE_TTL', 300))
+
+class ReportCache:
+    """件数上限付きの LRU キャッシュ
+    
+    各エントリは計算時点の依存テーブルの変更カウンタを保持し、
+    取得時にカウンタが一致しなければ破棄する。書き込みはトリガーで
+    カウンタに反映されるため、他プロセスからの書き込みでも無効化される。
+    ttl が None のエントリ（締まった過去の期間）は期限切れにならない。
+    """
+    
+    def __init__(self, size=REPORT_CACHE_SIZE, ttl=REPORT_CACHE_TTL):
+        self.size = size
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+        self._invalidations = 0
+        self._expirations = 0
+        self._evictions = 0
+    
+    def get(self, key, versions):
+        """有効なエントリがあれば値を返す（なければ None）"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self._misses += 1
+                return None
+            value, stored_versions, expires_at = entry
+            if stored_versions != versions:
+                del self._entries[key]
+                self._invalidations += 1
+                self._misses += 1
+                return None
+            if expires_at is not None and expires_at <= time.monotonic():
+                del self._entries[key]
+                self._expirations += 1
+                self._misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self._hits += 1
+            return value
+    
+    def set(self, key, versions, value, permanent=False):
+        """エントリを保存（上限を超えたら最も古く使われたものを追い出す）"""
+        if self.size <= 0:
+            return
+        expires_at = None if permanent else time.monotonic() + self.ttl
+        with self._lock:
+            self._entries[key] = (value, versions, expires_at)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.size:
+                self._entries.popitem(last=False)
+                self._evictions += 1
+    
+    def clear(self):
+        """全エントリを破棄"""
+        with self._lock:
+            self._entries.clear()
+    
+    def stats(self):
+        """サイズ調整用の統計情報"""
+        with self._lock:
+            lookups = self._hits + self._misses
+            return {
+                'size': self.size,
+                'entries': len(self._entries),
+                'ttl_seconds': self.ttl,
+                'hits': self._hits,
+                'misses': self._misses,
+                'hit_rate': round(self._hits / lookups, 3) if lookups else 0.0,
+                'invalidations': self._invalidations,
+                'expirations': self._expirations,
+                'evictions': self._evictions
+            }
+
+report_cache = ReportCache()
+
+def get_report_cache_stats():
+    """レポートキャッシュの統計情報を取得"""
+    return report_cache.stats()
+
+def cached_report(*tables, daily=False, closed_period=None):
+    """レポートのレスポンス本体をキャッシュするデコレータ
+    
+    キーはエンドポイントとクエリパラメータ（request.full_path）。
+    daily=True の場合は当日の日付もキーに含める。closed_period は
+    リクエストが締まった過去の期間を指すかを返す関数で、True なら
+    日付をキーに含めず TTL なしで保持する（無効化は書き込みのみ）。
+    ストリーミング要求はキャッシュしない。
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            if wants_stream(request.args):
+                return view(*args, **kwargs)
+            
+            permanent = closed_period is not None and closed_period()
+            key = request.full_path
+            if daily and not permanent:
+                key = f'{key}|{date.today().isoformat()}'
+            # 本体より先にカウンタを読むので、計算中の書き込みは次回の取得で検出される
+            versions = get_table_versions(get_db(), tables)
+            
+            body = report_cache.get(key, versions)
+            if body is not None:
+                return current_app.response_class(body, mimetype='application/json')
+            
+            response = current_app.make_response(view(*args, **kwargs))
+            if response.status_code == 200 and not response.is_streamed:
+                report_cache.set(key, versions, response.get_data(), permanent)
+            return response
+        return wrapper
+    return decorator
@@ -0,0 +1,69 @@
+"""大きな一覧レスポンスをストリーミングで返すためのヘルパー
+
+出力は jsonify と同じ形式（キーのソート・区切りの空白・末尾の改行）にそろえ、
+?stream=1 の有無で本文が変わらないようにする。
+"""
+from functools import partial
+from itertools import islice
+from flask import Response, current_app, stream_with_context
+
+# 1チャンクあたりの行数
+STREAM_BATCH_SIZE = 200
+
+def wants_stream(args):
+    """?stream=1 が指定されているか"""
+    return args.get('stream', '').lower() in ('1', 'true')
+
+def json_dumps():
+    """jsonify（current_app.json.response）と同じ引数で変換する dumps"""
+    provider = current_app.json
+    if (provider.compact is None and current_app.debug) or provider.compact is False:
+        return partial(provider.dumps, indent=2)
+    return partial(provider.dumps, separators=(',', ':'))
+
+def _iter_array_items(items, dumps):
+    """行のイテレータを少しずつ読みながら配列要素のJSONチャンクを返す"""
+    items = iter(items)
+    first = True
+    while True:
+        rows = list(islice(items, STREAM_BATCH_SIZE))
+        if not rows:
+            break
+        chunk = ','.join(dumps(row) for row in rows)
+        yield chunk if first else ',' + chunk
+        first = False
+
+def stream_json_array(items):
+    """行のイテレータ（リポジトリの iter）をJSON配列としてストリーミング"""
+    def generate():
+        dumps = json_dumps()
+        yield '['
+        yield from _iter_array_items(items, dumps)
+        yield ']\n'
+    
+    # リクエストコンテキスト（＝g上のDB接続）を最後のチャンクまで保持する
+    return Response(stream_with_context(generate()), mimetype='application/json')
+
+def split_fields(fields, key, sort_keys=True):
+    """固定フィールドを、配列 key の前に出力する分と後に出力する分に分ける
+    
+    jsonify はキーをソートするので、配列もソート後の位置に出力する。
+    """
+    if not sort_keys:
+        return fields, {}
+    before = {name: value for name, value in fields.items() if name < key}
+    after = {name: value for name, value in fields.items() if name > key}
+    return before, after
+
+def stream_json_object(fields, key, items):
+    """固定フィールドと、行のイテレータの配列を1つ含むJSONオブジェクトをストリーミング"""
+    def generate():
+        dumps = json_dumps()
+        before, after = split_fields(fields, key, current_app.json.sort_keys)
+        head = dumps(before)[1:-1] if before else ''
+        yield '{' + (head + ',' if head else '') + dumps(key) + ':['
+        yield from _iter_array_items(items, dumps)
+        tail = dumps(after)[1:-1] if after else ''
+        yield ']' + (',' + tail if tail else '') + '}\n'
+    
+    return Response(stream_with_context(generate()), mimetype='application/json')
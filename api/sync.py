@@ -0,0 +1,55 @@
+"""差分同期（GET /api/sync?since=<token>）"""
+from flask import Blueprint, request, jsonify
+from repository import get_repository
+
+sync_bp = Blueprint('sync', __name__)
+
+DEFAULT_SYNC_LIMIT = 1000
+MAX_SYNC_LIMIT = 5000
+
+def sync_result(sync, since, limit=None):
+    """?since= / ?limit= の値から同期結果を作り、(本体, HTTP ステータス) を返す"""
+    try:
+        limit = min(int(limit or DEFAULT_SYNC_LIMIT), MAX_SYNC_LIMIT)
+        if limit < 1:
+            raise ValueError
+    except ValueError:
+        return {'error': 'limit must be a positive integer'}, 400
+    
+    if since is not None:
+        try:
+            since = int(since)
+            if since < 0:
+                raise ValueError
+        except ValueError:
+            return {'error': 'Invalid sync token'}, 400
+    
+    if since is None or since > sync.token():
+        result = sync.snapshot()
+        result.update(full=True, has_more=False, deleted={})
+    else:
+        result = sync.changes(since, limit)
+        result['full'] = False
+    
+    # トークンは不透明な文字列として扱わせる
+    result['token'] = str(result['token'])
+    return result, 200
+
+@sync_bp.route('/sync', methods=['GET'])
+def sync():
+    """前回の同期以降に変更された行と、削除された行のIDを取得
+    
+    since を省略すると全件を返す（full: true）。前回のレスポンスの token を
+    since に渡すと、それ以降に変更・削除された分だけを
+    {'token', 'full', 'has_more', 'changes': {エンティティ: [行]}, 'deleted': {エンティティ: [ID]}}
+    で返す。has_more が true の場合は同じ要領で続きを取得する。
+    DBが作り直されてトークンが現在値より大きい場合も全件を返す。
+    """
+    body, status = sync_result(
+        get_repository().sync, request.args.get('since'), request.args.get('limit')
+    )
+    response = jsonify(body)
+    response.status_code = status
+    if status == 200:
+        response.headers['Cache-Control'] = 'no-store'
+    return response
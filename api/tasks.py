@@ -1,221 +1,215 @@
 from flask import Blueprint, request, jsonify
-from datetime import datetime
-from database import get_db, dict_from_row
+from repository import get_repository
+from api.etag import etag_for
+from api.pagination import DEFAULT_LIMIT, parse_page_args, next_page
+from api.streaming import wants_stream, stream_json_array
 
 tasks_bp = Blueprint('tasks', __name__)
 
-@tasks_bp.route('/tasks', methods=['GET'])
-def get_tasks():
-    """全タスクを取得"""
-    conn = get_db()
-    cursor = conn.cursor()
-    
-    # フィルタリングパラメータ
-    status = request.args.get('status')
-    project_id = request.args.get('project_id')
-    tag_id = request.args.get('tag_id')
-    
-    query = '''
-        SELECT t.*, p.name as project_name,
-               GROUP_CONCAT(tg.id || ':' || tg.name || ':' || tg.color) as tags
-        FROM tasks t
-        LEFT JOIN projects p ON t.project_id = p.id
-        LEFT JOIN task_tags tt ON t.id = tt.task_id
-        LEFT JOIN tags tg ON tt.tag_id = tg.id
-    '''
-    
-    conditions = []
-    params = []
-    
-    if status:
-        conditions.append('t.status = ?')
-        params.append(status)
-    
-    if project_id:
-        conditions.append('t.project_id = ?')
-        params.append(project_id)
-    
-    if tag_id:
-        conditions.append('t.id IN (SELECT task_id FROM task_tags WHERE tag_id = ?)')
-        params.append(tag_id)
-    
-    if conditions:
-        query += ' WHERE ' + ' AND '.join(conditions)
-    
-    query += ' GROUP BY t.id ORDER BY t.priority DESC, t.created_at DESC'
-    
-    cursor.execute(query, params)
-    rows = cursor.fetchall()
-    
-    tasks = []
-    for row in rows:
-        task = dict_from_row(row)
-        # タグをパース
-        if task['tags']:
-            tag_list = []
-            for tag_str in task['tags'].split(','):
-                parts = tag_str.split(':')
-                if len(parts) >= 3:
-                    tag_list.append({
-                        'id': int(parts[0]),
-                        'name': parts[1],
-                        'color': parts[2]
-                    })
-            task['tags'] = tag_list
+def _filters(args):
+    """status / project_id / tag_id の絞り込み条件"""
+    return {
+        'status': args.get('status') or None,
+        'project_id': args.get('project_id') or None,
+        'tag_id': args.get('tag_id') or None
+    }
+
+def _bulk_items(data, key):
+    """一括処理の配列を取り出す（配列そのもの、または {key: [...]} を受け付ける）"""
+    if isinstance(data, dict):
+        data = data.get(key)
+    return data if isinstance(data, list) else None
+
+def bulk_create_results(items, bulk_create):
+    """タイトルのあるものだけを bulk_create で作成し、入力順の結果と HTTP ステータスを返す"""
+    results = [None] * len(items)
+    valid = []
+    for index, data in enumerate(items):
+        if not isinstance(data, dict) or not data.get('title'):
+            results[index] = {'index': index, 'status': 400, 'error': 'Title is required'}
+        else:
+            valid.append((index, data))
+    
+    if valid:
+        created = bulk_create([data for _, data in valid])
+        for (index, _), task in zip(valid, created):
+            results[index] = {'index': index, 'status': 201, 'task': task}
+    
+    return {'results': results}, 201 if valid else 400
+
+def _task_id(value):
+    """一括処理で指定されたタスクID（整数、または数字の文字列）を int に変換（不正な場合は None）"""
+    if isinstance(value, bool):
+        return None
+    if isinstance(value, int):
+        return value
+    if isinstance(value, str) and value.strip().isdigit():
+        return int(value)
+    return None
+
+def bulk_update_results(items, bulk_update):
+    """IDが正しいものだけを bulk_update で更新し、入力順の結果と HTTP ステータスを返す"""
+    results = [None] * len(items)
+    valid = []
+    for index, data in enumerate(items):
+        task_id = _task_id(data.get('id')) if isinstance(data, dict) else None
+        if task_id is None:
+            results[index] = {'index': index, 'status': 400, 'error': 'Invalid task id'}
+        else:
+            valid.append((index, {**data, 'id': task_id}))
+    
+    if valid:
+        updated = bulk_update([data for _, data in valid])
+        for (index, _), task in zip(valid, updated):
+            if task:
+                results[index] = {'index': index, 'status': 200, 'task': task}
+            else:
+                results[index] = {'index': index, 'status': 404, 'error': 'Task not found'}
+    
+    return {'results': results}, 200 if valid else 400
+
+def bulk_delete_results(ids, bulk_delete):
+    """IDが正しいものだけを bulk_delete で削除し、入力順の結果と HTTP ステータスを返す"""
+    task_ids = [_task_id(task_id) for task_id in ids]
+    valid = [task_id for task_id in task_ids if task_id is not None]
+    deleted = bulk_delete(valid) if valid else set()
+    
+    results = []
+    for index, (value, task_id) in enumerate(zip(ids, task_ids)):
+        if task_id is None:
+            results.append({'index': index, 'status': 400, 'id': value, 'error': 'Invalid task id'})
+        elif task_id in deleted:
+            results.append({'index': index, 'status': 200, 'id': task_id})
         else:
-            task['tags'] = []
-        tasks.append(task)
+            results.append({'index': index, 'status': 404, 'id': task_id, 'error': 'Task not found'})
     
-    conn.close()
-    return jsonify(tasks)
+    return {'results': results}, 200 if valid else 400
+
+@tasks_bp.route('/tasks', methods=['GET'])
+@etag_for('tasks', 'projects', 'tags', 'task_tags')
+def get_tasks():
+    """全タスクを取得
+    
+    limit / cursor を指定した場合は (priority, created_at, id) のキーセットで
+    ページングし、{'tasks': [...], 'next_cursor': ...} を返す。
+    ページングしない場合は ?stream=1 で結果をストリーミングできる。
+    ?q= を指定した場合は全文検索の結果を関連度順で返す（search_tasks を参照）。
+    """
+    if request.args.get('q', '').strip():
+        return search_tasks()
+    
+    tasks = get_repository().tasks
+    filters = _filters(request.args)
+    
+    # ページングパラメータ
+    try:
+        limit, after = parse_page_args(request.args, 3)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    if not limit:
+        if wants_stream(request.args):
+            return stream_json_array(tasks.iter(**filters))
+        return jsonify(tasks.list(**filters))
+    
+    # 次ページの有無を判定するため1件多く取得
+    page, next_cursor = next_page(
+        tasks.list(**filters, limit=limit + 1, after=after), limit,
+        lambda t: (t['priority'], t['created_at'], t['id'])
+    )
+    return jsonify({'tasks': page, 'next_cursor': next_cursor})
+
+def search_tasks():
+    """タスクを全文検索（?q=）
+    
+    タイトルと説明を対象に、空白区切りの語をすべて含むタスクを bm25 の関連度順で返す。
+    status / project_id / tag_id の絞り込みも併用できる。
+    各タスクには一致箇所を <mark> で囲んだ snippet と rank が付く。
+    (rank, id) のキーセットでページングし、{'tasks': [...], 'next_cursor': ...} を返す。
+    3文字未満の語を含む場合は索引を使えないため LIKE で検索する（rank は 0）。
+    """
+    try:
+        limit, after = parse_page_args(request.args, 2)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    limit = limit or DEFAULT_LIMIT
+    
+    tasks = get_repository().tasks.search(
+        request.args.get('q', ''), **_filters(request.args), limit=limit + 1, after=after
+    )
+    
+    tasks, next_cursor = next_page(tasks, limit, lambda t: (t['rank'], t['id']))
+    return jsonify({'tasks': tasks, 'next_cursor': next_cursor})
 
 @tasks_bp.route('/tasks', methods=['POST'])
 def create_task():
     """新規タスクを作成"""
-    data = request.json
-    conn = get_db()
-    cursor = conn.cursor()
-    
-    cursor.execute('''
-        INSERT INTO tasks (title, description, color, status, priority, project_id, due_date)
-        VALUES (?, ?, ?, ?, ?, ?, ?)
-    ''', (
-        data.get('title'),
-        data.get('description', ''),
-        data.get('color', '#6750A4'),
-        data.get('status', 'todo'),
-        data.get('priority', 0),
-        data.get('project_id'),
-        data.get('due_date')
-    ))
-    
-    task_id = cursor.lastrowid
-    
-    # タグを紐付け
-    if 'tag_ids' in data and data['tag_ids']:
-        for tag_id in data['tag_ids']:
-            cursor.execute(
-                'INSERT OR IGNORE INTO task_tags (task_id, tag_id) VALUES (?, ?)',
-                (task_id, tag_id)
-            )
-    
-    conn.commit()
-    
-    # 作成したタスクを取得
-    cursor.execute('SELECT * FROM tasks WHERE id = ?', (task_id,))
-    task = dict_from_row(cursor.fetchone())
-    
-    conn.close()
+    task = get_repository().tasks.create(request.json)
+    
     return jsonify(task), 201
 
+@tasks_bp.route('/tasks/bulk', methods=['POST'])
+def create_tasks_bulk():
+    """タスクを一括作成
+    
+    タスクの配列（または {'tasks': [...]}）を受け取り、1トランザクションで
+    まとめて挿入する。結果は入力順に {'index', 'status', ...} で返す。
+    """
+    items = _bulk_items(request.json, 'tasks')
+    if items is None:
+        return jsonify({'error': 'Expected an array of tasks'}), 400
+    
+    body, status = bulk_create_results(items, get_repository().tasks.bulk_create)
+    return jsonify(body), status
+
+@tasks_bp.route('/tasks/bulk', methods=['PATCH'])
+def update_tasks_bulk():
+    """タスクを一括更新
+    
+    {'id': ..., 更新するフィールド} の配列（または {'tasks': [...]}）を受け取り、
+    PUT /tasks/<id> と同じ規則で1トランザクションにまとめて更新する。
+    """
+    items = _bulk_items(request.json, 'tasks')
+    if items is None:
+        return jsonify({'error': 'Expected an array of tasks'}), 400
+    
+    body, status = bulk_update_results(items, get_repository().tasks.bulk_update)
+    return jsonify(body), status
+
+@tasks_bp.route('/tasks/bulk', methods=['DELETE'])
+def delete_tasks_bulk():
+    """タスクを一括削除（IDの配列、または {'ids': [...]} を受け付ける）"""
+    ids = _bulk_items(request.json, 'ids')
+    if ids is None:
+        return jsonify({'error': 'Expected an array of task ids'}), 400
+    
+    body, status = bulk_delete_results(ids, get_repository().tasks.bulk_delete)
+    return jsonify(body), status
+
 @tasks_bp.route('/tasks/<int:task_id>', methods=['GET'])
 def get_task(task_id):
     """タスクを取得"""
-    conn = get_db()
-    cursor = conn.cursor()
-    
-    cursor.execute('''
-        SELECT t.*, p.name as project_name
-        FROM tasks t
-        LEFT JOIN projects p ON t.project_id = p.id
-        WHERE t.id = ?
-    ''', (task_id,))
-    
-    task = dict_from_row(cursor.fetchone())
+    task = get_repository().tasks.get(task_id)
     
     if not task:
-        conn.close()
         return jsonify({'error': 'Task not found'}), 404
     
-    # タグを取得
-    cursor.execute('''
-        SELECT tg.* FROM tags tg
-        JOIN task_tags tt ON tg.id = tt.tag_id
-        WHERE tt.task_id = ?
-    ''', (task_id,))
-    
-    task['tags'] = [dict_from_row(row) for row in cursor.fetchall()]
-    
-    conn.close()
     return jsonify(task)
 
 @tasks_bp.route('/tasks/<int:task_id>', methods=['PUT'])
 def update_task(task_id):
     """タスクを更新"""
-    data = request.json
-    conn = get_db()
-    cursor = conn.cursor()
-    
-    # 現在のタスクを取得
-    cursor.execute('SELECT * FROM tasks WHERE id = ?', (task_id,))
-    task = cursor.fetchone()
+    task = get_repository().tasks.update(task_id, request.json)
     
     if not task:
-        conn.close()
         return jsonify({'error': 'Task not found'}), 404
     
-    # ステータスがdoneに変わった場合、completed_atを設定
-    completed_at = None
-    if data.get('status') == 'done' and task['status'] != 'done':
-        completed_at = datetime.now().isoformat()
-    
-    cursor.execute('''
-        UPDATE tasks SET
-            title = COALESCE(?, title),
-            description = COALESCE(?, description),
-            color = COALESCE(?, color),
-            status = COALESCE(?, status),
-            priority = COALESCE(?, priority),
-            project_id = ?,
-            due_date = ?,
-            updated_at = CURRENT_TIMESTAMP,
-            completed_at = COALESCE(?, completed_at)
-        WHERE id = ?
-    ''', (
-        data.get('title'),
-        data.get('description'),
-        data.get('color'),
-        data.get('status'),
-        data.get('priority'),
-        data.get('project_id', task['project_id']),
-        data.get('due_date', task['due_date']),
-        completed_at,
-        task_id
-    ))
-    
-    # タグを更新
-    if 'tag_ids' in data:
-        cursor.execute('DELETE FROM task_tags WHERE task_id = ?', (task_id,))
-        for tag_id in data['tag_ids']:
-            cursor.execute(
-                'INSERT OR IGNORE INTO task_tags (task_id, tag_id) VALUES (?, ?)',
-                (task_id, tag_id)
-            )
-    
-    conn.commit()
-    
-    # 更新したタスクを取得
-    cursor.execute('SELECT * FROM tasks WHERE id = ?', (task_id,))
-    updated_task = dict_from_row(cursor.fetchone())
-    
-    conn.close()
-    return jsonify(updated_task)
+    return jsonify(task)
 
 @tasks_bp.route('/tasks/<int:task_id>', methods=['DELETE'])
 def delete_task(task_id):
     """タスクを削除"""
-    conn = get_db()
-    cursor = conn.cursor()
-    
-    cursor.execute('SELECT * FROM tasks WHERE id = ?', (task_id,))
-    task = cursor.fetchone()
-    
-    if not task:
-        conn.close()
+    if not get_repository().tasks.delete(task_id):
         return jsonify({'error': 'Task not found'}), 404
     
-    cursor.execute('DELETE FROM tasks WHERE id = ?', (task_id,))
-    conn.commit()
-    conn.close()
-    
     return jsonify({'message': 'Task deleted successfully'})
@@ -0,0 +1,562 @@
+"""
+DevTodo - 非同期（ASGI）版エントリーポイント
+
+    uvicorn asgi:app --host 0.0.0.0 --port 8000 --workers 4
+    python asgi.py
+
+api/ の Flask ブループリントと同じ /api のルートを Starlette で提供する。
+リクエストの処理はイベントループ上で行い、DB へのアクセスだけを
+AsyncConnectionPool（接続ごとの専用スレッド）で待つ。アイドルな接続や
+SSE（/api/events）はスレッドを使わないため、1プロセスで多数のクライアントを収容できる。
+レスポンスの形式・ETag・エラーメッセージは Flask 版と同じ。静的ファイルは
+WSGI 版（app.py）かリバースプロキシで配信する。
+"""
+
+import json
+from contextlib import asynccontextmanager
+from datetime import date, datetime
+from functools import wraps
+from starlette.applications import Starlette
+from starlette.exceptions import HTTPException
+from starlette.middleware import Middleware
+from starlette.middleware.cors import CORSMiddleware
+from starlette.responses import Response, StreamingResponse
+from starlette.routing import Route
+from werkzeug.http import parse_etags, quote_etag
+from app import HOST, PORT, WORKERS, CORS_ORIGINS, SUPABASE_URL, SUPABASE_KEY
+from database import AsyncConnectionPool, get_table_versions, init_db
+from events import event_stream, feed, parse_version
+from repository import SQLiteRepository, DuplicateError, UnsupportedOperation
+from api.etag import ALL_TABLES, etag_value
+from api.pagination import DEFAULT_LIMIT, parse_page_args, next_page
+from api.report_cache import report_cache, get_report_cache_stats
+from api.reports import completed_count
+from api.streaming import STREAM_BATCH_SIZE, wants_stream, split_fields
+from api.sync import sync_result
+from api.tasks import (
+    _filters, _bulk_items, bulk_create_results, bulk_update_results, bulk_delete_results
+)
+
+db = AsyncConnectionPool()
+
+# ===================================
+# ヘルパー
+# ===================================
+
+def dumps(data):
+    """Flask の jsonify と同じ形式（キーをソート、ASCII、区切りの空白なし）でJSONに変換"""
+    return json.dumps(data, sort_keys=True, separators=(',', ':'), default=str)
+
+def json_response(data, status_code=200):
+    return Response(dumps(data) + '\n', status_code=status_code, media_type='application/json')
+
+def error(message, status_code):
+    return json_response({'error': message}, status_code)
+
+def full_path(request):
+    """Flask の request.full_path と同じ 'パス?クエリ'（ETag・キャッシュのキー）"""
+    return f"{request.url.path}?{request.url.query}"
+
+def int_arg(args, name, default):
+    """request.args.get(name, default, type=int) と同じ（変換できなければ default）"""
+    try:
+        return int(args[name])
+    except (KeyError, ValueError):
+        return default
+
+async def request_json(request):
+    """リクエスト本文のJSON（不正な場合は 400）"""
+    try:
+        return await request.json()
+    except ValueError:
+        raise HTTPException(400, 'Invalid JSON body')
+
+async def http_error(request, exc):
+    """404 / 405 などもエラーをJSONで返す"""
+    return error(exc.detail, exc.status_code)
+
+async def unsupported_operation(request, exc):
+    """バックエンドが対応していない操作は 501（app.py と同じ）"""
+    return error(str(exc), 501)
+
+async def run(fn):
+    """fn(リポジトリ) を DB 接続のスレッドで実行"""
+    return await db.run(lambda conn: fn(SQLiteRepository(conn)))
+
+async def write(fn):
+    """書き込みを実行し、変更通知のフィードを起こす"""
+    result = await run(fn)
+    feed.wake()
+    return result
+
+def stream_json(fetch, fields=None, key=None, sort_key=None):
+    """行をバッチごとに読んでストリーミング
+    
+    sort_key を指定すると、fetch(リポジトリ, after, limit) で一覧のキーセットページングと
+    同じように1バッチずつ読み、バッチごとに接続をプールへ返す（遅いクライアントが
+    接続を占有しない）。指定しない場合は fetch(リポジトリ) の全行を1回で読む（件数が
+    限られる一覧用）。fields / key を指定すると {**fields, key: [...]} の形で返す
+    （api/streaming.py と同じ形式）。fields は最初のバッチを読んだ後に出力する。
+    """
+    async def batches():
+        if sort_key is None:
+            rows = await run(fetch)
+            for start in range(0, len(rows), STREAM_BATCH_SIZE):
+                yield rows[start:start + STREAM_BATCH_SIZE]
+            return
+        after = None
+        while True:
+            rows = await run(lambda repo: fetch(repo, after, STREAM_BATCH_SIZE))
+            if rows:
+                yield rows
+            if len(rows) < STREAM_BATCH_SIZE:
+                return
+            after = sort_key(rows[-1])
+    
+    async def generate():
+        pending = batches()
+        rows = await anext(pending, None)
+        if key is None:
+            yield '['
+        else:
+            before, after = split_fields(fields, key)
+            head = dumps(before)[1:-1] if before else ''
+            yield '{' + (head + ',' if head else '') + dumps(key) + ':['
+        first = True
+        while rows:
+            chunk = ','.join(dumps(row) for row in rows)
+            yield chunk if first else ',' + chunk
+            first = False
+            rows = await anext(pending, None)
+        if key is None:
+            yield ']\n'
+        else:
+            tail = dumps(after)[1:-1] if after else ''
+            yield ']' + (',' + tail if tail else '') + '}\n'
+    
+    return StreamingResponse(generate(), media_type='application/json')
+
+def etag_for(*tables, daily=False):
+    """api/etag.py の etag_for と同じ（依存テーブルが変わっていなければ 304）"""
+    def decorator(handler):
+        @wraps(handler)
+        async def wrapper(request):
+            versions = await db.run(get_table_versions, tables)
+            etag = etag_value(full_path(request), tables, versions, daily)
+            if etag in parse_etags(request.headers.get('if-none-match')):
+                response = Response(status_code=304)
+            else:
+                response = await handler(request)
+                if response.status_code != 200:
+                    return response
+            response.headers['ETag'] = quote_etag(etag)
+            response.headers['Cache-Control'] = 'no-cache'
+            return response
+        return wrapper
+    return decorator
+
+def cached_report(*tables, daily=False, closed_period=None):
+    """api/report_cache.py の cached_report と同じ（キャッシュ本体もプロセス内で共有）"""
+    def decorator(handler):
+        @wraps(handler)
+        async def wrapper(request):
+            if wants_stream(request.query_params):
+                return await handler(request)
+            
+            permanent = closed_period is not None and closed_period(request)
+            key = full_path(request)
+            if daily and not permanent:
+                key = f'{key}|{date.today().isoformat()}'
+            versions = await db.run(get_table_versions, tables)
+            
+            body = report_cache.get(key, versions)
+            if body is not None:
+                return Response(body, media_type='application/json')
+            
+            response = await handler(request)
+            if response.status_code == 200 and not isinstance(response, StreamingResponse):
+                report_cache.set(key, versions, response.body, permanent)
+            return response
+        return wrapper
+    return decorator
+
+# ===================================
+# タスク
+# ===================================
+
+@etag_for('tasks', 'projects', 'tags', 'task_tags')
+async def get_tasks(request):
+    args = request.query_params
+    if args.get('q', '').strip():
+        return await search_tasks(request)
+    
+    filters = _filters(args)
+    try:
+        limit, after = parse_page_args(args, 3)
+    except ValueError as e:
+        return error(str(e), 400)
+    
+    if not limit:
+        if wants_stream(args):
+            return stream_json(
+                lambda repo, after, limit: repo.tasks.list(**filters, limit=limit, after=after),
+                sort_key=lambda t: (t['priority'], t['created_at'], t['id'])
+            )
+        return json_response(await run(lambda repo: repo.tasks.list(**filters)))
+    
+    page, next_cursor = next_page(
+        await run(lambda repo: repo.tasks.list(**filters, limit=limit + 1, after=after)), limit,
+        lambda t: (t['priority'], t['created_at'], t['id'])
+    )
+    return json_response({'tasks': page, 'next_cursor': next_cursor})
+
+async def search_tasks(request):
+    args = request.query_params
+    try:
+        limit, after = parse_page_args(args, 2)
+    except ValueError as e:
+        return error(str(e), 400)
+    limit = limit or DEFAULT_LIMIT
+    
+    tasks = await run(lambda repo: repo.tasks.search(
+        args.get('q', ''), **_filters(args), limit=limit + 1, after=after
+    ))
+    tasks, next_cursor = next_page(tasks, limit, lambda t: (t['rank'], t['id']))
+    return json_response({'tasks': tasks, 'next_cursor': next_cursor})
+
+async def create_task(request):
+    data = await request_json(request)
+    return json_response(await write(lambda repo: repo.tasks.create(data)), 201)
+
+async def create_tasks_bulk(request):
+    items = _bulk_items(await request_json(request), 'tasks')
+    if items is None:
+        return error('Expected an array of tasks', 400)
+    
+    body, status = await write(lambda repo: bulk_create_results(items, repo.tasks.bulk_create))
+    return json_response(body, status)
+
+async def update_tasks_bulk(request):
+    items = _bulk_items(await request_json(request), 'tasks')
+    if items is None:
+        return error('Expected an array of tasks', 400)
+    
+    body, status = await write(lambda repo: bulk_update_results(items, repo.tasks.bulk_update))
+    return json_response(body, status)
+
+async def delete_tasks_bulk(request):
+    ids = _bulk_items(await request_json(request), 'ids')
+    if ids is None:
+        return error('Expected an array of task ids', 400)
+    
+    body, status = await write(lambda repo: bulk_delete_results(ids, repo.tasks.bulk_delete))
+    return json_response(body, status)
+
+async def get_task(request):
+    task_id = request.path_params['task_id']
+    task = await run(lambda repo: repo.tasks.get(task_id))
+    if not task:
+        return error('Task not found', 404)
+    return json_response(task)
+
+async def update_task(request):
+    task_id = request.path_params['task_id']
+    data = await request_json(request)
+    task = await write(lambda repo: repo.tasks.update(task_id, data))
+    if not task:
+        return error('Task not found', 404)
+    return json_response(task)
+
+async def delete_task(request):
+    task_id = request.path_params['task_id']
+    if not await write(lambda repo: repo.tasks.delete(task_id)):
+        return error('Task not found', 404)
+    return json_response({'message': 'Task deleted successfully'})
+
+# ===================================
+# プロジェクト
+# ===================================
+
+@etag_for('projects', 'tasks')
+async def get_projects(request):
+    if wants_stream(request.query_params):
+        return stream_json(lambda repo: repo.projects.list())
+    return json_response(await run(lambda repo: repo.projects.list()))
+
+async def create_project(request):
+    data = await request_json(request)
+    return json_response(await write(lambda repo: repo.projects.create(data)), 201)
+
+async def get_project(request):
+    project_id = request.path_params['project_id']
+    project = await run(lambda repo: repo.projects.get(project_id))
+    if not project:
+        return error('Project not found', 404)
+    return json_response(project)
+
+async def update_project(request):
+    project_id = request.path_params['project_id']
+    data = await request_json(request)
+    project = await write(lambda repo: repo.projects.update(project_id, data))
+    if not project:
+        return error('Project not found', 404)
+    return json_response(project)
+
+async def delete_project(request):
+    project_id = request.path_params['project_id']
+    if not await write(lambda repo: repo.projects.delete(project_id)):
+        return error('Project not found', 404)
+    return json_response({'message': 'Project deleted successfully'})
+
+# ===================================
+# タグ
+# ===================================
+
+@etag_for('tags', 'task_tags')
+async def get_tags(request):
+    return json_response(await run(lambda repo: repo.tags.list()))
+
+async def create_tag(request):
+    data = await request_json(request)
+    try:
+        tag = await write(lambda repo: repo.tags.create(data))
+    except DuplicateError as e:
+        return error(str(e), 400)
+    return json_response(tag, 201)
+
+async def update_tag(request):
+    tag_id = request.path_params['tag_id']
+    data = await request_json(request)
+    try:
+        tag = await write(lambda repo: repo.tags.update(tag_id, data))
+    except DuplicateError as e:
+        return error(str(e), 400)
+    if not tag:
+        return error('Tag not found', 404)
+    return json_response(tag)
+
+async def delete_tag(request):
+    tag_id = request.path_params['tag_id']
+    if not await write(lambda repo: repo.tags.delete(tag_id)):
+        return error('Tag not found', 404)
+    return json_response({'message': 'Tag deleted successfully'})
+
+# ===================================
+# アイデア
+# ===================================
+
+@etag_for('ideas')
+async def get_ideas(request):
+    args = request.query_params
+    if args.get('q', '').strip():
+        return await search_ideas(request)
+    
+    search = args.get('search', '')
+    try:
+        limit, after = parse_page_args(args, 3)
+    except ValueError as e:
+        return error(str(e), 400)
+    
+    if not limit:
+        if wants_stream(args):
+            return stream_json(
+                lambda repo, after, limit: repo.ideas.list(search, limit, after),
+                sort_key=lambda i: (i['is_pinned'], i['updated_at'], i['id'])
+            )
+        return json_response(await run(lambda repo: repo.ideas.list(search)))
+    
+    page, next_cursor = next_page(
+        await run(lambda repo: repo.ideas.list(search, limit + 1, after)), limit,
+        lambda i: (i['is_pinned'], i['updated_at'], i['id'])
+    )
+    return json_response({'ideas': page, 'next_cursor': next_cursor})
+
+async def search_ideas(request):
+    args = request.query_params
+    try:
+        limit, after = parse_page_args(args, 2)
+    except ValueError as e:
+        return error(str(e), 400)
+    limit = limit or DEFAULT_LIMIT
+    
+    ideas = await run(lambda repo: repo.ideas.search(args.get('q', ''), limit + 1, after))
+    ideas, next_cursor = next_page(ideas, limit, lambda i: (i['rank'], i['id']))
+    return json_response({'ideas': ideas, 'next_cursor': next_cursor})
+
+async def create_idea(request):
+    data = await request_json(request)
+    return json_response(await write(lambda repo: repo.ideas.create(data)), 201)
+
+async def get_idea(request):
+    idea_id = request.path_params['idea_id']
+    idea = await run(lambda repo: repo.ideas.get(idea_id))
+    if not idea:
+        return error('Idea not found', 404)
+    return json_response(idea)
+
+async def update_idea(request):
+    idea_id = request.path_params['idea_id']
+    data = await request_json(request)
+    idea = await write(lambda repo: repo.ideas.update(idea_id, data))
+    if not idea:
+        return error('Idea not found', 404)
+    return json_response(idea)
+
+async def delete_idea(request):
+    idea_id = request.path_params['idea_id']
+    if not await write(lambda repo: repo.ideas.delete(idea_id)):
+        return error('Idea not found', 404)
+    return json_response({'message': 'Idea deleted successfully'})
+
+async def convert_to_task(request):
+    idea_id = request.path_params['idea_id']
+    task = await write(lambda repo: repo.ideas.convert_to_task(idea_id))
+    if not task:
+        return error('Idea not found', 404)
+    return json_response(task, 201)
+
+# ===================================
+# レポート
+# ===================================
+
+def report_month(request):
+    """?year=&month=（既定は今月）"""
+    now = datetime.now()
+    args = request.query_params
+    return int_arg(args, 'year', now.year), int_arg(args, 'month', now.month)
+
+def is_closed_month(request):
+    """?year=&month= が今月より前を指すか（api/reports.py と同じ）"""
+    now = datetime.now()
+    return report_month(request) < (now.year, now.month)
+
+@etag_for('tasks', daily=True)
+@cached_report('tasks', daily=True)
+async def get_weekly_report(request):
+    if wants_stream(request.query_params):
+        # 見出しの集計と completed_tasks は1回の読み出しでそろえる（1週間分なので件数は限られる）
+        report = {}
+        
+        def completed_tasks(repo):
+            weekly = repo.reports.weekly()
+            items = list(weekly.pop('completed_tasks'))
+            weekly['completed_count'] = completed_count(weekly)
+            report.update(weekly)
+            return items
+        
+        # report は completed_tasks の実行後に埋まり、その後に見出しとして出力される
+        return stream_json(completed_tasks, report, 'completed_tasks')
+    
+    def weekly(repo):
+        report = repo.reports.weekly()
+        report['completed_tasks'] = list(report['completed_tasks'])
+        report['completed_count'] = completed_count(report)
+        return report
+    
+    return json_response(await run(weekly))
+
+@etag_for('tasks', 'projects', 'tags', 'task_tags', daily=True)
+@cached_report('tasks', 'projects', 'tags', 'task_tags', daily=True, closed_period=is_closed_month)
+async def get_monthly_report(request):
+    year, month = report_month(request)
+    return json_response(await run(lambda repo: repo.reports.monthly(year, month)))
+
+@etag_for(*ALL_TABLES)
+@cached_report(*ALL_TABLES)
+async def get_summary(request):
+    return json_response(await run(lambda repo: repo.reports.summary()))
+
+# ===================================
+# 同期・変更通知・その他
+# ===================================
+
+async def sync(request):
+    args = request.query_params
+    body, status = await run(lambda repo: sync_result(repo.sync, args.get('since'), args.get('limit')))
+    response = json_response(body, status)
+    if status == 200:
+        response.headers['Cache-Control'] = 'no-store'
+    return response
+
+async def get_events(request):
+    """変更通知の SSE（接続数の上限なし。待機中はスレッドを使わない）"""
+    since = parse_version(request.headers.get('last-event-id') or request.query_params.get('since'))
+    return StreamingResponse(
+        event_stream(since),
+        media_type='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
+
+async def health_check(request):
+    return json_response({
+        'status': 'healthy',
+        'service': 'DevTodo',
+        'version': '1.0.0',
+        'mode': 'asgi',
+        'db_pool': db.stats(),
+        'report_cache': get_report_cache_stats()
+    })
+
+async def get_config(request):
+    return json_response({
+        'supabase_url': SUPABASE_URL,
+        'supabase_key': SUPABASE_KEY,
+        'events_url': '/api/events'
+    })
+
+routes = [
+    Route('/health', health_check),
+    Route('/api/config', get_config),
+    Route('/api/tasks', get_tasks, methods=['GET']),
+    Route('/api/tasks', create_task, methods=['POST']),
+    Route('/api/tasks/bulk', create_tasks_bulk, methods=['POST']),
+    Route('/api/tasks/bulk', update_tasks_bulk, methods=['PATCH']),
+    Route('/api/tasks/bulk', delete_tasks_bulk, methods=['DELETE']),
+    Route('/api/tasks/{task_id:int}', get_task, methods=['GET']),
+    Route('/api/tasks/{task_id:int}', update_task, methods=['PUT']),
+    Route('/api/tasks/{task_id:int}', delete_task, methods=['DELETE']),
+    Route('/api/projects', get_projects, methods=['GET']),
+    Route('/api/projects', create_project, methods=['POST']),
+    Route('/api/projects/{project_id:int}', get_project, methods=['GET']),
+    Route('/api/projects/{project_id:int}', update_project, methods=['PUT']),
+    Route('/api/projects/{project_id:int}', delete_project, methods=['DELETE']),
+    Route('/api/tags', get_tags, methods=['GET']),
+    Route('/api/tags', create_tag, methods=['POST']),
+    Route('/api/tags/{tag_id:int}', update_tag, methods=['PUT']),
+    Route('/api/tags/{tag_id:int}', delete_tag, methods=['DELETE']),
+    Route('/api/ideas', get_ideas, methods=['GET']),
+    Route('/api/ideas', create_idea, methods=['POST']),
+    Route('/api/ideas/{idea_id:int}', get_idea, methods=['GET']),
+    Route('/api/ideas/{idea_id:int}', update_idea, methods=['PUT']),
+    Route('/api/ideas/{idea_id:int}', delete_idea, methods=['DELETE']),
+    Route('/api/ideas/{idea_id:int}/convert', convert_to_task, methods=['POST']),
+    Route('/api/reports/weekly', get_weekly_report, methods=['GET']),
+    Route('/api/reports/monthly', get_monthly_report, methods=['GET']),
+    Route('/api/reports/summary', get_summary, methods=['GET']),
+    Route('/api/sync', sync, methods=['GET']),
+    Route('/api/events', get_events, methods=['GET']),
+]
+
+@asynccontextmanager
+async def lifespan(app):
+    # 起動時に未適用のスキーママイグレーションを適用してから接続を開く
+    init_db()
+    await db.start()
+    yield
+    await db.close()
+
+app = Starlette(
+    routes=routes,
+    lifespan=lifespan,
+    exception_handlers={HTTPException: http_error, UnsupportedOperation: unsupported_operation},
+    middleware=[Middleware(
+        CORSMiddleware,
+        allow_origins=[origin.strip() for origin in CORS_ORIGINS.split(',')],
+        allow_methods=['*'],
+        allow_headers=['*']
+    )]
+)
+
+if __name__ == '__main__':
+    import uvicorn
+    uvicorn.run('asgi:app', host=HOST, port=PORT, workers=WORKERS)
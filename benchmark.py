@@ -0,0 +1,209 @@
+"""
+DevTodo - WSGI 版と ASGI 版の負荷比較
+
+それぞれ一時ディレクトリの DB でサーバーを起動し、同じ条件で測定する。
+- wsgi: gunicorn -c gunicorn.conf.py wsgi:app（ワーカー × スレッド）
+- asgi: uvicorn asgi:app（ワーカー × イベントループ）
+
+--idle の数だけ /api/events の SSE 接続を開いたまま（アイドルなクライアント・
+ロングポーリングの代わり）、--concurrency 本のクライアントが --duration 秒間
+GET を繰り返し、リクエスト数/秒とレイテンシ（p50 / p95 / p99）を表示する。
+
+    python benchmark.py
+    python benchmark.py --mode asgi --idle 2000 --concurrency 100 --duration 20
+
+WSGI 版では SSE の接続ごとにスレッドを1本使うため、--idle が
+ワーカー数 × スレッド数に近づくと通常のリクエストが待たされる。
+"""
+
+import argparse
+import asyncio
+import os
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+import httpx
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+DEFAULT_PATHS = ('/api/tasks?limit=50', '/api/reports/summary')
+SEED_BATCH_SIZE = 500
+STARTUP_TIMEOUT = 30
+REQUEST_TIMEOUT = 10
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+def server_command(mode, port, workers, threads):
+    """サーバーの起動コマンドと環境変数"""
+    env = dict(os.environ, HOST='127.0.0.1', PORT=str(port),
+               WEB_CONCURRENCY=str(workers), THREADS=str(threads))
+    if mode == 'wsgi':
+        # 本番と同じく SSE はイベントサーバーで受けるが、比較のため
+        # /api/events（ワーカーのスレッドを使う）にも上限なしで接続させる
+        env.update(EVENTS_PORT=str(free_port()), EVENTS_MAX_STREAMS='100000')
+        command = [sys.executable, '-m', 'gunicorn', '-c', 'gunicorn.conf.py', 'wsgi:app']
+    else:
+        command = [sys.executable, '-m', 'uvicorn', 'asgi:app', '--host', '127.0.0.1',
+                   '--port', str(port), '--workers', str(workers), '--no-access-log']
+    return command, env
+
+async def wait_until_ready(client, process):
+    deadline = time.monotonic() + STARTUP_TIMEOUT
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f'server exited with code {process.returncode}')
+        try:
+            if (await client.get('/health')).status_code == 200:
+                return
+        except httpx.TransportError:
+            pass
+        await asyncio.sleep(0.2)
+    raise RuntimeError('server did not start in time')
+
+async def seed(client, count):
+    """タスクを count 件作成（一括作成 API を使う）"""
+    project = (await client.post('/api/projects', json={'name': 'Benchmark'})).json()
+    for start in range(0, count, SEED_BATCH_SIZE):
+        items = [
+            {'title': f'Task {i}', 'priority': i % 3, 'project_id': project['id'],
+             'status': 'done' if i % 4 == 0 else 'todo'}
+            for i in range(start, min(start + SEED_BATCH_SIZE, count))
+        ]
+        response = await client.post('/api/tasks/bulk', json=items)
+        response.raise_for_status()
+
+async def hold_idle_streams(client, count, opened, release):
+    """SSE の接続を count 本開き、release が立つまで読まずに保持する"""
+    async def hold():
+        try:
+            async with client.stream('GET', '/api/events', timeout=None) as response:
+                if response.status_code == 200:
+                    opened.append(response)
+                await release.wait()
+        except httpx.HTTPError:
+            pass
+    
+    return [asyncio.create_task(hold()) for _ in range(count)]
+
+async def run_load(client, paths, concurrency, duration):
+    """concurrency 本のクライアントで duration 秒間 GET を繰り返す"""
+    latencies = []
+    errors = 0
+    deadline = time.monotonic() + duration
+    
+    async def worker(offset):
+        nonlocal errors
+        i = offset
+        while time.monotonic() < deadline:
+            path = paths[i % len(paths)]
+            i += 1
+            started = time.perf_counter()
+            try:
+                response = await client.get(path, timeout=REQUEST_TIMEOUT)
+                if response.status_code != 200:
+                    errors += 1
+                    continue
+            except httpx.HTTPError:
+                errors += 1
+                continue
+            latencies.append(time.perf_counter() - started)
+    
+    started = time.monotonic()
+    await asyncio.gather(*(worker(i) for i in range(concurrency)))
+    return latencies, errors, time.monotonic() - started
+
+def percentile(sorted_values, p):
+    if not sorted_values:
+        return float('nan')
+    index = min(len(sorted_values) - 1, int(len(sorted_values) * p / 100))
+    return sorted_values[index]
+
+async def bench(mode, args):
+    port = free_port()
+    work_dir = tempfile.mkdtemp(prefix=f'devtodo-bench-{mode}-')
+    command, env = server_command(mode, port, args.workers, args.threads)
+    env['DATABASE_PATH'] = os.path.join(work_dir, 'todo.db')
+    process = subprocess.Popen(command, cwd=BASE_DIR, env=env,
+                               stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    
+    limits = httpx.Limits(max_connections=None, max_keepalive_connections=None)
+    release = asyncio.Event()
+    opened = []
+    holders = []
+    try:
+        async with httpx.AsyncClient(base_url=f'http://127.0.0.1:{port}', limits=limits,
+                                     timeout=REQUEST_TIMEOUT) as client:
+            await wait_until_ready(client, process)
+            await seed(client, args.tasks)
+            
+            holders = await hold_idle_streams(client, args.idle, opened, release)
+            # 接続が確立するのを少し待つ（WSGI 版では空きスレッドの分しか確立しない）
+            deadline = time.monotonic() + args.idle_wait
+            while len(opened) < args.idle and time.monotonic() < deadline:
+                await asyncio.sleep(0.1)
+            
+            # ウォームアップ（接続の確立やキャッシュの作成を測定に含めない）
+            await run_load(client, args.paths, args.concurrency, 1)
+            latencies, errors, elapsed = await run_load(
+                client, args.paths, args.concurrency, args.duration
+            )
+            release.set()
+            for holder in holders:
+                holder.cancel()
+            await asyncio.gather(*holders, return_exceptions=True)
+    finally:
+        process.terminate()
+        try:
+            process.wait(10)
+        except subprocess.TimeoutExpired:
+            process.kill()
+        shutil.rmtree(work_dir, ignore_errors=True)
+    
+    latencies.sort()
+    return {
+        'mode': mode,
+        'idle': f'{len(opened)}/{args.idle}',
+        'requests': len(latencies),
+        'errors': errors,
+        'rps': len(latencies) / elapsed,
+        'p50': percentile(latencies, 50) * 1000,
+        'p95': percentile(latencies, 95) * 1000,
+        'p99': percentile(latencies, 99) * 1000,
+    }
+
+def print_results(results):
+    print(f"{'mode':<6}{'idle':>12}{'requests':>10}{'errors':>8}"
+          f"{'req/s':>10}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}")
+    for r in results:
+        print(f"{r['mode']:<6}{r['idle']:>12}{r['requests']:>10}{r['errors']:>8}"
+              f"{r['rps']:>10.1f}{r['p50']:>10.1f}{r['p95']:>10.1f}{r['p99']:>10.1f}")
+
+def parse_args():
+    parser = argparse.ArgumentParser(description='Compare the WSGI and ASGI servers under load.')
+    parser.add_argument('--mode', choices=('wsgi', 'asgi', 'both'), default='both')
+    parser.add_argument('--duration', type=float, default=10, help='seconds of measured load')
+    parser.add_argument('--concurrency', type=int, default=50, help='concurrent request loops')
+    parser.add_argument('--idle', type=int, default=0, help='idle SSE connections held open')
+    parser.add_argument('--idle-wait', type=float, default=5,
+                        help='seconds to wait for idle connections to open')
+    parser.add_argument('--tasks', type=int, default=1000, help='tasks seeded before measuring')
+    parser.add_argument('--workers', type=int, default=2, help='server worker processes')
+    parser.add_argument('--threads', type=int, default=4, help='threads per WSGI worker')
+    parser.add_argument('--path', dest='paths', action='append',
+                        help=f'GET path to request (repeatable, default: {", ".join(DEFAULT_PATHS)})')
+    args = parser.parse_args()
+    args.paths = args.paths or list(DEFAULT_PATHS)
+    return args
+
+if __name__ == '__main__':
+    args = parse_args()
+    modes = ('wsgi', 'asgi') if args.mode == 'both' else (args.mode,)
+    print(f"workers={args.workers} threads={args.threads} concurrency={args.concurrency} "
+          f"idle={args.idle} duration={args.duration}s tasks={args.tasks}")
+    print_results([asyncio.run(bench(mode, args)) for mode in modes])
@@ -0,0 +1,126 @@
+"""
+DevTodo - 静的ファイルのビルド
+
+static/ を dist/ にコピーし、次の処理を行う。
+- CSS / JS / アイコンのファイル名に内容のハッシュを付ける（styles.css → styles.<hash>.css）
+- index.html / sw.js / manifest.json の参照をハッシュ付きの名前に書き換える
+- テキスト系のファイルに gzip（.gz）と brotli（.br）の圧縮版を作る
+
+ハッシュ付きのファイルは内容が変わると名前も変わるため、app.py は
+Cache-Control: immutable で配信する。
+
+    python build_static.py
+"""
+
+import gzip
+import hashlib
+import json
+import os
+import re
+import shutil
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+SOURCE_DIR = os.path.join(BASE_DIR, 'static')
+BUILD_DIR = os.path.join(BASE_DIR, 'dist')
+
+# ハッシュを付けるファイル（index.html など URL が固定のものは除く）
+FINGERPRINT_EXTENSIONS = ('.css', '.js', '.png', '.svg', '.ico', '.woff2')
+FIXED_NAMES = ('index.html', 'sw.js', 'manifest.json')
+# 参照を書き換えるファイル
+REWRITE_NAMES = ('index.html', 'sw.js', 'manifest.json')
+# 圧縮版を作るファイル
+COMPRESS_EXTENSIONS = ('.html', '.css', '.js', '.json', '.svg', '.txt')
+
+HASH_LENGTH = 10
+FINGERPRINT_RE = re.compile(rf'\.[0-9a-f]{{{HASH_LENGTH}}}\.[A-Za-z0-9]+$')
+
+def is_fingerprinted(path):
+    """ハッシュ付きのファイル名か（内容が変わらないので長期キャッシュできる）"""
+    return bool(FINGERPRINT_RE.search(path))
+
+def content_hash(data):
+    return hashlib.sha256(data).hexdigest()[:HASH_LENGTH]
+
+def fingerprinted_name(path, data):
+    """styles.css → styles.<hash>.css"""
+    root, ext = os.path.splitext(path)
+    return f'{root}.{content_hash(data)}{ext}'
+
+def rewrite_references(text, names):
+    """'css/styles.css' や '/js/app.js' のような引用符内の参照を書き換える"""
+    for original, hashed in names.items():
+        text = re.sub(
+            rf'(?<=["\'/]){re.escape(original)}(?=["\'?#])', hashed, text
+        )
+    return text
+
+def write_compressed(path, data):
+    """圧縮して小さくなる場合だけ .gz / .br を書き出す"""
+    variants = [('.gz', gzip.compress(data, compresslevel=9, mtime=0))]
+    if brotli:
+        variants.append(('.br', brotli.compress(data, quality=11)))
+    for suffix, compressed in variants:
+        if len(compressed) < len(data):
+            with open(path + suffix, 'wb') as f:
+                f.write(compressed)
+
+def iter_source_files():
+    """static/ 以下のファイルを 'css/styles.css' のような相対パスで返す"""
+    for root, _, files in os.walk(SOURCE_DIR):
+        for name in sorted(files):
+            path = os.path.relpath(os.path.join(root, name), SOURCE_DIR)
+            yield path.replace(os.sep, '/')
+
+def build():
+    """dist/ を作り直し、ハッシュ付きの名前の対応表を返す"""
+    shutil.rmtree(BUILD_DIR, ignore_errors=True)
+    
+    contents = {}
+    for path in iter_source_files():
+        with open(os.path.join(SOURCE_DIR, path), 'rb') as f:
+            contents[path] = f.read()
+    
+    names = {
+        path: fingerprinted_name(path, data)
+        for path, data in contents.items()
+        if path.endswith(FINGERPRINT_EXTENSIONS) and path not in FIXED_NAMES
+    }
+    
+    # Service Worker のキャッシュ名をビルドごとに変え、古いキャッシュを捨てさせる
+    # （名前が固定の index.html / sw.js も含め、全ファイルの内容から作る）
+    build_id = content_hash(b''.join(
+        path.encode('utf-8') + b'\0' + hashlib.sha256(data).digest()
+        for path, data in sorted(contents.items())
+    ))
+    
+    for path, data in contents.items():
+        if path in REWRITE_NAMES:
+            text = rewrite_references(data.decode('utf-8'), names)
+            if path == 'sw.js':
+                text = re.sub(r"devtodo-v\d+", f'devtodo-{build_id}', text)
+            data = text.encode('utf-8')
+        
+        target = os.path.join(BUILD_DIR, names.get(path, path))
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        with open(target, 'wb') as f:
+            f.write(data)
+        if path.endswith(COMPRESS_EXTENSIONS):
+            write_compressed(target, data)
+    
+    with open(os.path.join(BUILD_DIR, 'asset-manifest.json'), 'w', encoding='utf-8') as f:
+        json.dump({'build_id': build_id, 'files': names}, f, indent=2, sort_keys=True)
+    
+    return names
+
+if __name__ == '__main__':
+    names = build()
+    print(f"Built {len(names)} fingerprinted assets into {os.path.relpath(BUILD_DIR, BASE_DIR)}/")
+    for original, hashed in sorted(names.items()):
+        print(f"  {original} -> {hashed}")
+    if not brotli:
+        print("  brotli is not installed; only gzip variants were written")
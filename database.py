@@ -1,23 +1,543 @@
+import asyncio
 import sqlite3
 import os
-from datetime import datetime
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
+from datetime import datetime, time, timezone
+from flask import g, has_app_context
 
-DATABASE_PATH = os.path.join(os.path.dirname(__file__), 'data', 'todo.db')
+DATABASE_PATH = os.environ.get(
+    'DATABASE_PATH', os.path.join(os.path.dirname(__file__), 'data', 'todo.db')
+)
 
-def get_db():
-    """データベース接続を取得"""
-    os.makedirs(os.path.dirname(DATABASE_PATH), exist_ok=True)
-    conn = sqlite3.connect(DATABASE_PATH)
+# タイムスタンプの保存形式（CURRENT_TIMESTAMP と同じUTCの 'YYYY-MM-DD HH:MM:SS'）。
+# 文字列の大小比較がそのまま時刻の比較になるため、範囲検索でインデックスを使える。
+TIMESTAMP_FORMAT = '%Y-%m-%d %H:%M:%S'
+
+# 接続プールの設定（環境変数で調整可能）
+POOL_SIZE = int(os.environ.get('DB_POOL_SIZE', 8))
+BUSY_TIMEOUT_MS = int(os.environ.get('DB_BUSY_TIMEOUT_MS', 5000))
+CACHE_SIZE_KB = int(os.environ.get('DB_CACHE_SIZE_KB', 16384))
+MMAP_SIZE = int(os.environ.get('DB_MMAP_SIZE', 64 * 1024 * 1024))
+
+def connect(path=None):
+    """チューニング済みの新しいデータベース接続を作成（path の既定は DATABASE_PATH）"""
+    path = path or DATABASE_PATH
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    # プール経由でスレッド間を移動するため check_same_thread は無効化
+    conn = sqlite3.connect(
+        path,
+        timeout=BUSY_TIMEOUT_MS / 1000,
+        check_same_thread=False
+    )
     conn.row_factory = sqlite3.Row
+    conn.execute('PRAGMA journal_mode = WAL')
+    conn.execute('PRAGMA synchronous = NORMAL')
+    conn.execute(f'PRAGMA busy_timeout = {BUSY_TIMEOUT_MS}')
+    # 負の値はKB単位の指定
+    conn.execute(f'PRAGMA cache_size = -{CACHE_SIZE_KB}')
+    conn.execute(f'PRAGMA mmap_size = {MMAP_SIZE}')
     return conn
 
-def init_db():
-    """データベースを初期化"""
-    conn = get_db()
-    cursor = conn.cursor()
+class ConnectionPool:
+    """SQLite接続のプール
+    
+    接続は一度だけ開いて再利用し、リクエスト終了時にプールへ返却する。
+    プールが満杯の場合、返却された接続はクローズする。
+    """
+    
+    def __init__(self, size=POOL_SIZE):
+        self.size = size
+        self._idle = []
+        self._lock = threading.Lock()
+        self._created = 0
+        self._reused = 0
+        self._closed = 0
+        self._in_use = 0
+    
+    def acquire(self):
+        """プールから接続を取得（空なら新規作成）"""
+        with self._lock:
+            self._in_use += 1
+            if self._idle:
+                self._reused += 1
+                return self._idle.pop()
+            self._created += 1
+        try:
+            return connect()
+        except Exception:
+            with self._lock:
+                self._in_use -= 1
+                self._created -= 1
+            raise
+    
+    def release(self, conn):
+        """接続をプールへ返却"""
+        try:
+            # 未コミットのトランザクションは破棄してから返却する
+            if conn.in_transaction:
+                conn.rollback()
+        except sqlite3.Error:
+            conn.close()
+            with self._lock:
+                self._in_use -= 1
+                self._closed += 1
+            return
+        
+        with self._lock:
+            self._in_use -= 1
+            if len(self._idle) < self.size:
+                self._idle.append(conn)
+                return
+            self._closed += 1
+        conn.close()
+    
+    def close_all(self):
+        """待機中の接続をすべてクローズ"""
+        with self._lock:
+            idle, self._idle = self._idle, []
+            self._closed += len(idle)
+        for conn in idle:
+            conn.close()
+    
+    def stats(self):
+        """プールの統計情報"""
+        with self._lock:
+            return {
+                'size': self.size,
+                'idle': len(self._idle),
+                'in_use': self._in_use,
+                'created': self._created,
+                'reused': self._reused,
+                'closed': self._closed
+            }
+
+pool = ConnectionPool()
+
+def get_db():
+    """データベース接続を取得
+    
+    アプリケーションコンテキスト内ではリクエスト単位でプールから接続を借り、
+    `g` に保持する。返却は teardown_appcontext で行うため呼び出し側でクローズしない。
+    コンテキスト外では専用の接続を返すので、呼び出し側でクローズすること。
+    """
+    if not has_app_context():
+        return connect()
+    if 'db' not in g:
+        g.db = pool.acquire()
+    return g.db
+
+def close_db(exception=None):
+    """リクエスト終了時に接続をプールへ返却"""
+    conn = g.pop('db', None)
+    if conn is not None:
+        pool.release(conn)
+
+def get_pool_stats():
+    """接続プールの統計情報を取得"""
+    return pool.stats()
+
+def now_timestamp():
+    """現在時刻を保存形式の文字列で取得"""
+    return datetime.now(timezone.utc).strftime(TIMESTAMP_FORMAT)
+
+def local_day_start(day):
+    """ローカル日付 day の 0 時を保存形式（UTC）の文字列で取得（タイムスタンプ列の範囲検索用）"""
+    return datetime.combine(day, time()).astimezone(timezone.utc).strftime(TIMESTAMP_FORMAT)
+
+def init_app(app):
+    """Flaskアプリに接続のライフサイクルを登録"""
+    app.teardown_appcontext(close_db)
+
+# ===================================
+# 非同期アクセス（ASGI 版）
+# ===================================
+
+class AsyncConnection:
+    """専用のスレッドで操作する SQLite 接続
+    
+    方式は aiosqlite と同じだが、aiosqlite が公開しているのは SQL 単位のコルーチンだけで、
+    同期のリポジトリ（SQLiteRepository）のメソッドをまとめて接続のスレッドで実行する
+    手段がない（非公開の _execute のみ）。リポジトリを WSGI 版と共有するため自前で持つ。
+    """
+    
+    def __init__(self, path=None):
+        self.path = path
+        self.conn = None
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='sqlite')
+    
+    async def open(self):
+        self.conn = await self.run(lambda conn: connect(self.path))
+        return self
+    
+    async def run(self, fn, *args):
+        """fn(conn, *args) を接続のスレッドで実行して結果を待つ
+        
+        リポジトリのメソッド1回分をまとめて渡すことで、トランザクションの途中で
+        スレッドを行き来しない。
+        """
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, self._call, fn, args)
+    
+    def _call(self, fn, args):
+        try:
+            return fn(self.conn, *args)
+        finally:
+            # 未コミットのトランザクションは次の利用者に持ち越さない
+            if self.conn is not None and self.conn.in_transaction:
+                self.conn.rollback()
+    
+    async def close(self):
+        if self.conn is not None:
+            conn, self.conn = self.conn, None
+            loop = asyncio.get_running_loop()
+            await loop.run_in_executor(self._executor, conn.close)
+        self._executor.shutdown(wait=False)
+
+class AsyncConnectionPool:
+    """AsyncConnection のプール
+    
+    ロック待ちや遅いクエリの間も、待っているのはイベントループ上のタスクだけで、
+    スレッドを占有するのはプールの接続数（size）までに限られる。
+    """
     
-    # プロジェクトテーブル
-    cursor.execute('''
+    def __init__(self, size=POOL_SIZE, path=None):
+        self.size = size
+        self.path = path
+        self._connections = []
+        self._idle = None
+        self._waiting = 0
+    
+    async def start(self):
+        """接続を開く（イベントループの起動後に1回だけ呼ぶ）"""
+        self._idle = asyncio.Queue()
+        for _ in range(self.size):
+            conn = await AsyncConnection(self.path).open()
+            self._connections.append(conn)
+            self._idle.put_nowait(conn)
+    
+    async def close(self):
+        for conn in self._connections:
+            await conn.close()
+        self._connections = []
+    
+    @asynccontextmanager
+    async def connection(self):
+        """接続を借りる（複数回の run を同じ接続で行う場合）"""
+        self._waiting += 1
+        try:
+            conn = await self._idle.get()
+        finally:
+            self._waiting -= 1
+        try:
+            yield conn
+        finally:
+            self._idle.put_nowait(conn)
+    
+    async def run(self, fn, *args):
+        """空いている接続で fn(conn, *args) を実行"""
+        async with self.connection() as conn:
+            return await conn.run(fn, *args)
+    
+    def stats(self):
+        """プールの統計情報"""
+        idle = self._idle.qsize() if self._idle else 0
+        return {
+            'size': self.size,
+            'idle': idle,
+            'in_use': len(self._connections) - idle,
+            'waiting': self._waiting
+        }
+
+# ===================================
+# 日次集計（レポート用ロールアップ）
+# ===================================
+# task_daily_stats: 日付 × 種別(created/completed) × プロジェクト × 色ごとのタスク数
+# tag_daily_stats:  日付 × タグごとの完了タスク数
+# どちらもトリガーで増分更新する。プロジェクトなし・色なしはそれぞれ 0 / '' で保持する。
+# タイムスタンプは UTC で保存しているが、日付はサーバーのローカル時刻で区切る
+# （タイムゾーンを変えた場合は python database.py rebuild-rollups で作り直す）。
+
+def _local_date(column):
+    """UTC のタイムスタンプ列をローカル時刻の日付にするSQL式"""
+    return f"date({column}, 'localtime')"
+
+def _utc_date(column):
+    """UTC のタイムスタンプ列を UTC の日付にするSQL式（マイグレーション 4 の集計）"""
+    return f"date({column})"
+
+def _bump_task_stats(row, kind, column, delta, day):
+    """task_daily_stats を増減するトリガー本体のSQL"""
+    return f'''
+            INSERT INTO task_daily_stats (day, kind, project_id, color, count)
+            SELECT {day(f'{row}.{column}')}, '{kind}', IFNULL({row}.project_id, 0), IFNULL({row}.color, ''), {delta}
+            WHERE {row}.{column} IS NOT NULL
+            ON CONFLICT (day, kind, project_id, color) DO UPDATE SET count = count + excluded.count;'''
+
+def _bump_tag_stats_for_task(row, delta, day):
+    """タスクに付いた全タグの tag_daily_stats を増減するトリガー本体のSQL"""
+    return f'''
+            INSERT INTO tag_daily_stats (day, tag_id, count)
+            SELECT {day(f'{row}.completed_at')}, tt.tag_id, {delta}
+            FROM task_tags tt
+            WHERE tt.task_id = {row}.id AND {row}.completed_at IS NOT NULL
+            ON CONFLICT (day, tag_id) DO UPDATE SET count = count + excluded.count;'''
+
+def _bump_tag_stats_for_link(row, delta, day):
+    """task_tags の1行分の tag_daily_stats を増減するトリガー本体のSQL"""
+    return f'''
+            INSERT INTO tag_daily_stats (day, tag_id, count)
+            SELECT {day('t.completed_at')}, {row}.tag_id, {delta}
+            FROM tasks t
+            WHERE t.id = {row}.task_id AND t.completed_at IS NOT NULL
+            ON CONFLICT (day, tag_id) DO UPDATE SET count = count + excluded.count;'''
+
+def _trigger(name, event, statements, when=None):
+    """statements を実行するトリガーのSQL"""
+    when_sql = f'\n        WHEN {when}' if when else ''
+    return f'''
+        CREATE TRIGGER IF NOT EXISTS {name}
+        {event}{when_sql}
+        BEGIN{''.join(statements)}
+        END
+    '''
+
+ROLLUP_TRIGGER_NAMES = (
+    'trg_tasks_rollup_insert', 'trg_tasks_rollup_delete', 'trg_tasks_rollup_update',
+    'trg_tasks_rollup_update_tags', 'trg_task_tags_rollup_insert', 'trg_task_tags_rollup_delete',
+)
+
+def _rollup_triggers(day):
+    """日次集計のトリガーのSQL（day は日付にするSQL式を返す関数）"""
+    return [
+        _trigger('trg_tasks_rollup_insert', 'AFTER INSERT ON tasks', [
+            _bump_task_stats('NEW', 'created', 'created_at', 1, day),
+            _bump_task_stats('NEW', 'completed', 'completed_at', 1, day),
+        ]),
+        _trigger('trg_tasks_rollup_delete', 'AFTER DELETE ON tasks', [
+            _bump_task_stats('OLD', 'created', 'created_at', -1, day),
+            _bump_task_stats('OLD', 'completed', 'completed_at', -1, day),
+            _bump_tag_stats_for_task('OLD', -1, day),
+        ]),
+        _trigger(
+            'trg_tasks_rollup_update',
+            'AFTER UPDATE OF created_at, completed_at, project_id, color ON tasks',
+            [
+                _bump_task_stats('OLD', 'created', 'created_at', -1, day),
+                _bump_task_stats('OLD', 'completed', 'completed_at', -1, day),
+                _bump_task_stats('NEW', 'created', 'created_at', 1, day),
+                _bump_task_stats('NEW', 'completed', 'completed_at', 1, day),
+            ],
+            when='OLD.created_at IS NOT NEW.created_at OR OLD.completed_at IS NOT NEW.completed_at'
+                 ' OR OLD.project_id IS NOT NEW.project_id OR OLD.color IS NOT NEW.color'
+        ),
+        _trigger(
+            'trg_tasks_rollup_update_tags',
+            'AFTER UPDATE OF completed_at ON tasks',
+            [
+                _bump_tag_stats_for_task('OLD', -1, day),
+                _bump_tag_stats_for_task('NEW', 1, day),
+            ],
+            when='OLD.completed_at IS NOT NEW.completed_at'
+        ),
+        _trigger('trg_task_tags_rollup_insert', 'AFTER INSERT ON task_tags', [
+            _bump_tag_stats_for_link('NEW', 1, day),
+        ]),
+        _trigger('trg_task_tags_rollup_delete', 'AFTER DELETE ON task_tags', [
+            _bump_tag_stats_for_link('OLD', -1, day),
+        ]),
+    ]
+
+# マイグレーション 4 が作ったトリガー（既存のステップは変更しないため当時の UTC の日付のまま）
+ROLLUP_TRIGGERS_V4 = _rollup_triggers(_utc_date)
+# 現在のトリガー（マイグレーション 8 で作り直す）
+ROLLUP_TRIGGERS = _rollup_triggers(_local_date)
+
+def rebuild_rollups(conn, day=_local_date):
+    """日次集計を tasks / task_tags から作り直す（既存DBのバックフィル用）"""
+    conn.execute('DELETE FROM task_daily_stats')
+    conn.execute('DELETE FROM tag_daily_stats')
+    for kind, column in (('created', 'created_at'), ('completed', 'completed_at')):
+        conn.execute(f'''
+            INSERT INTO task_daily_stats (day, kind, project_id, color, count)
+            SELECT {day(column)}, '{kind}', IFNULL(project_id, 0), IFNULL(color, ''), COUNT(*)
+            FROM tasks
+            WHERE {column} IS NOT NULL
+            GROUP BY 1, 3, 4
+        ''')
+    conn.execute(f'''
+        INSERT INTO tag_daily_stats (day, tag_id, count)
+        SELECT {day('t.completed_at')}, tt.tag_id, COUNT(*)
+        FROM task_tags tt
+        JOIN tasks t ON t.id = tt.task_id
+        WHERE t.completed_at IS NOT NULL
+        GROUP BY 1, 2
+    ''')
+
+# ===================================
+# 変更ログ（差分同期用）
+# ===================================
+# change_log: エンティティごとの最新の変更を1行だけ保持する。変更のたびに行を作り直し、
+# AUTOINCREMENT の seq を振り直すため、seq > トークン の行がそのトークン以降の変更になる。
+# 書き込みは直列化されるので seq はコミット順に増える。削除は op = 'delete' の行（墓標）として残る。
+# 一覧の行には集計値や結合した名前が含まれるため、それらが変わる行も記録する
+# （タスクの増減 → プロジェクトの件数、タグの付け外し → タグの使用数など）。
+
+SYNC_ENTITIES = ('projects', 'tags', 'tasks', 'ideas')
+
+def _log_change(entity, ids_sql, op='upsert'):
+    """ids_sql（id 列を返すSELECT）の行を change_log に記録し直すトリガー本体のSQL"""
+    return f'''
+            DELETE FROM change_log WHERE entity = '{entity}' AND entity_id IN ({ids_sql});
+            INSERT INTO change_log (entity, entity_id, op)
+            SELECT '{entity}', id, '{op}' FROM ({ids_sql});'''
+
+CHANGE_LOG_TRIGGERS = [
+    _trigger('trg_tasks_changes_insert', 'AFTER INSERT ON tasks', [
+        _log_change('tasks', 'SELECT NEW.id AS id'),
+        _log_change('projects', 'SELECT id FROM projects WHERE id = NEW.project_id'),
+    ]),
+    _trigger('trg_tasks_changes_update', 'AFTER UPDATE ON tasks', [
+        _log_change('tasks', 'SELECT NEW.id AS id'),
+    ]),
+    _trigger(
+        'trg_tasks_changes_update_project',
+        'AFTER UPDATE OF status, project_id ON tasks',
+        [
+            _log_change('projects', 'SELECT id FROM projects WHERE id IN (OLD.project_id, NEW.project_id)'),
+        ],
+        when='OLD.status IS NOT NEW.status OR OLD.project_id IS NOT NEW.project_id'
+    ),
+    _trigger('trg_tasks_changes_delete', 'AFTER DELETE ON tasks', [
+        _log_change('tasks', 'SELECT OLD.id AS id', 'delete'),
+        _log_change('projects', 'SELECT id FROM projects WHERE id = OLD.project_id'),
+    ]),
+    _trigger('trg_task_tags_changes_insert', 'AFTER INSERT ON task_tags', [
+        _log_change('tasks', 'SELECT id FROM tasks WHERE id = NEW.task_id'),
+        _log_change('tags', 'SELECT id FROM tags WHERE id = NEW.tag_id'),
+    ]),
+    _trigger('trg_task_tags_changes_delete', 'AFTER DELETE ON task_tags', [
+        _log_change('tasks', 'SELECT id FROM tasks WHERE id = OLD.task_id'),
+        _log_change('tags', 'SELECT id FROM tags WHERE id = OLD.tag_id'),
+    ]),
+    _trigger('trg_projects_changes_insert', 'AFTER INSERT ON projects', [
+        _log_change('projects', 'SELECT NEW.id AS id'),
+    ]),
+    _trigger('trg_projects_changes_update', 'AFTER UPDATE ON projects', [
+        _log_change('projects', 'SELECT NEW.id AS id'),
+    ]),
+    # タスクの行は project_name を含む
+    _trigger(
+        'trg_projects_changes_update_name',
+        'AFTER UPDATE OF name ON projects',
+        [
+            _log_change('tasks', 'SELECT id FROM tasks WHERE project_id = NEW.id'),
+        ],
+        when='OLD.name IS NOT NEW.name'
+    ),
+    _trigger('trg_projects_changes_delete', 'AFTER DELETE ON projects', [
+        _log_change('projects', 'SELECT OLD.id AS id', 'delete'),
+        _log_change('tasks', 'SELECT id FROM tasks WHERE project_id = OLD.id'),
+    ]),
+    _trigger('trg_tags_changes_insert', 'AFTER INSERT ON tags', [
+        _log_change('tags', 'SELECT NEW.id AS id'),
+    ]),
+    _trigger('trg_tags_changes_update', 'AFTER UPDATE ON tags', [
+        _log_change('tags', 'SELECT NEW.id AS id'),
+    ]),
+    # タスクの行はタグの名前と色を含む
+    _trigger(
+        'trg_tags_changes_update_tasks',
+        'AFTER UPDATE OF name, color ON tags',
+        [
+            _log_change('tasks', 'SELECT task_id AS id FROM task_tags WHERE tag_id = NEW.id'),
+        ],
+        when='OLD.name IS NOT NEW.name OR OLD.color IS NOT NEW.color'
+    ),
+    _trigger('trg_tags_changes_delete', 'AFTER DELETE ON tags', [
+        _log_change('tags', 'SELECT OLD.id AS id', 'delete'),
+        _log_change('tasks', 'SELECT id FROM tasks WHERE id IN (SELECT task_id FROM task_tags WHERE tag_id = OLD.id)'),
+    ]),
+    _trigger('trg_ideas_changes_insert', 'AFTER INSERT ON ideas', [
+        _log_change('ideas', 'SELECT NEW.id AS id'),
+    ]),
+    _trigger('trg_ideas_changes_update', 'AFTER UPDATE ON ideas', [
+        _log_change('ideas', 'SELECT NEW.id AS id'),
+    ]),
+    _trigger('trg_ideas_changes_delete', 'AFTER DELETE ON ideas', [
+        _log_change('ideas', 'SELECT OLD.id AS id', 'delete'),
+    ]),
+]
+
+def backfill_change_log(conn):
+    """既存の行をすべて変更ログに記録（トークン 0 からの同期で全件が返るようにする）"""
+    for entity in SYNC_ENTITIES:
+        conn.execute(f'''
+            INSERT OR IGNORE INTO change_log (entity, entity_id, op)
+            SELECT '{entity}', id, 'upsert' FROM {entity} ORDER BY id
+        ''')
+
+def get_change_token(conn):
+    """現在の変更トークン（change_log の最大の seq）"""
+    row = conn.execute('SELECT MAX(seq) AS seq FROM change_log').fetchone()
+    return row['seq'] or 0
+
+# ===================================
+# スキーママイグレーション
+# ===================================
+# (バージョン, 説明, ステップ) のリスト。ステップはSQL文、または接続を受け取る
+# 関数のリスト。既存のステップは変更せず、末尾に追加していくこと。
+# 全文検索の対象（テーブル: 列）。trigram トークナイザで分かち書きのない日本語も部分一致できる
+FTS_TABLES = {
+    'ideas': ('title', 'content'),
+    'tasks': ('title', 'description'),
+}
+
+def _fts_steps(table, columns):
+    """外部コンテンツ方式の FTS5 テーブルと同期用トリガー、既存行のバックフィル"""
+    fts = f'{table}_fts'
+    cols = ', '.join(columns)
+    new_values = ', '.join(f'new.{c}' for c in columns)
+    old_values = ', '.join(f'old.{c}' for c in columns)
+    changed = ' OR '.join(f'old.{c} IS NOT new.{c}' for c in columns)
+    return [
+        f'''
+        CREATE VIRTUAL TABLE IF NOT EXISTS {fts} USING fts5(
+            {cols}, content='{table}', content_rowid='id', tokenize='trigram'
+        )
+        ''',
+        f'''
+        CREATE TRIGGER IF NOT EXISTS trg_{table}_fts_insert
+        AFTER INSERT ON {table}
+        BEGIN
+            INSERT INTO {fts} (rowid, {cols}) VALUES (new.id, {new_values});
+        END
+        ''',
+        f'''
+        CREATE TRIGGER IF NOT EXISTS trg_{table}_fts_delete
+        AFTER DELETE ON {table}
+        BEGIN
+            INSERT INTO {fts} ({fts}, rowid, {cols}) VALUES ('delete', old.id, {old_values});
+        END
+        ''',
+        # ステータス変更などでは索引を書き換えない
+        f'''
+        CREATE TRIGGER IF NOT EXISTS trg_{table}_fts_update
+        AFTER UPDATE OF {cols} ON {table}
+        WHEN {changed}
+        BEGIN
+            INSERT INTO {fts} ({fts}, rowid, {cols}) VALUES ('delete', old.id, {old_values});
+            INSERT INTO {fts} (rowid, {cols}) VALUES (new.id, {new_values});
+        END
+        ''',
+        f"INSERT INTO {fts} ({fts}) VALUES ('rebuild')",
+    ]
+
+MIGRATIONS = [
+    (1, '初期スキーマ', [
+        # プロジェクトテーブル
+        '''
         CREATE TABLE IF NOT EXISTS projects (
             id INTEGER PRIMARY KEY AUTOINCREMENT,
             name TEXT NOT NULL,
@@ -26,20 +546,18 @@ def init_db():
             created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
             updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
         )
-    ''')
-    
-    # タグテーブル
-    cursor.execute('''
+        ''',
+        # タグテーブル
+        '''
         CREATE TABLE IF NOT EXISTS tags (
             id INTEGER PRIMARY KEY AUTOINCREMENT,
             name TEXT NOT NULL UNIQUE,
             color TEXT DEFAULT '#6750A4',
             created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
         )
-    ''')
-    
-    # タスクテーブル
-    cursor.execute('''
+        ''',
+        # タスクテーブル
+        '''
         CREATE TABLE IF NOT EXISTS tasks (
             id INTEGER PRIMARY KEY AUTOINCREMENT,
             title TEXT NOT NULL,
@@ -54,10 +572,9 @@ def init_db():
             completed_at TIMESTAMP,
             FOREIGN KEY (project_id) REFERENCES projects(id) ON DELETE SET NULL
         )
-    ''')
-    
-    # タスク-タグ関連テーブル
-    cursor.execute('''
+        ''',
+        # タスク-タグ関連テーブル
+        '''
         CREATE TABLE IF NOT EXISTS task_tags (
             task_id INTEGER,
             tag_id INTEGER,
@@ -65,10 +582,9 @@ def init_db():
             FOREIGN KEY (task_id) REFERENCES tasks(id) ON DELETE CASCADE,
             FOREIGN KEY (tag_id) REFERENCES tags(id) ON DELETE CASCADE
         )
-    ''')
-    
-    # アイデアテーブル
-    cursor.execute('''
+        ''',
+        # アイデアテーブル
+        '''
         CREATE TABLE IF NOT EXISTS ideas (
             id INTEGER PRIMARY KEY AUTOINCREMENT,
             title TEXT NOT NULL,
@@ -78,10 +594,181 @@ def init_db():
             created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
             updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
         )
+        ''',
+    ]),
+    (2, 'ホットクエリ用インデックス', [
+        # GET /tasks のステータス絞り込み + 並び順
+        'CREATE INDEX IF NOT EXISTS idx_tasks_status_priority_created ON tasks (status, priority, created_at)',
+        # GET /tasks の絞り込みなしの並び順
+        'CREATE INDEX IF NOT EXISTS idx_tasks_priority_created ON tasks (priority, created_at)',
+        'CREATE INDEX IF NOT EXISTS idx_tasks_project_id ON tasks (project_id)',
+        # レポートの期間集計
+        'CREATE INDEX IF NOT EXISTS idx_tasks_completed_at ON tasks (completed_at)',
+        'CREATE INDEX IF NOT EXISTS idx_tasks_created_at ON tasks (created_at)',
+        # tag_id での絞り込み（主キーは task_id 先頭のため逆順も用意）
+        'CREATE INDEX IF NOT EXISTS idx_task_tags_tag_task ON task_tags (tag_id, task_id)',
+        # GET /ideas の並び順
+        'CREATE INDEX IF NOT EXISTS idx_ideas_pinned_updated ON ideas (is_pinned, updated_at)',
+        'ANALYZE',
+    ]),
+    (3, 'テーブル変更カウンタ', [
+        # ETag用の変更カウンタ。DBファイルに保存されるため複数プロセスで共有される
+        '''
+        CREATE TABLE IF NOT EXISTS table_versions (
+            name TEXT PRIMARY KEY,
+            version INTEGER NOT NULL DEFAULT 0
+        )
+        ''',
+        '''
+        INSERT OR IGNORE INTO table_versions (name)
+        VALUES ('projects'), ('tags'), ('tasks'), ('task_tags'), ('ideas')
+        ''',
+    ] + [
+        f'''
+        CREATE TRIGGER IF NOT EXISTS trg_{table}_version_{op.lower()}
+        AFTER {op} ON {table}
+        BEGIN
+            UPDATE table_versions SET version = version + 1 WHERE name = '{table}';
+        END
+        '''
+        for table in ('projects', 'tags', 'tasks', 'task_tags', 'ideas')
+        for op in ('INSERT', 'UPDATE', 'DELETE')
+    ]),
+    (4, 'レポート用の日次集計', [
+        '''
+        CREATE TABLE IF NOT EXISTS task_daily_stats (
+            day TEXT NOT NULL,
+            kind TEXT NOT NULL,
+            project_id INTEGER NOT NULL,
+            color TEXT NOT NULL,
+            count INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (kind, day, project_id, color)
+        ) WITHOUT ROWID
+        ''',
+        '''
+        CREATE TABLE IF NOT EXISTS tag_daily_stats (
+            day TEXT NOT NULL,
+            tag_id INTEGER NOT NULL,
+            count INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (day, tag_id)
+        ) WITHOUT ROWID
+        ''',
+    ] + ROLLUP_TRIGGERS_V4 + [lambda conn: rebuild_rollups(conn, _utc_date)]),
+    (5, 'タイムスタンプ形式の統一', [
+        # 以前は completed_at をローカル時刻の isoformat() で保存していたため、
+        # UTCの 'YYYY-MM-DD HH:MM:SS' に変換する（日次集計はトリガーで付け替わる）
+        '''
+        UPDATE tasks
+        SET completed_at = strftime('%Y-%m-%d %H:%M:%S', completed_at, 'utc')
+        WHERE completed_at LIKE '%T%'
+        ''',
+    ]),
+    (6, '全文検索インデックス', [
+        step
+        for table, columns in FTS_TABLES.items()
+        for step in _fts_steps(table, columns)
+    ]),
+    (7, '差分同期用の変更ログ', [
+        '''
+        CREATE TABLE IF NOT EXISTS change_log (
+            seq INTEGER PRIMARY KEY AUTOINCREMENT,
+            entity TEXT NOT NULL,
+            entity_id INTEGER NOT NULL,
+            op TEXT NOT NULL,
+            changed_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+        ''',
+        # トリガーで行を作り直すときの検索用（seq は rowid なので範囲検索に索引は不要）
+        'CREATE UNIQUE INDEX IF NOT EXISTS idx_change_log_entity ON change_log (entity, entity_id)',
+    ] + CHANGE_LOG_TRIGGERS + [backfill_change_log]),
+    (8, '日次集計をローカル日付で区切る', [
+        # UTC の日付で集計していたトリガーを作り直し、集計をやり直す
+        f'DROP TRIGGER IF EXISTS {name}' for name in ROLLUP_TRIGGER_NAMES
+    ] + ROLLUP_TRIGGERS + [rebuild_rollups]),
+    (9, '一覧の並び順の列を NULL にしない', [
+        # キーセットの (priority, created_at, id) < (?, ?, ?) は NULL の行を飛ばすため、
+        # 既定値で埋め、以降は NULL の書き込みを拒否する
+        'UPDATE tasks SET priority = 0 WHERE priority IS NULL',
+        'UPDATE ideas SET is_pinned = 0 WHERE is_pinned IS NULL',
+    ] + [
+        f'''
+        CREATE TRIGGER IF NOT EXISTS trg_{table}_{column}_not_null_{op.lower()}
+        BEFORE {op} ON {table}
+        WHEN NEW.{column} IS NULL
+        BEGIN
+            SELECT RAISE(ABORT, 'NOT NULL constraint failed: {table}.{column}');
+        END
+        '''
+        for table, column in (('tasks', 'priority'), ('ideas', 'is_pinned'))
+        for op in ('INSERT', 'UPDATE')
+    ]),
+]
+
+def get_schema_version(conn):
+    """適用済みのスキーマバージョンを取得"""
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS schema_version (
+            version INTEGER PRIMARY KEY,
+            description TEXT,
+            applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
     ''')
+    row = conn.execute('SELECT MAX(version) AS version FROM schema_version').fetchone()
+    return row['version'] or 0
+
+def migrate(conn):
+    """未適用のマイグレーションを順番に適用
     
-    conn.commit()
-    conn.close()
+    各マイグレーションは1トランザクションで適用する。複数プロセスが同時に
+    起動しても二重適用しないよう、BEGIN IMMEDIATE で書き込みロックを取ってから
+    バージョンを再確認する。適用したバージョンのリストを返す。
+    """
+    isolation_level = conn.isolation_level
+    conn.isolation_level = None
+    applied = []
+    try:
+        for version, description, steps in MIGRATIONS:
+            if version <= get_schema_version(conn):
+                continue
+            conn.execute('BEGIN IMMEDIATE')
+            try:
+                if version <= get_schema_version(conn):
+                    conn.execute('ROLLBACK')
+                    continue
+                for step in steps:
+                    if callable(step):
+                        step(conn)
+                    else:
+                        conn.execute(step)
+                conn.execute(
+                    'INSERT INTO schema_version (version, description) VALUES (?, ?)',
+                    (version, description)
+                )
+                conn.execute('COMMIT')
+            except Exception:
+                conn.execute('ROLLBACK')
+                raise
+            applied.append(version)
+    finally:
+        conn.isolation_level = isolation_level
+    return applied
+
+def get_table_versions(conn, tables):
+    """テーブルごとの変更カウンタを {テーブル名: バージョン} で取得"""
+    placeholders = ', '.join('?' * len(tables))
+    rows = conn.execute(
+        f'SELECT name, version FROM table_versions WHERE name IN ({placeholders})',
+        tuple(tables)
+    ).fetchall()
+    return {row['name']: row['version'] for row in rows}
+
+def init_db():
+    """データベースを初期化（未適用のマイグレーションを適用）"""
+    conn = connect()
+    try:
+        return migrate(conn)
+    finally:
+        conn.close()
 
 def dict_from_row(row):
     """sqlite3.Rowを辞書に変換"""
@@ -90,5 +777,18 @@ def dict_from_row(row):
     return dict(row)
 
 if __name__ == '__main__':
-    init_db()
-    print("Database initialized successfully!")
+    import sys
+    
+    if sys.argv[1:] == ['rebuild-rollups']:
+        init_db()
+        conn = connect()
+        with conn:
+            rebuild_rollups(conn)
+        conn.close()
+        print("Rollups rebuilt successfully!")
+        sys.exit(0)
+    
+    applied = init_db()
+    if applied:
+        print(f"Applied migrations: {', '.join(map(str, applied))}")
+    print(f"Database initialized successfully! (schema version {MIGRATIONS[-1][0]})")
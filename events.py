@@ -0,0 +1,270 @@
+"""
+DevTodo - 変更通知（Server-Sent Events）
+
+書き込みはトリガーで change_log（database.py を参照）に記録される。各プロセスの
+ChangeFeed が1本のスレッドで change_log をポーリングし、購読者に
+{'entity', 'id', 'op', 'version'} の通知を配る。DB ファイルを介するため、
+別のワーカープロセスでの書き込みも届く。version は change_log の seq で、
+SSE の id として送るので、再接続時は Last-Event-ID から再開できる。
+
+配信は2通り。
+- Flask の GET /api/events（api/events.py）: 接続ごとにスレッドを使う（開発用）
+- イベントサーバー（serve_in_background）: 1スレッドの asyncio ループで全接続を受ける。
+  gunicorn では各ワーカーの post_fork で起動し、EVENTS_PORT を SO_REUSEPORT で共有する。
+  waitress では1プロセスなので、起動前に1つだけ起動する。
+- ASGI 版（asgi.py）の GET /api/events: アプリのイベントループで event_stream を返す
+"""
+
+import asyncio
+import json
+import logging
+import os
+import socket
+import threading
+from contextlib import aclosing
+from urllib.parse import urlsplit, parse_qs
+from database import connect, get_change_token
+
+logger = logging.getLogger(__name__)
+
+POLL_INTERVAL = float(os.environ.get('EVENTS_POLL_INTERVAL', 0.5))
+# 接続の生存確認（プロキシのアイドルタイムアウト対策も兼ねる）
+HEARTBEAT_INTERVAL = 15
+# 切断時にブラウザが再接続するまでの待ち時間（ミリ秒）
+RETRY_MS = 3000
+# 再接続時に読み出す取りこぼしの上限（超えたら reset を送る）
+BACKLOG_LIMIT = 1000
+# 接続ごとの未送信の通知の上限（超えたら切断し、再接続で取り直させる）
+QUEUE_SIZE = 1000
+
+HEARTBEAT = ': ping\n\n'
+RESET_EVENT = 'event: reset\ndata: {}\n\n'
+
+def read_events(conn, since, limit=BACKLOG_LIMIT):
+    """since より後の変更通知を古い順に取得"""
+    rows = conn.execute('''
+        SELECT seq, entity, entity_id, op FROM change_log
+        WHERE seq > ?
+        ORDER BY seq
+        LIMIT ?
+    ''', (since, limit)).fetchall()
+    return [
+        {'entity': row['entity'], 'id': row['entity_id'], 'op': row['op'], 'version': row['seq']}
+        for row in rows
+    ]
+
+def format_event(event):
+    """SSE のメッセージに変換（id は version）"""
+    data = json.dumps(event, separators=(',', ':'))
+    return f'id: {event["version"]}\nevent: change\ndata: {data}\n\n'
+
+def parse_version(value):
+    """Last-Event-ID / ?since= の値を version に変換（未指定・不正な場合は None）"""
+    try:
+        version = int(value)
+    except (TypeError, ValueError):
+        return None
+    return version if version >= 0 else None
+
+def read_backlog(since):
+    """再接続時の取りこぼしを専用の接続で読み出す"""
+    conn = connect()
+    try:
+        return read_events(conn, since)
+    finally:
+        conn.close()
+
+class ChangeFeed:
+    """change_log をポーリングして購読者に配る（プロセスに1つ）
+    
+    購読者がいる間だけ POLL_INTERVAL ごとに読み、wake() ですぐに読ませる。
+    コールバックはポーリングのスレッドから呼ばれるので、ブロックしないこと。
+    """
+    
+    def __init__(self, interval=POLL_INTERVAL):
+        self.interval = interval
+        self._subscribers = set()
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._thread = None
+        self._pid = None
+    
+    def subscribe(self, callback):
+        """callback(event) を登録し、登録を解除する関数を返す"""
+        with self._lock:
+            self._subscribers.add(callback)
+            # fork した子プロセスにはスレッドが引き継がれないので作り直す
+            if self._thread is None or self._pid != os.getpid():
+                self._pid = os.getpid()
+                self._thread = threading.Thread(target=self._run, name='change-feed', daemon=True)
+                self._thread.start()
+        self._wakeup.set()
+        return lambda: self._unsubscribe(callback)
+    
+    def _unsubscribe(self, callback):
+        with self._lock:
+            self._subscribers.discard(callback)
+    
+    def wake(self):
+        """次のポーリングを待たずに change_log を読ませる（書き込み直後に呼ぶ）"""
+        self._wakeup.set()
+    
+    def subscriber_count(self):
+        with self._lock:
+            return len(self._subscribers)
+    
+    def _run(self):
+        conn = connect()
+        version = get_change_token(conn)
+        while True:
+            with self._lock:
+                subscribers = list(self._subscribers)
+            try:
+                if subscribers:
+                    events = read_events(conn, version)
+                    for event in events:
+                        # 1つの購読者の失敗で他の購読者への配信を止めない
+                        for callback in subscribers:
+                            try:
+                                callback(event)
+                            except Exception:
+                                logger.exception('change feed subscriber failed')
+                        version = event['version']
+                    if len(events) == BACKLOG_LIMIT:
+                        continue
+                    self._wakeup.wait(self.interval)
+                else:
+                    # 購読者がいない間は読まない（再開時は現在の位置から配る）
+                    version = get_change_token(conn)
+                    self._wakeup.wait()
+            except Exception:
+                # DB のロック待ちなどは次のポーリングでやり直す
+                self._wakeup.wait(self.interval)
+            self._wakeup.clear()
+
+feed = ChangeFeed()
+
+# ===================================
+# イベントサーバー（asyncio）
+# ===================================
+
+def _allow_origin_header(origin, allowed_origins):
+    """CORS_ORIGINS に合わせた Access-Control-Allow-Origin ヘッダー"""
+    if '*' in allowed_origins:
+        return 'Access-Control-Allow-Origin: *\r\n'
+    if origin in allowed_origins:
+        return f'Access-Control-Allow-Origin: {origin}\r\nVary: Origin\r\n'
+    return ''
+
+async def _read_request(reader):
+    """リクエスト行とヘッダーを読み、(メソッド, URL, {小文字のヘッダー名: 値}) を返す"""
+    head = await asyncio.wait_for(reader.readuntil(b'\r\n\r\n'), HEARTBEAT_INTERVAL)
+    lines = head.decode('latin-1').split('\r\n')
+    method, _, rest = lines[0].partition(' ')
+    target = rest.partition(' ')[0]
+    headers = {}
+    for line in lines[1:]:
+        name, sep, value = line.partition(':')
+        if sep:
+            headers[name.strip().lower()] = value.strip()
+    return method, urlsplit(target), headers
+
+async def event_stream(since=None):
+    """SSE の本文を少しずつ返す非同期ジェネレーター（クライアントが切断するまで続く）
+    
+    通知を待つ間はイベントループ上で待つだけで、スレッドを使わない。
+    """
+    loop = asyncio.get_running_loop()
+    messages = asyncio.Queue(QUEUE_SIZE)
+    overflow = asyncio.Event()
+    
+    def put(event):
+        try:
+            messages.put_nowait(event)
+        except asyncio.QueueFull:
+            overflow.set()
+    
+    # 先に購読してから取りこぼしを読むので、その間の通知も失わない
+    unsubscribe = feed.subscribe(lambda event: loop.call_soon_threadsafe(put, event))
+    try:
+        yield f'retry: {RETRY_MS}\n\n'
+        
+        last = since
+        if since is not None:
+            backlog = await loop.run_in_executor(None, read_backlog, since)
+            if len(backlog) >= BACKLOG_LIMIT:
+                yield RESET_EVENT
+                return
+            for event in backlog:
+                yield format_event(event)
+                last = event['version']
+        
+        # 読み出しが追いつかない場合は終了し、再接続で取りこぼしを読ませる
+        while not overflow.is_set():
+            try:
+                event = await asyncio.wait_for(messages.get(), HEARTBEAT_INTERVAL)
+            except asyncio.TimeoutError:
+                yield HEARTBEAT
+                continue
+            # 取りこぼしとして送った通知は飛ばす
+            if last is None or event['version'] > last:
+                yield format_event(event)
+                last = event['version']
+    finally:
+        unsubscribe()
+
+async def _handle_client(reader, writer, allowed_origins):
+    """1つの SSE 接続を処理"""
+    try:
+        method, url, headers = await _read_request(reader)
+    except (asyncio.IncompleteReadError, asyncio.LimitOverrunError,
+            asyncio.TimeoutError, ConnectionError):
+        writer.close()
+        return
+    
+    if method != 'GET' or url.path != '/api/events':
+        writer.write(b'HTTP/1.1 404 Not Found\r\nContent-Length: 0\r\nConnection: close\r\n\r\n')
+        writer.close()
+        return
+    
+    since = parse_version(
+        headers.get('last-event-id') or parse_qs(url.query).get('since', [None])[0]
+    )
+    writer.write((
+        'HTTP/1.1 200 OK\r\n'
+        'Content-Type: text/event-stream; charset=utf-8\r\n'
+        'Cache-Control: no-cache\r\n'
+        'X-Accel-Buffering: no\r\n'
+        + _allow_origin_header(headers.get('origin'), allowed_origins)
+        + 'Connection: close\r\n\r\n'
+    ).encode('utf-8'))
+    try:
+        async with aclosing(event_stream(since)) as chunks:
+            async for chunk in chunks:
+                writer.write(chunk.encode('utf-8'))
+                await writer.drain()
+    except ConnectionError:
+        pass
+    finally:
+        writer.close()
+
+_server = None
+
+def serve_in_background(host, port, cors_origins='*'):
+    """イベントサーバーをこのプロセスのバックグラウンドスレッドで起動
+    
+    同じポートを複数のワーカーで共有し（SO_REUSEPORT）、カーネルが接続を振り分ける。
+    """
+    global _server
+    allowed_origins = {origin.strip() for origin in cors_origins.split(',')}
+    loop = asyncio.new_event_loop()
+    _server = loop.run_until_complete(asyncio.start_server(
+        lambda reader, writer: _handle_client(reader, writer, allowed_origins),
+        host, port, reuse_port=hasattr(socket, 'SO_REUSEPORT')
+    ))
+    threading.Thread(target=loop.run_forever, name='event-server', daemon=True).start()
+    return _server
+
+def is_serving():
+    """このプロセスでイベントサーバーが動いているか"""
+    return _server is not None
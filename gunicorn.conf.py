@@ -0,0 +1,27 @@
+"""gunicorn の設定（gunicorn -c gunicorn.conf.py wsgi:app）"""
+
+from app import HOST, PORT, WORKERS, THREADS, EVENTS_PORT, CORS_ORIGINS
+
+bind = f'{HOST}:{PORT}'
+
+# プリフォークのワーカー × ワーカーごとのスレッド（gthread）
+workers = WORKERS
+threads = THREADS
+worker_class = 'gthread'
+
+# マスターでアプリを読み込み、マイグレーションを起動時に1回だけ適用する。
+# DB 接続はリクエスト時に各ワーカーのプールで開くため、fork 前には開いていない。
+preload_app = True
+
+keepalive = 5
+accesslog = '-'
+errorlog = '-'
+
+def post_fork(server, worker):
+    """各ワーカーで変更通知のイベントサーバーを起動
+    
+    SSE の接続は待ち時間のほとんどがアイドルなので、gthread のスレッドではなく
+    ワーカーごとに1スレッドの asyncio ループで受ける（events.py を参照）。
+    """
+    from events import serve_in_background
+    serve_in_background(HOST, EVENTS_PORT, CORS_ORIGINS)
@@ -0,0 +1,15 @@
+"""データアクセス層
+
+Flask API は SQLiteRepository、Streamlit アプリは SupabaseRepository を使い、
+どちらも repository.base の同じインターフェースでデータを扱う。
+"""
+from database import get_db
+from repository.base import (
+    DuplicateError, UnsupportedOperation, ProjectRepository, TagRepository, TaskRepository,
+    IdeaRepository, ReportRepository, SyncRepository, Repository
+)
+from repository.sqlite import SQLiteRepository
+
+def get_repository():
+    """リクエストの DB 接続を使う SQLite リポジトリを取得"""
+    return SQLiteRepository(get_db())
@@ -0,0 +1,227 @@
+"""リポジトリの共通インターフェース
+
+Flask API（SQLite）と Streamlit（Supabase）が同じメソッド・同じ意味でデータを扱うための
+抽象クラス。行は dict で返し、見つからない場合は None（削除は False）を返す。
+
+タスクの行には project_name と tags（{'id', 'name', 'color'} のリスト）が付く。
+プロジェクトには task_count / completed_count、タグには usage_count が付く。
+"""
+
+class DuplicateError(ValueError):
+    """一意制約に違反する作成・更新"""
+
+class UnsupportedOperation(NotImplementedError):
+    """バックエンドが対応していない操作（API では 501 を返す）"""
+
+class ProjectRepository:
+    def list(self):
+        """全プロジェクトを作成日時の新しい順に取得"""
+        raise NotImplementedError
+    
+    def iter(self):
+        """list と同じ結果を少しずつ読み出すイテレータ（ストリーミング用）"""
+        return iter(self.list())
+    
+    def get(self, project_id):
+        """プロジェクトを取得"""
+        raise NotImplementedError
+    
+    def create(self, data):
+        """プロジェクトを作成"""
+        raise NotImplementedError
+    
+    def update(self, project_id, data):
+        """プロジェクトを更新（None の項目は変更しない）"""
+        raise NotImplementedError
+    
+    def delete(self, project_id):
+        """プロジェクトを削除（所属タスクは未分類になる）"""
+        raise NotImplementedError
+
+class TagRepository:
+    def list(self):
+        """全タグを使用数の多い順・名前順に取得"""
+        raise NotImplementedError
+    
+    def get(self, tag_id):
+        """タグを取得"""
+        raise NotImplementedError
+    
+    def create(self, data):
+        """タグを作成（同名のタグがあれば DuplicateError）"""
+        raise NotImplementedError
+    
+    def update(self, tag_id, data):
+        """タグを更新（None の項目は変更しない）"""
+        raise NotImplementedError
+    
+    def delete(self, tag_id):
+        """タグを削除"""
+        raise NotImplementedError
+
+class TaskRepository:
+    """タスク
+    
+    一覧は (priority, created_at, id) の降順。after にはそのキーの値を渡すと、
+    それより後ろの行から limit 件を返す（キーセットページング）。
+    """
+    
+    def list(self, status=None, project_id=None, tag_id=None, limit=None, after=None):
+        """タスクを絞り込んで取得"""
+        raise NotImplementedError
+    
+    def iter(self, status=None, project_id=None, tag_id=None):
+        """list と同じ結果を少しずつ読み出すイテレータ（ストリーミング用）"""
+        return iter(self.list(status, project_id, tag_id))
+    
+    def page(self, status=None, project_id=None, page=0, per_page=20):
+        """ページ番号で取得し、(タスク, 絞り込み条件に一致する総件数) を返す"""
+        raise NotImplementedError
+    
+    def search(self, q, status=None, project_id=None, tag_id=None, limit=50, after=None):
+        """タイトル・説明を全文検索（rank の昇順、after は (rank, id)）
+        
+        各タスクには rank と、一致箇所を <mark> で囲んだ snippet が付く。
+        """
+        raise NotImplementedError
+    
+    def get(self, task_id):
+        """タスクを取得"""
+        raise NotImplementedError
+    
+    def create(self, data):
+        """タスクを作成（tag_ids でタグを紐付け）"""
+        raise NotImplementedError
+    
+    def update(self, task_id, data):
+        """タスクを更新
+        
+        None の項目は変更しない（project_id / due_date はキーがあれば None でも反映）。
+        tag_ids があればタグを置き換え、ステータスが done に変わったときだけ
+        completed_at を設定する。
+        """
+        raise NotImplementedError
+    
+    def delete(self, task_id):
+        """タスクを削除"""
+        raise NotImplementedError
+    
+    def bulk_create(self, items):
+        """複数のタスクを1トランザクションで作成し、入力順に返す"""
+        raise NotImplementedError
+    
+    def bulk_update(self, items):
+        """{'id': ...} を含む更新内容を1トランザクションで適用
+        
+        入力順に更新後のタスク（存在しない場合は None）を返す。
+        """
+        raise NotImplementedError
+    
+    def bulk_update_status(self, task_ids, status):
+        """複数のタスクのステータスを変更し、更新後のタスクを返す"""
+        raise NotImplementedError
+    
+    def bulk_delete(self, task_ids):
+        """複数のタスクを削除し、削除できたIDの集合を返す"""
+        raise NotImplementedError
+
+class IdeaRepository:
+    """アイデア
+    
+    一覧は (is_pinned, updated_at, id) の降順で、after はそのキーの値。
+    """
+    
+    def list(self, search=None, limit=None, after=None):
+        """アイデアを取得（search はタイトル・内容の部分一致）"""
+        raise NotImplementedError
+    
+    def iter(self, search=None):
+        """list と同じ結果を少しずつ読み出すイテレータ（ストリーミング用）"""
+        return iter(self.list(search))
+    
+    def search(self, q, limit=50, after=None):
+        """タイトル・内容を全文検索（rank の昇順、after は (rank, id)）"""
+        raise NotImplementedError
+    
+    def get(self, idea_id):
+        """アイデアを取得"""
+        raise NotImplementedError
+    
+    def create(self, data):
+        """アイデアを作成"""
+        raise NotImplementedError
+    
+    def update(self, idea_id, data):
+        """アイデアを更新（None の項目は変更しない）"""
+        raise NotImplementedError
+    
+    def delete(self, idea_id):
+        """アイデアを削除"""
+        raise NotImplementedError
+    
+    def convert_to_task(self, idea_id):
+        """アイデアをタスクに変換して削除し、作成したタスクを返す"""
+        raise NotImplementedError
+
+class ReportRepository:
+    def count_tasks(self, status=None):
+        """タスク数"""
+        raise NotImplementedError
+    
+    def status_counts(self):
+        """ステータス別のタスク数 {status: count}"""
+        raise NotImplementedError
+    
+    def completion_rate(self):
+        """完了率（%、小数第1位まで）"""
+        raise NotImplementedError
+    
+    def recent_completed(self, limit=5):
+        """最近完了したタスク"""
+        raise NotImplementedError
+    
+    def summary(self):
+        """全体サマリー"""
+        raise NotImplementedError
+    
+    def weekly(self):
+        """今週のレポート（completed_tasks は少しずつ読み出すイテレータ）"""
+        raise NotImplementedError
+    
+    def monthly(self, year, month):
+        """指定月のレポート"""
+        raise NotImplementedError
+
+class SyncRepository:
+    """差分同期
+    
+    トークンは変更のたびに増える整数。changes / deleted はエンティティ名
+    （projects / tags / tasks / ideas）ごとの、変更後の行と削除されたIDのリスト。
+    """
+    
+    def token(self):
+        """現在の変更トークン"""
+        raise NotImplementedError
+    
+    def snapshot(self):
+        """全件を取得し、{'token', 'changes'} を返す"""
+        raise NotImplementedError
+    
+    def changes(self, since, limit=1000):
+        """since より後の変更を古い順に最大 limit 件取得
+        
+        {'token', 'has_more', 'changes', 'deleted'} を返す。has_more が True の場合は
+        返した token から続きを取得する。
+        """
+        raise NotImplementedError
+
+class Repository:
+    """各エンティティのリポジトリをまとめたもの"""
+    
+    def __init__(self, projects, tags, tasks, ideas, reports, sync=None):
+        self.projects = projects
+        self.tags = tags
+        self.tasks = tasks
+        self.ideas = ideas
+        self.reports = reports
+        self.sync = sync or SyncRepository()
@@ -0,0 +1,64 @@
+"""FTS5（trigram）による全文検索のヘルパー"""
+import html
+
+# trigram トークナイザは3文字未満の語を索引から引けない
+MIN_TRIGRAM_LENGTH = 3
+SNIPPET_TOKENS = 16
+
+# snippet() の強調範囲の目印。本文をエスケープしてから <mark> に置き換える
+_MARK_START = '\x02'
+_MARK_END = '\x03'
+
+def search_terms(q):
+    """検索文字列を空白で区切った語のリストにする"""
+    return q.split()
+
+def can_use_index(terms):
+    """すべての語が索引で検索できる長さか"""
+    return bool(terms) and all(len(term) >= MIN_TRIGRAM_LENGTH for term in terms)
+
+def match_expression(terms):
+    """語を FTS5 のフレーズとして引用し、AND で結合した検索式を作る"""
+    return ' '.join('"' + term.replace('"', '""') + '"' for term in terms)
+
+def like_pattern(term):
+    """LIKE の部分一致パターン（ワイルドカード文字はエスケープ、ESCAPE '\\' と併用）"""
+    escaped = term.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+    return f'%{escaped}%'
+
+def snippet_sql(fts_table):
+    """一致箇所の前後を抜き出す snippet() の式"""
+    return (
+        f"snippet({fts_table}, -1, '{_MARK_START}', '{_MARK_END}', '…', {SNIPPET_TOKENS})"
+    )
+
+def highlight(snippet):
+    """snippet を HTML エスケープし、一致箇所を <mark> で囲む"""
+    if snippet is None:
+        return None
+    return (
+        html.escape(snippet)
+        .replace(_MARK_START, '<mark>')
+        .replace(_MARK_END, '</mark>')
+    )
+
+def like_snippet(text, terms):
+    """索引を使えない短い語の場合に、最初の一致箇所の前後を抜き出す"""
+    if not text:
+        return None
+    lowered = text.lower()
+    for term in terms:
+        start = lowered.find(term.lower())
+        if start < 0:
+            continue
+        end = start + len(term)
+        begin = max(0, start - SNIPPET_TOKENS)
+        finish = min(len(text), end + SNIPPET_TOKENS)
+        return (
+            ('…' if begin > 0 else '')
+            + html.escape(text[begin:start])
+            + '<mark>' + html.escape(text[start:end]) + '</mark>'
+            + html.escape(text[end:finish])
+            + ('…' if finish < len(text) else '')
+        )
+    return None
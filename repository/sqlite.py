@@ -0,0 +1,865 @@
+"""SQLite バックエンド（Flask API 用）"""
+import json
+import sqlite3
+from datetime import date, datetime, timedelta
+from dateutil.relativedelta import relativedelta
+from database import (
+    SYNC_ENTITIES, dict_from_row, get_change_token, local_day_start, now_timestamp
+)
+from repository.base import (
+    DuplicateError, ProjectRepository, TagRepository, TaskRepository,
+    IdeaRepository, ReportRepository, SyncRepository, Repository
+)
+from repository.search import (
+    search_terms, can_use_index, match_expression, like_pattern,
+    snippet_sql, highlight, like_snippet
+)
+
+# イテレータで読み出すときに fetchmany で一度に読み込む行数
+FETCH_BATCH_SIZE = 200
+
+# 一覧・検索で共通のタグ付きタスクの列
+TASK_COLUMNS = '''t.*, p.name as project_name,
+               (SELECT json_group_array(json_object('id', tg.id, 'name', tg.name, 'color', tg.color))
+                FROM task_tags tt
+                JOIN tags tg ON tt.tag_id = tg.id
+                WHERE tt.task_id = t.id) as tags'''
+
+TASK_FROM = '''
+        FROM tasks t
+        LEFT JOIN projects p ON t.project_id = p.id
+'''
+
+def task_from_row(row):
+    """一覧クエリの行をタグ付きのタスク辞書に変換"""
+    task = dict_from_row(row)
+    # タグはSQL側で json_group_array により構造化済み
+    task['tags'] = json.loads(task['tags']) if task['tags'] else []
+    return task
+
+def completed_at_for(new_status, current_status):
+    """ステータスがdoneに変わる場合の completed_at を返す（それ以外は None）"""
+    if new_status == 'done' and current_status != 'done':
+        return now_timestamp()
+    return None
+
+def iter_rows(cursor, transform=dict_from_row):
+    """カーソルを fetchmany で少しずつ読みながら変換した行を返す"""
+    while True:
+        rows = cursor.fetchmany(FETCH_BATCH_SIZE)
+        if not rows:
+            break
+        for row in rows:
+            yield transform(row)
+
+def with_snippet(item, terms, *columns):
+    """検索結果の snippet を HTML 用に整える（索引を使わなかった場合は本文から作る）"""
+    if item['snippet'] is None:
+        item['snippet'] = next(
+            (s for s in (like_snippet(item[c], terms) for c in columns) if s), None
+        )
+    else:
+        item['snippet'] = highlight(item['snippet'])
+    return item
+
+class SQLiteProjectRepository(ProjectRepository):
+    def __init__(self, conn):
+        self.conn = conn
+    
+    def _select(self, where='', params=()):
+        return self.conn.execute(f'''
+            SELECT p.*, COUNT(t.id) as task_count,
+                   SUM(CASE WHEN t.status = 'done' THEN 1 ELSE 0 END) as completed_count
+            FROM projects p
+            LEFT JOIN tasks t ON p.id = t.project_id
+            {where}
+            GROUP BY p.id
+            ORDER BY p.created_at DESC
+        ''', params)
+    
+    def list(self):
+        return [dict_from_row(row) for row in self._select().fetchall()]
+    
+    def iter(self):
+        return iter_rows(self._select())
+    
+    def get(self, project_id):
+        return dict_from_row(self._select('WHERE p.id = ?', (project_id,)).fetchone())
+    
+    def create(self, data):
+        cursor = self.conn.execute('''
+            INSERT INTO projects (name, description, color)
+            VALUES (?, ?, ?)
+        ''', (
+            data.get('name'),
+            data.get('description', ''),
+            data.get('color', '#6750A4')
+        ))
+        self.conn.commit()
+        return self.get(cursor.lastrowid)
+    
+    def update(self, project_id, data):
+        cursor = self.conn.execute('''
+            UPDATE projects SET
+                name = COALESCE(?, name),
+                description = COALESCE(?, description),
+                color = COALESCE(?, color),
+                updated_at = CURRENT_TIMESTAMP
+            WHERE id = ?
+        ''', (
+            data.get('name'),
+            data.get('description'),
+            data.get('color'),
+            project_id
+        ))
+        self.conn.commit()
+        return self.get(project_id) if cursor.rowcount else None
+    
+    def delete(self, project_id):
+        cursor = self.conn.execute('DELETE FROM projects WHERE id = ?', (project_id,))
+        self.conn.commit()
+        return cursor.rowcount > 0
+
+class SQLiteTagRepository(TagRepository):
+    def __init__(self, conn):
+        self.conn = conn
+    
+    def _select(self, where='', params=()):
+        return self.conn.execute(f'''
+            SELECT t.*, COUNT(tt.task_id) as usage_count
+            FROM tags t
+            LEFT JOIN task_tags tt ON t.id = tt.tag_id
+            {where}
+            GROUP BY t.id
+            ORDER BY usage_count DESC, t.name ASC
+        ''', params)
+    
+    def list(self):
+        return [dict_from_row(row) for row in self._select().fetchall()]
+    
+    def get(self, tag_id):
+        return dict_from_row(self._select('WHERE t.id = ?', (tag_id,)).fetchone())
+    
+    def create(self, data):
+        try:
+            cursor = self.conn.execute('''
+                INSERT INTO tags (name, color)
+                VALUES (?, ?)
+            ''', (
+                data.get('name'),
+                data.get('color', '#6750A4')
+            ))
+        except sqlite3.IntegrityError:
+            self.conn.rollback()
+            raise DuplicateError('Tag already exists')
+        self.conn.commit()
+        return self.get(cursor.lastrowid)
+    
+    def update(self, tag_id, data):
+        try:
+            cursor = self.conn.execute('''
+                UPDATE tags SET
+                    name = COALESCE(?, name),
+                    color = COALESCE(?, color)
+                WHERE id = ?
+            ''', (
+                data.get('name'),
+                data.get('color'),
+                tag_id
+            ))
+        except sqlite3.IntegrityError:
+            self.conn.rollback()
+            raise DuplicateError('Tag already exists')
+        self.conn.commit()
+        return self.get(tag_id) if cursor.rowcount else None
+    
+    def delete(self, tag_id):
+        cursor = self.conn.execute('DELETE FROM tags WHERE id = ?', (tag_id,))
+        self.conn.commit()
+        return cursor.rowcount > 0
+
+class SQLiteTaskRepository(TaskRepository):
+    def __init__(self, conn):
+        self.conn = conn
+    
+    def _filters(self, status, project_id, tag_id):
+        """status / project_id / tag_id の絞り込み条件とパラメータ"""
+        conditions = []
+        params = []
+        
+        if status:
+            conditions.append('t.status = ?')
+            params.append(status)
+        
+        if project_id:
+            conditions.append('t.project_id = ?')
+            params.append(project_id)
+        
+        if tag_id:
+            conditions.append('t.id IN (SELECT task_id FROM task_tags WHERE tag_id = ?)')
+            params.append(tag_id)
+        
+        return conditions, params
+    
+    def _select(self, status=None, project_id=None, tag_id=None, limit=None, after=None):
+        query = f'SELECT {TASK_COLUMNS} {TASK_FROM}'
+        conditions, params = self._filters(status, project_id, tag_id)
+        
+        if after:
+            conditions.append('(t.priority, t.created_at, t.id) < (?, ?, ?)')
+            params.extend(after)
+        
+        if conditions:
+            query += ' WHERE ' + ' AND '.join(conditions)
+        
+        query += ' ORDER BY t.priority DESC, t.created_at DESC, t.id DESC'
+        
+        if limit:
+            query += ' LIMIT ?'
+            params.append(limit)
+        
+        return self.conn.execute(query, params)
+    
+    def _fetch_by_ids(self, ids):
+        """IDのリストに対応するタスクを {id: dict} で取得"""
+        cursor = self.conn.execute(
+            f'SELECT {TASK_COLUMNS} {TASK_FROM} WHERE t.id IN (SELECT value FROM json_each(?))',
+            (json.dumps(ids),)
+        )
+        return {row['id']: task_from_row(row) for row in cursor.fetchall()}
+    
+    def list(self, status=None, project_id=None, tag_id=None, limit=None, after=None):
+        cursor = self._select(status, project_id, tag_id, limit, after)
+        return [task_from_row(row) for row in cursor.fetchall()]
+    
+    def iter(self, status=None, project_id=None, tag_id=None):
+        return iter_rows(self._select(status, project_id, tag_id), task_from_row)
+    
+    def page(self, status=None, project_id=None, page=0, per_page=20):
+        conditions, params = self._filters(status, project_id, None)
+        where = ' WHERE ' + ' AND '.join(conditions) if conditions else ''
+        total = self.conn.execute(f'SELECT COUNT(*) FROM tasks t{where}', params).fetchone()[0]
+        cursor = self.conn.execute(
+            f'SELECT {TASK_COLUMNS} {TASK_FROM}{where}'
+            ' ORDER BY t.priority DESC, t.created_at DESC, t.id DESC LIMIT ? OFFSET ?',
+            params + [per_page, page * per_page]
+        )
+        return [task_from_row(row) for row in cursor.fetchall()], total
+    
+    def search(self, q, status=None, project_id=None, tag_id=None, limit=50, after=None):
+        terms = search_terms(q)
+        conditions, filter_params = self._filters(status, project_id, tag_id)
+        
+        if can_use_index(terms):
+            query = f'''
+                SELECT {TASK_COLUMNS}, bm25(tasks_fts) as rank, {snippet_sql('tasks_fts')} as snippet
+                FROM tasks_fts
+                JOIN tasks t ON t.id = tasks_fts.rowid
+                LEFT JOIN projects p ON t.project_id = p.id
+            '''
+            conditions.insert(0, 'tasks_fts MATCH ?')
+            params = [match_expression(terms)]
+        else:
+            # 3文字未満の語は索引で引けないため LIKE で検索する（rank は 0）
+            query = f'SELECT {TASK_COLUMNS}, 0.0 as rank, NULL as snippet {TASK_FROM}'
+            conditions[:0] = [
+                "(t.title LIKE ? ESCAPE '\\' OR t.description LIKE ? ESCAPE '\\')" for _ in terms
+            ]
+            params = [like_pattern(term) for term in terms for _ in range(2)]
+        params.extend(filter_params)
+        
+        query = f"SELECT * FROM ({query} WHERE {' AND '.join(conditions)})"
+        if after:
+            query += ' WHERE (rank, id) > (?, ?)'
+            params.extend(after)
+        query += ' ORDER BY rank, id LIMIT ?'
+        params.append(limit)
+        
+        cursor = self.conn.execute(query, params)
+        return [
+            with_snippet(task_from_row(row), terms, 'description', 'title')
+            for row in cursor.fetchall()
+        ]
+    
+    def get(self, task_id):
+        return self._fetch_by_ids([task_id]).get(task_id)
+    
+    def create(self, data):
+        return self.bulk_create([data])[0]
+    
+    def update(self, task_id, data):
+        return self.bulk_update([{**data, 'id': task_id}])[0]
+    
+    def delete(self, task_id):
+        return task_id in self.bulk_delete([task_id])
+    
+    def bulk_create(self, items):
+        cursor = self.conn.cursor()
+        
+        # 書き込みロックを取ってから採番の基準を読むことで、新しいIDを特定する
+        cursor.execute('BEGIN IMMEDIATE')
+        cursor.execute('SELECT COALESCE(MAX(id), 0) AS max_id FROM tasks')
+        max_id = cursor.fetchone()['max_id']
+        
+        cursor.executemany('''
+            INSERT INTO tasks (title, description, color, status, priority, project_id, due_date)
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+        ''', [(
+            data.get('title'),
+            data.get('description', ''),
+            data.get('color', '#6750A4'),
+            data.get('status', 'todo'),
+            data.get('priority') or 0,
+            data.get('project_id'),
+            data.get('due_date')
+        ) for data in items])
+        
+        # AUTOINCREMENT のため、挿入順に max_id より大きいIDが振られる
+        cursor.execute('SELECT id FROM tasks WHERE id > ? ORDER BY id', (max_id,))
+        task_ids = [row['id'] for row in cursor.fetchall()]
+        
+        # タグを紐付け
+        cursor.executemany(
+            'INSERT OR IGNORE INTO task_tags (task_id, tag_id) VALUES (?, ?)',
+            [(task_id, tag_id)
+             for task_id, data in zip(task_ids, items)
+             for tag_id in data.get('tag_ids') or []]
+        )
+        
+        self.conn.commit()
+        
+        created = self._fetch_by_ids(task_ids)
+        return [created[task_id] for task_id in task_ids]
+    
+    def bulk_update(self, items):
+        cursor = self.conn.cursor()
+        
+        ids = [data.get('id') for data in items]
+        cursor.execute('BEGIN IMMEDIATE')
+        cursor.execute(
+            'SELECT * FROM tasks WHERE id IN (SELECT value FROM json_each(?))',
+            (json.dumps(ids),)
+        )
+        current = {row['id']: dict_from_row(row) for row in cursor.fetchall()}
+        
+        updates = []
+        params = []
+        for data in items:
+            task = current.get(data.get('id'))
+            if not task:
+                continue
+            
+            project_id = data.get('project_id', task['project_id'])
+            due_date = data.get('due_date', task['due_date'])
+            params.append((
+                data.get('title'),
+                data.get('description'),
+                data.get('color'),
+                data.get('status'),
+                data.get('priority'),
+                project_id,
+                due_date,
+                completed_at_for(data.get('status'), task['status']),
+                task['id']
+            ))
+            updates.append(data)
+            
+            # 同じタスクが複数回含まれる場合、後の項目は前の項目の適用後を基準にする
+            task['status'] = data.get('status') or task['status']
+            task['project_id'] = project_id
+            task['due_date'] = due_date
+        
+        cursor.executemany('''
+            UPDATE tasks SET
+                title = COALESCE(?, title),
+                description = COALESCE(?, description),
+                color = COALESCE(?, color),
+                status = COALESCE(?, status),
+                priority = COALESCE(?, priority),
+                project_id = ?,
+                due_date = ?,
+                updated_at = CURRENT_TIMESTAMP,
+                completed_at = COALESCE(?, completed_at)
+            WHERE id = ?
+        ''', params)
+        
+        # タグを更新
+        retagged = [data for data in updates if 'tag_ids' in data]
+        cursor.executemany(
+            'DELETE FROM task_tags WHERE task_id = ?',
+            [(data['id'],) for data in retagged]
+        )
+        cursor.executemany(
+            'INSERT OR IGNORE INTO task_tags (task_id, tag_id) VALUES (?, ?)',
+            [(data['id'], tag_id) for data in retagged for tag_id in data['tag_ids'] or []]
+        )
+        
+        self.conn.commit()
+        
+        updated = self._fetch_by_ids([data['id'] for data in updates])
+        return [updated.get(data.get('id')) for data in items]
+    
+    def bulk_update_status(self, task_ids, status):
+        return [
+            task for task in self.bulk_update([{'id': task_id, 'status': status} for task_id in task_ids])
+            if task
+        ]
+    
+    def bulk_delete(self, task_ids):
+        cursor = self.conn.cursor()
+        
+        cursor.execute('BEGIN IMMEDIATE')
+        cursor.execute(
+            'SELECT id FROM tasks WHERE id IN (SELECT value FROM json_each(?))',
+            (json.dumps(task_ids),)
+        )
+        existing = {row['id'] for row in cursor.fetchall()}
+        cursor.executemany(
+            'DELETE FROM tasks WHERE id = ?',
+            [(task_id,) for task_id in existing]
+        )
+        self.conn.commit()
+        
+        return existing
+
+class SQLiteIdeaRepository(IdeaRepository):
+    def __init__(self, conn):
+        self.conn = conn
+    
+    def _select(self, search=None, limit=None, after=None):
+        query = 'SELECT * FROM ideas'
+        conditions = []
+        params = []
+        
+        if search and can_use_index([search]):
+            # 部分一致は全文検索インデックスで絞り込む（本文の全件走査を避ける）
+            conditions.append('id IN (SELECT rowid FROM ideas_fts WHERE ideas_fts MATCH ?)')
+            params.append(match_expression([search]))
+        elif search:
+            conditions.append('(title LIKE ? OR content LIKE ?)')
+            params.extend([f'%{search}%', f'%{search}%'])
+        
+        if after:
+            conditions.append('(is_pinned, updated_at, id) < (?, ?, ?)')
+            params.extend(after)
+        
+        if conditions:
+            query += ' WHERE ' + ' AND '.join(conditions)
+        
+        query += ' ORDER BY is_pinned DESC, updated_at DESC, id DESC'
+        
+        if limit:
+            query += ' LIMIT ?'
+            params.append(limit)
+        
+        return self.conn.execute(query, params)
+    
+    def list(self, search=None, limit=None, after=None):
+        return [dict_from_row(row) for row in self._select(search, limit, after).fetchall()]
+    
+    def iter(self, search=None):
+        return iter_rows(self._select(search))
+    
+    def search(self, q, limit=50, after=None):
+        terms = search_terms(q)
+        
+        if can_use_index(terms):
+            query = f'''
+                SELECT i.*, bm25(ideas_fts) as rank, {snippet_sql('ideas_fts')} as snippet
+                FROM ideas_fts
+                JOIN ideas i ON i.id = ideas_fts.rowid
+                WHERE ideas_fts MATCH ?
+            '''
+            params = [match_expression(terms)]
+        else:
+            # 3文字未満の語は索引で引けないため LIKE で検索する（rank は 0）
+            query = 'SELECT i.*, 0.0 as rank, NULL as snippet FROM ideas i WHERE ' + ' AND '.join(
+                "(i.title LIKE ? ESCAPE '\\' OR i.content LIKE ? ESCAPE '\\')" for _ in terms
+            )
+            params = [like_pattern(term) for term in terms for _ in range(2)]
+        
+        query = f'SELECT * FROM ({query})'
+        if after:
+            query += ' WHERE (rank, id) > (?, ?)'
+            params.extend(after)
+        query += ' ORDER BY rank, id LIMIT ?'
+        params.append(limit)
+        
+        cursor = self.conn.execute(query, params)
+        return [
+            with_snippet(dict_from_row(row), terms, 'content', 'title')
+            for row in cursor.fetchall()
+        ]
+    
+    def get(self, idea_id):
+        return dict_from_row(
+            self.conn.execute('SELECT * FROM ideas WHERE id = ?', (idea_id,)).fetchone()
+        )
+    
+    def create(self, data):
+        cursor = self.conn.execute('''
+            INSERT INTO ideas (title, content, color, is_pinned)
+            VALUES (?, ?, ?, ?)
+        ''', (
+            data.get('title'),
+            data.get('content', ''),
+            data.get('color', '#6750A4'),
+            data.get('is_pinned') or 0
+        ))
+        self.conn.commit()
+        return self.get(cursor.lastrowid)
+    
+    def update(self, idea_id, data):
+        cursor = self.conn.execute('''
+            UPDATE ideas SET
+                title = COALESCE(?, title),
+                content = COALESCE(?, content),
+                color = COALESCE(?, color),
+                is_pinned = COALESCE(?, is_pinned),
+                updated_at = CURRENT_TIMESTAMP
+            WHERE id = ?
+        ''', (
+            data.get('title'),
+            data.get('content'),
+            data.get('color'),
+            data.get('is_pinned'),
+            idea_id
+        ))
+        self.conn.commit()
+        return self.get(idea_id) if cursor.rowcount else None
+    
+    def delete(self, idea_id):
+        cursor = self.conn.execute('DELETE FROM ideas WHERE id = ?', (idea_id,))
+        self.conn.commit()
+        return cursor.rowcount > 0
+    
+    def convert_to_task(self, idea_id):
+        cursor = self.conn.cursor()
+        
+        cursor.execute('BEGIN IMMEDIATE')
+        cursor.execute('SELECT * FROM ideas WHERE id = ?', (idea_id,))
+        idea = cursor.fetchone()
+        if not idea:
+            self.conn.rollback()
+            return None
+        
+        # タスクを作成
+        cursor.execute('''
+            INSERT INTO tasks (title, description, color, status)
+            VALUES (?, ?, ?, 'todo')
+        ''', (
+            idea['title'],
+            idea['content'],
+            idea['color']
+        ))
+        task_id = cursor.lastrowid
+        
+        # アイデアを削除
+        cursor.execute('DELETE FROM ideas WHERE id = ?', (idea_id,))
+        
+        self.conn.commit()
+        
+        return SQLiteTaskRepository(self.conn).get(task_id)
+
+class SQLiteReportRepository(ReportRepository):
+    def __init__(self, conn):
+        self.conn = conn
+    
+    def count_tasks(self, status=None):
+        if status:
+            row = self.conn.execute('SELECT COUNT(*) as count FROM tasks WHERE status = ?', (status,)).fetchone()
+        else:
+            row = self.conn.execute('SELECT COUNT(*) as count FROM tasks').fetchone()
+        return row['count']
+    
+    def status_counts(self):
+        cursor = self.conn.execute('''
+            SELECT status, COUNT(*) as count FROM tasks GROUP BY status
+        ''')
+        return {row['status']: row['count'] for row in cursor.fetchall()}
+    
+    def completion_rate(self):
+        total = self.count_tasks()
+        completed = self.count_tasks('done')
+        return round(completed / total * 100, 1) if total > 0 else 0
+    
+    def recent_completed(self, limit=5):
+        cursor = self.conn.execute('''
+            SELECT * FROM tasks
+            WHERE status = 'done'
+            ORDER BY completed_at DESC, id DESC
+            LIMIT ?
+        ''', (limit,))
+        return [dict_from_row(row) for row in cursor.fetchall()]
+    
+    def summary(self):
+        cursor = self.conn.cursor()
+        
+        # 総タスク数
+        total_tasks = self.count_tasks()
+        
+        # ステータス別
+        status_counts = self.status_counts()
+        
+        # プロジェクト数
+        cursor.execute('SELECT COUNT(*) as count FROM projects')
+        total_projects = cursor.fetchone()['count']
+        
+        # タグ数
+        cursor.execute('SELECT COUNT(*) as count FROM tags')
+        total_tags = cursor.fetchone()['count']
+        
+        # アイデア数
+        cursor.execute('SELECT COUNT(*) as count FROM ideas')
+        total_ideas = cursor.fetchone()['count']
+        
+        # 完了率
+        completed = status_counts.get('done', 0)
+        completion_rate = (completed / total_tasks * 100) if total_tasks > 0 else 0
+        
+        return {
+            'total_tasks': total_tasks,
+            'status_counts': status_counts,
+            'total_projects': total_projects,
+            'total_tags': total_tags,
+            'total_ideas': total_ideas,
+            'completion_rate': round(completion_rate, 1)
+        }
+    
+    def weekly(self):
+        cursor = self.conn.cursor()
+        
+        # 今週の開始日（月曜日）と終了日（日曜日）を計算（日次集計と同じくローカル日付）
+        today = date.today()
+        week_start = today - timedelta(days=today.weekday())
+        week_end = week_start + timedelta(days=6)
+        
+        week_start_str = week_start.strftime('%Y-%m-%d')
+        week_end_str = week_end.strftime('%Y-%m-%d')
+        # 期間の絞り込みは列を関数で包まず、半開区間 [開始日, 翌週の開始日) で行う
+        next_week_str = (week_start + timedelta(days=7)).strftime('%Y-%m-%d')
+        
+        # 今週完了したタスク（後で少しずつ読み出すため専用カーソルを使う）
+        # completed_at は UTC なので、週の境界（ローカル日付の 0 時）を UTC に変換して比較する
+        completed_cursor = self.conn.execute('''
+            SELECT * FROM tasks
+            WHERE completed_at >= ? AND completed_at < ?
+            ORDER BY completed_at DESC
+        ''', (local_day_start(week_start), local_day_start(week_start + timedelta(days=7))))
+        
+        # 今週作成されたタスク（日次集計から）
+        cursor.execute('''
+            SELECT COALESCE(SUM(count), 0) as count FROM task_daily_stats
+            WHERE kind = 'created' AND day >= ? AND day < ?
+        ''', (week_start_str, next_week_str))
+        created_count = cursor.fetchone()['count']
+        
+        # 現在進行中のタスク
+        in_progress_count = self.count_tasks('in_progress')
+        
+        # ステータス別のタスク数
+        status_counts = self.status_counts()
+        
+        # 日別完了タスク数（今週）
+        cursor.execute('''
+            SELECT day as date, SUM(count) as count
+            FROM task_daily_stats
+            WHERE kind = 'completed' AND day >= ? AND day < ?
+            GROUP BY day
+            ORDER BY day
+        ''', (week_start_str, next_week_str))
+        daily_completed = {row['date']: row['count'] for row in cursor.fetchall()}
+        
+        # 全日付のデータを生成
+        daily_data = []
+        for i in range(7):
+            day = week_start + timedelta(days=i)
+            day_str = day.strftime('%Y-%m-%d')
+            daily_data.append({
+                'date': day_str,
+                'day_name': ['月', '火', '水', '木', '金', '土', '日'][i],
+                'count': daily_completed.get(day_str, 0)
+            })
+        
+        return {
+            'period': {
+                'start': week_start_str,
+                'end': week_end_str
+            },
+            'created_count': created_count,
+            'in_progress_count': in_progress_count,
+            'status_counts': status_counts,
+            'daily_data': daily_data,
+            'completed_tasks': iter_rows(completed_cursor)
+        }
+    
+    def monthly(self, year, month):
+        cursor = self.conn.cursor()
+        
+        month_start = datetime(year, month, 1)
+        month_end = month_start + relativedelta(months=1) - timedelta(days=1)
+        
+        month_start_str = month_start.strftime('%Y-%m-%d')
+        month_end_str = month_end.strftime('%Y-%m-%d')
+        # 半開区間 [月初, 翌月初) で絞り込む
+        next_month_str = (month_start + relativedelta(months=1)).strftime('%Y-%m-%d')
+        
+        # 今月完了・作成したタスク数
+        cursor.execute('''
+            SELECT kind, SUM(count) as count FROM task_daily_stats
+            WHERE kind IN ('created', 'completed') AND day >= ? AND day < ?
+            GROUP BY kind
+        ''', (month_start_str, next_month_str))
+        kind_counts = {row['kind']: row['count'] for row in cursor.fetchall()}
+        completed_count = kind_counts.get('completed', 0)
+        created_count = kind_counts.get('created', 0)
+        
+        # プロジェクト別完了タスク数
+        cursor.execute('''
+            SELECT p.id, p.name, p.color, COALESCE(s.count, 0) as completed_count
+            FROM projects p
+            LEFT JOIN (
+                SELECT project_id, SUM(count) as count FROM task_daily_stats
+                WHERE kind = 'completed' AND day >= ? AND day < ?
+                GROUP BY project_id
+            ) s ON p.id = s.project_id
+            ORDER BY completed_count DESC, p.id
+        ''', (month_start_str, next_month_str))
+        project_stats = [dict_from_row(row) for row in cursor.fetchall()]
+        
+        # タグ別完了タスク数
+        cursor.execute('''
+            SELECT tg.id, tg.name, tg.color, COALESCE(s.count, 0) as completed_count
+            FROM tags tg
+            LEFT JOIN (
+                SELECT tag_id, SUM(count) as count FROM tag_daily_stats
+                WHERE day >= ? AND day < ?
+                GROUP BY tag_id
+            ) s ON tg.id = s.tag_id
+            ORDER BY completed_count DESC, tg.id
+        ''', (month_start_str, next_month_str))
+        tag_stats = [dict_from_row(row) for row in cursor.fetchall()]
+        
+        # 週別完了タスク数
+        cursor.execute('''
+            SELECT strftime('%W', day) as week, SUM(count) as count
+            FROM task_daily_stats
+            WHERE kind = 'completed' AND day >= ? AND day < ?
+            GROUP BY week
+            HAVING SUM(count) > 0
+            ORDER BY week
+        ''', (month_start_str, next_month_str))
+        weekly_data = [dict_from_row(row) for row in cursor.fetchall()]
+        
+        # 色別完了タスク数（色なしは '' で集計しているので NULL に戻す）
+        cursor.execute('''
+            SELECT NULLIF(color, '') as color, SUM(count) as count
+            FROM task_daily_stats
+            WHERE kind = 'completed' AND day >= ? AND day < ?
+            GROUP BY color
+            HAVING SUM(count) > 0
+            ORDER BY count DESC
+        ''', (month_start_str, next_month_str))
+        color_stats = [dict_from_row(row) for row in cursor.fetchall()]
+        
+        return {
+            'period': {
+                'year': year,
+                'month': month,
+                'start': month_start_str,
+                'end': month_end_str
+            },
+            'completed_count': completed_count,
+            'created_count': created_count,
+            'project_stats': project_stats,
+            'tag_stats': tag_stats,
+            'weekly_data': weekly_data,
+            'color_stats': color_stats
+        }
+
+class SQLiteSyncRepository(SyncRepository):
+    """change_log（database.py を参照）に基づく差分同期"""
+    
+    def __init__(self, conn, projects, tags, tasks, ideas):
+        self.conn = conn
+        self.projects = projects
+        self.tags = tags
+        self.tasks = tasks
+        self.ideas = ideas
+    
+    def _fetch_by_ids(self, entity, ids):
+        """IDのリストに対応する行を一覧と同じ形で取得"""
+        if not ids:
+            return []
+        if entity == 'tasks':
+            return list(self.tasks._fetch_by_ids(ids).values())
+        
+        where = 'WHERE {}.id IN (SELECT value FROM json_each(?))'
+        params = (json.dumps(ids),)
+        if entity == 'projects':
+            cursor = self.projects._select(where.format('p'), params)
+        elif entity == 'tags':
+            cursor = self.tags._select(where.format('t'), params)
+        else:
+            cursor = self.conn.execute(f'SELECT * FROM ideas {where.format("ideas")}', params)
+        return [dict_from_row(row) for row in cursor.fetchall()]
+    
+    def token(self):
+        return get_change_token(self.conn)
+    
+    def snapshot(self):
+        # 先にトークンを読むので、読み出し中の変更は次回の同期でもう一度返る
+        token = self.token()
+        return {
+            'token': token,
+            'changes': {
+                'projects': self.projects.list(),
+                'tags': self.tags.list(),
+                'tasks': self.tasks.list(),
+                'ideas': self.ideas.list()
+            }
+        }
+    
+    def changes(self, since, limit=1000):
+        # seq は rowid なので、変更件数に比例した範囲だけを読む
+        rows = self.conn.execute('''
+            SELECT seq, entity, entity_id, op FROM change_log
+            WHERE seq > ?
+            ORDER BY seq
+            LIMIT ?
+        ''', (since, limit + 1)).fetchall()
+        has_more = len(rows) > limit
+        rows = rows[:limit]
+        
+        upserts = {entity: [] for entity in SYNC_ENTITIES}
+        deleted = {entity: [] for entity in SYNC_ENTITIES}
+        for row in rows:
+            target = deleted if row['op'] == 'delete' else upserts
+            target[row['entity']].append(row['entity_id'])
+        
+        return {
+            'token': rows[-1]['seq'] if rows else since,
+            'has_more': has_more,
+            'changes': {
+                entity: self._fetch_by_ids(entity, ids) for entity, ids in upserts.items()
+            },
+            'deleted': deleted
+        }
+
+class SQLiteRepository(Repository):
+    """1つの SQLite 接続を共有するリポジトリ"""
+    
+    def __init__(self, conn):
+        projects = SQLiteProjectRepository(conn)
+        tags = SQLiteTagRepository(conn)
+        tasks = SQLiteTaskRepository(conn)
+        ideas = SQLiteIdeaRepository(conn)
+        super().__init__(
+            projects=projects,
+            tags=tags,
+            tasks=tasks,
+            ideas=ideas,
+            reports=SQLiteReportRepository(conn),
+            sync=SQLiteSyncRepository(conn, projects, tags, tasks, ideas)
+        )
+        self.conn = conn
@@ -0,0 +1,28 @@
+"""Supabase の代わりに使うローカルのスタブ
+
+Supabase に接続せずに Streamlit アプリやテストを動かすため、一時ファイルの SQLite
+データベースを SupabaseRepository と同じインターフェースで提供する。
+DEVTODO_BACKEND=stub で有効になる（DEVTODO_STUB_DB でファイルの場所を指定可能）。
+"""
+import os
+import tempfile
+from database import connect, migrate
+from repository.sqlite import SQLiteRepository
+
+STUB_DATABASE_PATH = os.environ.get(
+    'DEVTODO_STUB_DB', os.path.join(tempfile.gettempdir(), 'devtodo', 'stub.db')
+)
+
+def is_enabled():
+    """スタブを使う設定になっているか"""
+    return os.environ.get('DEVTODO_BACKEND', '').lower() == 'stub'
+
+def create_stub_repository(path=STUB_DATABASE_PATH):
+    """スタブ用のデータベースを準備してリポジトリを返す
+    
+    接続はスレッド間で共有できないトランザクションを持つため、呼び出し側
+    （Streamlit のセッションやテストケース）ごとに作成すること。
+    """
+    conn = connect(path)
+    migrate(conn)
+    return SQLiteRepository(conn)
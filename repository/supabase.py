@@ -0,0 +1,537 @@
+"""Supabase（PostgREST）バックエンド（Streamlit 用）
+
+SQLite バックエンドと同じ形の行を返すよう、埋め込み（projects / tags）を平坦化する。
+複数テーブルにまたがる書き込みは supabase_auth_migration.sql の RPC で1トランザクションにする。
+週次・月次レポートは supabase_schema.sql の集計 RPC を使い、日付は SQLite 版と同じく
+ローカル時刻で区切る。差分同期（change_log）には対応しない。
+"""
+from datetime import date, datetime, time, timedelta
+from dateutil.relativedelta import relativedelta
+from postgrest.exceptions import APIError
+from repository.base import (
+    DuplicateError, UnsupportedOperation, ProjectRepository, TagRepository, TaskRepository,
+    IdeaRepository, ReportRepository, SyncRepository, Repository
+)
+from repository.search import search_terms, like_pattern, like_snippet
+
+# 一意制約違反・RPC の「見つからない」例外の SQLSTATE
+UNIQUE_VIOLATION = '23505'
+NOT_FOUND = 'P0002'
+
+# 一覧・取得で共通のタスクの列（タグは task_tags を介した多対多の埋め込み）
+TASK_SELECT = '*, projects(name), tags(id, name, color)'
+
+WEEKDAY_NAMES = ['月', '火', '水', '木', '金', '土', '日']
+
+def quote(value):
+    """PostgREST の or / and フィルタに埋め込む値をダブルクォートで囲む"""
+    if isinstance(value, bool):
+        value = 'true' if value else 'false'
+    value = str(value).replace('\\', '\\\\').replace('"', '\\"')
+    return f'"{value}"'
+
+def keyset_filter(columns, values):
+    """降順の複合キーで values より後ろの行を表す or フィルタ"""
+    branches = []
+    for i, column in enumerate(columns):
+        equal = [f'{c}.eq.{quote(v)}' for c, v in zip(columns[:i], values[:i])]
+        branches.append(','.join(equal + [f'{column}.lt.{quote(values[i])}']))
+    return ','.join(f'and({b})' if ',' in b else b for b in branches)
+
+def task_from_row(row):
+    """埋め込みの projects を project_name に平坦化"""
+    task = dict(row)
+    project = task.pop('projects', None)
+    task['project_name'] = project['name'] if project else None
+    task['tags'] = task.get('tags') or []
+    return task
+
+def local_midnight(day):
+    """ローカル日付 day の 0 時（タイムゾーン付き、timestamptz 列との比較用）"""
+    return datetime.combine(day, time()).astimezone()
+
+def utc_offset(day):
+    """ローカル日付 day の 0 時時点の UTC からのずれ（集計 RPC の p_utc_offset）"""
+    return f'{int(local_midnight(day).utcoffset().total_seconds())} seconds'
+
+def embedded_count(row, key):
+    """table(count) の埋め込み [{'count': n}] を数値にする"""
+    counts = row.pop(key, None) or []
+    return counts[0]['count'] if counts else 0
+
+def like_conditions(query, terms, *columns):
+    """各語をいずれかの列に含む（ilike）条件を追加"""
+    for term in terms:
+        pattern = quote(like_pattern(term))
+        query = query.or_(','.join(f'{c}.ilike.{pattern}' for c in columns))
+    return query
+
+def with_like_snippet(item, terms, *columns):
+    item['rank'] = 0.0
+    item['snippet'] = next(
+        (s for s in (like_snippet(item[c], terms) for c in columns) if s), None
+    )
+    return item
+
+class SupabaseProjectRepository(ProjectRepository):
+    def __init__(self, client, user_id=None):
+        self.client = client
+        self.user_id = user_id
+    
+    def _select(self):
+        return self.client.table('projects').select(
+            '*, task_count:tasks(count), completed_count:tasks(count)'
+        ).eq('completed_count.status', 'done')
+    
+    def _from_row(self, row):
+        project = dict(row)
+        project['task_count'] = embedded_count(project, 'task_count')
+        project['completed_count'] = embedded_count(project, 'completed_count')
+        return project
+    
+    def list(self):
+        response = self._select().order('created_at', desc=True).execute()
+        return [self._from_row(row) for row in response.data]
+    
+    def get(self, project_id):
+        response = self._select().eq('id', project_id).execute()
+        return self._from_row(response.data[0]) if response.data else None
+    
+    def create(self, data):
+        response = self.client.table('projects').insert({
+            'name': data.get('name'),
+            'description': data.get('description', ''),
+            'color': data.get('color', '#6750A4'),
+            'user_id': self.user_id
+        }).execute()
+        return {**response.data[0], 'task_count': 0, 'completed_count': 0}
+    
+    def update(self, project_id, data):
+        changes = {k: data[k] for k in ('name', 'description', 'color') if data.get(k) is not None}
+        if not changes:
+            return self.get(project_id)
+        response = self.client.table('projects').update(changes).eq('id', project_id).execute()
+        return self.get(project_id) if response.data else None
+    
+    def delete(self, project_id):
+        response = self.client.table('projects').delete().eq('id', project_id).execute()
+        return bool(response.data)
+
+class SupabaseTagRepository(TagRepository):
+    def __init__(self, client, user_id=None):
+        self.client = client
+        self.user_id = user_id
+    
+    def _select(self):
+        return self.client.table('tags').select('*, usage_count:task_tags(count)')
+    
+    def _from_row(self, row):
+        tag = dict(row)
+        tag['usage_count'] = embedded_count(tag, 'usage_count')
+        return tag
+    
+    def list(self):
+        tags = [self._from_row(row) for row in self._select().execute().data]
+        # 埋め込みの件数では並べ替えられないため、手元で SQLite と同じ順に並べる
+        return sorted(tags, key=lambda t: (-t['usage_count'], t['name']))
+    
+    def get(self, tag_id):
+        response = self._select().eq('id', tag_id).execute()
+        return self._from_row(response.data[0]) if response.data else None
+    
+    def create(self, data):
+        try:
+            response = self.client.table('tags').insert({
+                'name': data.get('name'),
+                'color': data.get('color', '#6750A4'),
+                'user_id': self.user_id
+            }).execute()
+        except APIError as e:
+            if e.code == UNIQUE_VIOLATION:
+                raise DuplicateError('Tag already exists')
+            raise
+        return {**response.data[0], 'usage_count': 0}
+    
+    def update(self, tag_id, data):
+        changes = {k: data[k] for k in ('name', 'color') if data.get(k) is not None}
+        if not changes:
+            return self.get(tag_id)
+        try:
+            response = self.client.table('tags').update(changes).eq('id', tag_id).execute()
+        except APIError as e:
+            if e.code == UNIQUE_VIOLATION:
+                raise DuplicateError('Tag already exists')
+            raise
+        return self.get(tag_id) if response.data else None
+    
+    def delete(self, tag_id):
+        response = self.client.table('tags').delete().eq('id', tag_id).execute()
+        return bool(response.data)
+
+class SupabaseTaskRepository(TaskRepository):
+    def __init__(self, client, user_id=None):
+        self.client = client
+        self.user_id = user_id
+    
+    def _select(self, status=None, project_id=None, tag_id=None, count=None):
+        columns = TASK_SELECT
+        if tag_id:
+            # 絞り込み用の内部結合（結果には含めない）
+            columns += ', tag_filter:task_tags!inner(tag_id)'
+        query = self.client.table('tasks').select(columns, count=count)
+        if status:
+            query = query.eq('status', status)
+        if project_id:
+            query = query.eq('project_id', project_id)
+        if tag_id:
+            query = query.eq('tag_filter.tag_id', tag_id)
+        return query
+    
+    def _ordered(self, query):
+        return query.order('priority', desc=True).order('created_at', desc=True).order('id', desc=True)
+    
+    def _from_rows(self, rows):
+        tasks = []
+        for row in rows:
+            task = task_from_row(row)
+            task.pop('tag_filter', None)
+            tasks.append(task)
+        return tasks
+    
+    def _fetch_by_ids(self, ids):
+        if not ids:
+            return {}
+        response = self._select().in_('id', list(ids)).execute()
+        return {task['id']: task for task in self._from_rows(response.data)}
+    
+    def list(self, status=None, project_id=None, tag_id=None, limit=None, after=None):
+        query = self._select(status, project_id, tag_id)
+        if after:
+            query = query.or_(keyset_filter(('priority', 'created_at', 'id'), after))
+        query = self._ordered(query)
+        if limit:
+            query = query.limit(limit)
+        return self._from_rows(query.execute().data)
+    
+    def page(self, status=None, project_id=None, page=0, per_page=20):
+        start = page * per_page
+        response = self._ordered(self._select(status, project_id, count='exact')).range(
+            start, start + per_page - 1
+        ).execute()
+        return self._from_rows(response.data), response.count or 0
+    
+    def search(self, q, status=None, project_id=None, tag_id=None, limit=50, after=None):
+        # pg_trgm の GIN 索引が効く ilike で検索する（関連度は付けず rank は 0）
+        terms = search_terms(q)
+        query = like_conditions(self._select(status, project_id, tag_id), terms, 'title', 'description')
+        if after:
+            query = query.gt('id', after[1])
+        response = query.order('id').limit(limit).execute()
+        return [
+            with_like_snippet(task, terms, 'description', 'title')
+            for task in self._from_rows(response.data)
+        ]
+    
+    def get(self, task_id):
+        return self._fetch_by_ids([task_id]).get(task_id)
+    
+    def create(self, data):
+        task = {k: data.get(k) for k in (
+            'title', 'description', 'color', 'status', 'priority', 'project_id', 'due_date'
+        )}
+        response = self.client.rpc('create_task_with_tags', {
+            'p_task': task,
+            'p_tag_ids': data.get('tag_ids') or []
+        }).execute()
+        return self.get(response.data['id'])
+    
+    def _changes(self, data):
+        """RPC に送る変更内容（None の項目は送らない。RPC は送られたキーだけを更新する）"""
+        changes = {
+            k: data[k] for k in ('title', 'description', 'color', 'status', 'priority')
+            if data.get(k) is not None
+        }
+        changes.update({k: data[k] for k in ('project_id', 'due_date') if k in data})
+        return changes
+    
+    def update(self, task_id, data):
+        try:
+            self.client.rpc('update_task_with_tags', {
+                'p_task_id': task_id,
+                'p_changes': self._changes(data),
+                'p_tag_ids': (data['tag_ids'] or []) if 'tag_ids' in data else None
+            }).execute()
+        except APIError as e:
+            if e.code == NOT_FOUND:
+                return None
+            raise
+        return self.get(task_id)
+    
+    def delete(self, task_id):
+        return task_id in self.bulk_delete([task_id])
+    
+    def bulk_create(self, items):
+        """全件を1回の RPC（bulk_create_tasks）で、タグの紐付けまで1トランザクションで作成"""
+        response = self.client.rpc('bulk_create_tasks', {'p_items': [{
+            'title': data.get('title'),
+            'description': data.get('description', ''),
+            'color': data.get('color', '#6750A4'),
+            'status': data.get('status', 'todo'),
+            'priority': data.get('priority') or 0,
+            'project_id': data.get('project_id'),
+            'due_date': data.get('due_date'),
+            'tag_ids': data.get('tag_ids') or []
+        } for data in items]}).execute()
+        task_ids = [row['id'] for row in response.data]
+        
+        created = self._fetch_by_ids(task_ids)
+        return [created[task_id] for task_id in task_ids]
+    
+    def bulk_update(self, items):
+        """全件を1回の RPC（bulk_update_tasks）で1トランザクションにまとめて更新"""
+        payload = []
+        for data in items:
+            item = {'id': data.get('id'), **self._changes(data)}
+            if 'tag_ids' in data:
+                item['tag_ids'] = data['tag_ids'] or []
+            payload.append(item)
+        response = self.client.rpc('bulk_update_tasks', {'p_items': payload}).execute()
+        
+        updated = self._fetch_by_ids({row['id'] for row in response.data})
+        return [updated.get(data.get('id')) for data in items]
+    
+    def bulk_update_status(self, task_ids, status):
+        response = self.client.rpc('bulk_update_task_status', {
+            'p_task_ids': list(task_ids),
+            'p_status': status
+        }).execute()
+        updated = self._fetch_by_ids([row['id'] for row in response.data])
+        return [updated[task_id] for task_id in task_ids if task_id in updated]
+    
+    def bulk_delete(self, task_ids):
+        response = self.client.table('tasks').delete().in_('id', list(task_ids)).execute()
+        return {row['id'] for row in response.data}
+
+class SupabaseIdeaRepository(IdeaRepository):
+    def __init__(self, client, user_id=None):
+        self.client = client
+        self.user_id = user_id
+    
+    def list(self, search=None, limit=None, after=None):
+        query = self.client.table('ideas').select('*')
+        if search:
+            query = like_conditions(query, [search], 'title', 'content')
+        if after:
+            query = query.or_(keyset_filter(('is_pinned', 'updated_at', 'id'), after))
+        query = query.order('is_pinned', desc=True).order('updated_at', desc=True).order('id', desc=True)
+        if limit:
+            query = query.limit(limit)
+        return query.execute().data
+    
+    def search(self, q, limit=50, after=None):
+        terms = search_terms(q)
+        query = like_conditions(self.client.table('ideas').select('*'), terms, 'title', 'content')
+        if after:
+            query = query.gt('id', after[1])
+        response = query.order('id').limit(limit).execute()
+        return [with_like_snippet(dict(row), terms, 'content', 'title') for row in response.data]
+    
+    def get(self, idea_id):
+        response = self.client.table('ideas').select('*').eq('id', idea_id).execute()
+        return response.data[0] if response.data else None
+    
+    def create(self, data):
+        response = self.client.table('ideas').insert({
+            'title': data.get('title'),
+            'content': data.get('content', ''),
+            'color': data.get('color', '#6750A4'),
+            'is_pinned': bool(data.get('is_pinned', False)),
+            'user_id': self.user_id
+        }).execute()
+        return response.data[0]
+    
+    def update(self, idea_id, data):
+        changes = {k: data[k] for k in ('title', 'content', 'color', 'is_pinned') if data.get(k) is not None}
+        if not changes:
+            return self.get(idea_id)
+        response = self.client.table('ideas').update(changes).eq('id', idea_id).execute()
+        return response.data[0] if response.data else None
+    
+    def delete(self, idea_id):
+        response = self.client.table('ideas').delete().eq('id', idea_id).execute()
+        return bool(response.data)
+    
+    def convert_to_task(self, idea_id):
+        try:
+            response = self.client.rpc('convert_idea_to_task', {'p_idea_id': idea_id}).execute()
+        except APIError as e:
+            if e.code == NOT_FOUND:
+                return None
+            raise
+        return SupabaseTaskRepository(self.client, self.user_id).get(response.data['id'])
+
+class SupabaseReportRepository(ReportRepository):
+    def __init__(self, client, user_id=None):
+        self.client = client
+        self.user_id = user_id
+    
+    def _count(self, table, status=None):
+        query = self.client.table(table).select('id', count='exact', head=True)
+        if status:
+            query = query.eq('status', status)
+        return query.execute().count or 0
+    
+    def count_tasks(self, status=None):
+        return self._count('tasks', status)
+    
+    def status_counts(self):
+        response = self.client.table('task_status_counts').select('status, count').execute()
+        return {row['status']: row['count'] for row in response.data}
+    
+    def completion_rate(self):
+        response = self.client.rpc('task_completion_rate').execute()
+        return float(response.data or 0)
+    
+    def recent_completed(self, limit=5):
+        response = self.client.table('recent_completed_tasks').select('*').limit(limit).execute()
+        return response.data
+    
+    def summary(self):
+        status_counts = self.status_counts()
+        return {
+            'total_tasks': sum(status_counts.values()),
+            'status_counts': status_counts,
+            'total_projects': self._count('projects'),
+            'total_tags': self._count('tags'),
+            'total_ideas': self._count('ideas'),
+            'completion_rate': self.completion_rate()
+        }
+    
+    def _period_params(self, start, end):
+        return {'p_start': start.isoformat(), 'p_end': end.isoformat(), 'p_utc_offset': utc_offset(start)}
+    
+    def _daily_stats(self, start, end):
+        """[start, end) の日別・種別・プロジェクト別・色別のタスク数（task_daily_stats RPC）"""
+        return self.client.rpc('task_daily_stats', self._period_params(start, end)).execute().data
+    
+    def weekly(self):
+        # 今週の開始日（月曜日）と終了日（日曜日）
+        today = date.today()
+        week_start = today - timedelta(days=today.weekday())
+        next_week = week_start + timedelta(days=7)
+        
+        stats = self._daily_stats(week_start, next_week)
+        daily_completed = {}
+        for row in stats:
+            if row['kind'] == 'completed':
+                daily_completed[row['day']] = daily_completed.get(row['day'], 0) + row['count']
+        
+        completed_tasks = self.client.table('tasks').select('*').gte(
+            'completed_at', local_midnight(week_start).isoformat()
+        ).lt(
+            'completed_at', local_midnight(next_week).isoformat()
+        ).order('completed_at', desc=True).execute().data
+        
+        return {
+            'period': {
+                'start': week_start.isoformat(),
+                'end': (next_week - timedelta(days=1)).isoformat()
+            },
+            'created_count': sum(row['count'] for row in stats if row['kind'] == 'created'),
+            'in_progress_count': self.count_tasks('in_progress'),
+            'status_counts': self.status_counts(),
+            'daily_data': [
+                {
+                    'date': (week_start + timedelta(days=i)).isoformat(),
+                    'day_name': WEEKDAY_NAMES[i],
+                    'count': daily_completed.get((week_start + timedelta(days=i)).isoformat(), 0)
+                }
+                for i in range(7)
+            ],
+            'completed_tasks': iter(completed_tasks)
+        }
+    
+    def monthly(self, year, month):
+        month_start = date(year, month, 1)
+        next_month = month_start + relativedelta(months=1)
+        
+        stats = self._daily_stats(month_start, next_month)
+        completed = [row for row in stats if row['kind'] == 'completed']
+        
+        def totals(key):
+            counts = {}
+            for row in completed:
+                counts[key(row)] = counts.get(key(row), 0) + row['count']
+            return counts
+        
+        # プロジェクト別・タグ別は、完了タスクのないものも 0 件で含める（SQLite 版と同じ順）
+        by_project = totals(lambda row: row['project_id'])
+        projects = self.client.table('projects').select('id, name, color').execute().data
+        project_stats = sorted(
+            ({**p, 'completed_count': by_project.get(p['id'], 0)} for p in projects),
+            key=lambda p: (-p['completed_count'], p['id'])
+        )
+        
+        tag_counts = self.client.rpc('tag_completion_counts', self._period_params(month_start, next_month)).execute()
+        by_tag = {row['tag_id']: row['count'] for row in tag_counts.data}
+        tags = self.client.table('tags').select('id, name, color').execute().data
+        tag_stats = sorted(
+            ({**t, 'completed_count': by_tag.get(t['id'], 0)} for t in tags),
+            key=lambda t: (-t['completed_count'], t['id'])
+        )
+        
+        by_week = totals(lambda row: date.fromisoformat(row['day']).strftime('%W'))
+        by_color = totals(lambda row: row['color'] or None)
+        
+        return {
+            'period': {
+                'year': year,
+                'month': month,
+                'start': month_start.isoformat(),
+                'end': (next_month - timedelta(days=1)).isoformat()
+            },
+            'completed_count': sum(row['count'] for row in completed),
+            'created_count': sum(row['count'] for row in stats if row['kind'] == 'created'),
+            'project_stats': project_stats,
+            'tag_stats': tag_stats,
+            'weekly_data': [
+                {'week': week, 'count': count}
+                for week, count in sorted(by_week.items()) if count > 0
+            ],
+            'color_stats': sorted(
+                ({'color': color, 'count': count} for color, count in by_color.items() if count > 0),
+                key=lambda c: -c['count']
+            )
+        }
+
+class SupabaseSyncRepository(SyncRepository):
+    """差分同期は SQLite の change_log に依存するため、Supabase では使えない"""
+    
+    def _unsupported(self):
+        raise UnsupportedOperation('Sync is not supported by the Supabase backend')
+    
+    def token(self):
+        self._unsupported()
+    
+    def snapshot(self):
+        self._unsupported()
+    
+    def changes(self, since, limit=1000):
+        self._unsupported()
+
+class SupabaseRepository(Repository):
+    """Supabase クライアントを共有するリポジトリ
+    
+    user_id は作成する行の所有者（RLS のポリシーで auth.uid() と照合される）。
+    """
+    
+    def __init__(self, client, user_id=None):
+        super().__init__(
+            projects=SupabaseProjectRepository(client, user_id),
+            tags=SupabaseTagRepository(client, user_id),
+            tasks=SupabaseTaskRepository(client, user_id),
+            ideas=SupabaseIdeaRepository(client, user_id),
+            reports=SupabaseReportRepository(client, user_id),
+            sync=SupabaseSyncRepository()
+        )
+        self.client = client
@@ -28,12 +28,54 @@ async function registerServiceWorker() {
         try {
             const registration = await navigator.serviceWorker.register('/sw.js');
             console.log('Service Worker registered:', registration.scope);
+            
+            navigator.serviceWorker.addEventListener('message', handleServiceWorkerMessage);
+            
+            // 接続が戻ったらオフライン中の書き込みを送らせる（Background Sync 非対応のブラウザ向け）
+            window.addEventListener('online', () => {
+                if (navigator.serviceWorker.controller) {
+                    navigator.serviceWorker.controller.postMessage({ type: 'replay-outbox' });
+                }
+            });
         } catch (error) {
             console.log('Service Worker registration failed:', error);
         }
     }
 }
 
+// Service Worker からの通知（裏で再検証したデータの反映や、送信待ちの書き込みの結果）
+function handleServiceWorkerMessage(event) {
+    const message = event.data || {};
+    if (message.type === 'api-updated') {
+        reloadCollection(new URL(message.url).pathname);
+    } else if (message.type === 'outbox-replayed') {
+        loadInitialData();
+        showSnackbar(`オフライン中の変更を${message.count}件送信しました`);
+    } else if (message.type === 'outbox-rejected') {
+        showSnackbar(`オフライン中の変更が保存できませんでした: ${message.error}`, 6000);
+    }
+}
+
+// 更新された API に対応する一覧（表示中ならレポート）を読み直して再描画する
+function reloadCollection(pathname) {
+    if (pathname.startsWith('/api/tasks')) {
+        loadTasks();
+    } else if (pathname.startsWith('/api/projects')) {
+        loadProjects();
+    } else if (pathname.startsWith('/api/tags')) {
+        loadTags();
+    } else if (pathname.startsWith('/api/ideas')) {
+        loadIdeas(document.getElementById('ideaSearch')?.value || '');
+    } else if (pathname.startsWith('/api/reports/') && currentView === 'reports') {
+        const tab = document.querySelector('.report-tab.active');
+        if (tab && tab.dataset.report === 'monthly') {
+            loadMonthlyReport();
+        } else {
+            loadWeeklyReport();
+        }
+    }
+}
+
 function initTheme() {
     const savedTheme = localStorage.getItem('theme') || 'light';
     document.documentElement.setAttribute('data-theme', savedTheme);
@@ -159,6 +159,31 @@ const supabase = {
         return response.json();
     },
 
+    // Call a Postgres function; each call runs in a single transaction
+    async rpc(fn, params = {}) {
+        if (!this.accessToken) {
+            throw new Error('認証が必要です');
+        }
+
+        const response = await fetch(`${this.url}/rest/v1/rpc/${fn}`, {
+            method: 'POST',
+            headers: {
+                'apikey': this.key,
+                'Authorization': `Bearer ${this.accessToken}`,
+                'Content-Type': 'application/json'
+            },
+            body: JSON.stringify(params)
+        });
+
+        if (!response.ok) {
+            const error = await response.text();
+            console.error('Supabase error:', error);
+            throw new Error(`Supabase error: ${error}`);
+        }
+
+        return response.json();
+    },
+
     // ===================================
     // Projects
     // ===================================
@@ -277,41 +302,18 @@ const supabase = {
     },
 
     async createTask(data) {
-        const tagIds = data.tag_ids || [];
-        delete data.tag_ids;
-
-        const result = await this.request('tasks', 'POST', data);
-        const task = result[0];
-
-        for (const tagId of tagIds) {
-            await this.request('task_tags', 'POST', { task_id: task.id, tag_id: tagId });
-        }
-
-        return task;
+        const { tag_ids: tagIds = [], ...task } = data;
+        return this.rpc('create_task_with_tags', { p_task: task, p_tag_ids: tagIds });
     },
 
     async updateTask(id, data) {
-        const tagIds = data.tag_ids;
-        delete data.tag_ids;
-
-        if (data.status === 'done') {
-            const currentTask = await this.getTask(id);
-            if (currentTask && currentTask.status !== 'done') {
-                data.completed_at = new Date().toISOString();
-            }
-        }
-
-        const result = await this.request('tasks', 'PATCH', data, `?id=eq.${id}`);
-
-        if (tagIds !== undefined) {
-            await this.request('task_tags', 'DELETE', null, `?task_id=eq.${id}`);
-
-            for (const tagId of tagIds) {
-                await this.request('task_tags', 'POST', { task_id: id, tag_id: tagId });
-            }
-        }
+        // tag_ids is omitted (null) when the tags should be left unchanged
+        const { tag_ids: tagIds = null, ...changes } = data;
+        return this.rpc('update_task_with_tags', { p_task_id: id, p_changes: changes, p_tag_ids: tagIds });
+    },
 
-        return result[0];
+    async bulkUpdateTaskStatus(ids, status) {
+        return this.rpc('bulk_update_task_status', { p_task_ids: ids, p_status: status });
     },
 
     async deleteTask(id) {
@@ -351,18 +353,7 @@ const supabase = {
     },
 
     async convertIdeaToTask(id) {
-        const idea = await this.getIdea(id);
-        if (!idea) throw new Error('Idea not found');
-
-        const task = await this.createTask({
-            title: idea.title,
-            description: idea.content,
-            color: idea.color,
-            status: 'todo'
-        });
-
-        await this.deleteIdea(id);
-        return task;
+        return this.rpc('convert_idea_to_task', { p_idea_id: id });
     },
 
     // ===================================
@@ -6,9 +6,34 @@ const STATIC_ASSETS = [
     '/js/app.js',
     '/js/components.js',
     '/js/reports.js',
+    '/js/supabase.js',
+    '/icons/icon-192.png',
     '/manifest.json'
 ];
 
+// build_static.py でハッシュを付けたファイル名（内容が変わると名前も変わる）
+const FINGERPRINTED = /\.[0-9a-f]{10}\.[A-Za-z0-9]+$/;
+
+// stale-while-revalidate で返す一覧・レポートAPI
+const CACHEABLE_API = /^\/api\/(tasks|projects|tags|ideas|reports\/[a-z]+)$/;
+const MUTATION_METHODS = ['POST', 'PUT', 'PATCH', 'DELETE'];
+
+// 書き込み先のコレクションごとに、古くなる保存済みレスポンスの URL の接頭辞
+// （タスク数・プロジェクト名・タグ名が一覧やレポートにも含まれるため）
+const AFFECTED_APIS = {
+    tasks: ['/api/tasks', '/api/projects', '/api/reports/'],
+    projects: ['/api/projects', '/api/tasks', '/api/reports/'],
+    tags: ['/api/tags', '/api/tasks', '/api/reports/'],
+    ideas: ['/api/ideas']
+};
+
+// APIレスポンスと、オフライン中の書き込みを保存する IndexedDB
+const DB_NAME = 'devtodo-api';
+const DB_VERSION = 1;
+const RESPONSES_STORE = 'responses';
+const OUTBOX_STORE = 'outbox';
+const SYNC_TAG = 'devtodo-outbox';
+
 // インストール時にキャッシュ
 self.addEventListener('install', (event) => {
     event.waitUntil(
@@ -18,7 +43,7 @@ self.addEventListener('install', (event) => {
     );
 });
 
-// アクティベート時に古いキャッシュを削除
+// アクティベート時に古いキャッシュを削除し、残っている書き込みを送る
 self.addEventListener('activate', (event) => {
     event.waitUntil(
         caches.keys().then((cacheNames) => {
@@ -28,39 +53,296 @@ self.addEventListener('activate', (event) => {
                     .map((name) => caches.delete(name))
             );
         }).then(() => self.clients.claim())
+            .then(() => replayOutbox())
     );
 });
 
-// フェッチ時の処理（ネットワーク優先、オフライン時はキャッシュ）
 self.addEventListener('fetch', (event) => {
-    // APIリクエストはキャッシュしない
-    if (event.request.url.includes('/api/')) {
+    const url = new URL(event.request.url);
+    if (url.origin !== self.location.origin) {
+        return;
+    }
+
+    if (url.pathname.startsWith('/api/')) {
+        if (event.request.method === 'GET' && CACHEABLE_API.test(url.pathname)) {
+            event.respondWith(staleWhileRevalidate(event));
+        } else if (MUTATION_METHODS.includes(event.request.method)) {
+            event.respondWith(sendMutation(event.request));
+        } else {
+            event.respondWith(fetch(event.request).catch(() => offlineResponse()));
+        }
+        return;
+    }
+
+    // ハッシュ付きのアセットは内容が変わらないのでキャッシュ優先
+    if (FINGERPRINTED.test(url.pathname)) {
         event.respondWith(
-            fetch(event.request)
-                .catch(() => {
-                    return new Response(
-                        JSON.stringify({ error: 'オフラインです' }),
-                        { headers: { 'Content-Type': 'application/json' } }
-                    );
-                })
+            caches.match(event.request).then((cached) => cached || fetch(event.request))
         );
         return;
     }
 
-    // 静的アセットはネットワーク優先、失敗時はキャッシュ
+    // その他の静的アセットはキャッシュを即座に返し、裏で更新する
     event.respondWith(
-        fetch(event.request)
-            .then((response) => {
-                // レスポンスをキャッシュにも保存
-                if (response.status === 200) {
-                    const responseClone = response.clone();
-                    caches.open(CACHE_NAME)
-                        .then((cache) => cache.put(event.request, responseClone));
-                }
-                return response;
-            })
-            .catch(() => {
-                return caches.match(event.request);
-            })
+        caches.match(event.request).then((cached) => {
+            const network = fetch(event.request)
+                .then((response) => {
+                    if (response.status === 200) {
+                        const responseClone = response.clone();
+                        caches.open(CACHE_NAME)
+                            .then((cache) => cache.put(event.request, responseClone));
+                    }
+                    return response;
+                });
+            if (cached) {
+                event.waitUntil(network.catch(() => {}));
+                return cached;
+            }
+            return network;
+        })
     );
 });
+
+// Background Sync 対応ブラウザでは、接続が戻ったときに呼ばれる
+self.addEventListener('sync', (event) => {
+    if (event.tag === SYNC_TAG) {
+        event.waitUntil(replayOutbox());
+    }
+});
+
+// 非対応ブラウザでは、ページが online イベントで送信を依頼する
+self.addEventListener('message', (event) => {
+    if (event.data && event.data.type === 'replay-outbox') {
+        event.waitUntil(replayOutbox());
+    }
+});
+
+// ===================================
+// APIの stale-while-revalidate
+// ===================================
+
+async function staleWhileRevalidate(event) {
+    const request = event.request;
+    const cached = await idbRequest(RESPONSES_STORE, 'readonly', (store) => store.get(request.url))
+        .catch(() => undefined);
+    const revalidation = revalidate(request, cached);
+
+    if (cached) {
+        // 保存済みのレスポンスをすぐに返し、ETag による再検証は裏で行う
+        event.waitUntil(revalidation.catch(() => {}));
+        return responseFromEntry(cached);
+    }
+    return revalidation.catch(() => offlineResponse());
+}
+
+async function revalidate(request, cached) {
+    const headers = new Headers(request.headers);
+    if (cached && cached.etag) {
+        headers.set('If-None-Match', cached.etag);
+    }
+    const response = await fetch(request.url, {
+        headers,
+        credentials: request.credentials,
+        cache: 'no-cache'
+    });
+
+    if (response.status === 304 && cached) {
+        return responseFromEntry(cached);
+    }
+    if (response.status === 200) {
+        const etag = response.headers.get('ETag');
+        const body = await response.clone().text();
+        await idbRequest(RESPONSES_STORE, 'readwrite', (store) => store.put({
+            url: request.url,
+            body,
+            etag,
+            contentType: response.headers.get('Content-Type'),
+            storedAt: Date.now()
+        })).catch(() => {});
+        if (cached && cached.etag !== etag) {
+            // 画面側は再描画する（保存済みの内容を表示したままになるため）
+            notifyClients({ type: 'api-updated', url: request.url });
+        }
+    }
+    return response;
+}
+
+function responseFromEntry(entry) {
+    return new Response(entry.body, {
+        status: 200,
+        headers: {
+            'Content-Type': entry.contentType || 'application/json',
+            'ETag': entry.etag || '',
+            'X-Cache-Stored-At': String(entry.storedAt)
+        }
+    });
+}
+
+function offlineResponse() {
+    return new Response(
+        JSON.stringify({ error: 'オフラインです' }),
+        { status: 503, headers: { 'Content-Type': 'application/json' } }
+    );
+}
+
+async function notifyClients(message) {
+    const clients = await self.clients.matchAll({ type: 'window' });
+    clients.forEach((client) => client.postMessage(message));
+}
+
+// ===================================
+// オフライン中の書き込み（送信待ちキュー）
+// ===================================
+
+async function sendMutation(request) {
+    // fetch に渡すと本文を読めなくなるので先に取り出しておく
+    const body = await request.clone().text();
+    const entry = {
+        method: request.method,
+        url: request.url,
+        headers: { 'Content-Type': request.headers.get('Content-Type') || 'application/json' },
+        body: body || null,
+        queuedAt: Date.now()
+    };
+
+    // 先に溜まっている書き込みを送り終えてから送る（順序を保つ）
+    if (await replayOutbox()) {
+        try {
+            const response = await fetch(request);
+            await invalidateResponses(request.url);
+            return response;
+        } catch (error) {
+            // オフラインなのでキューに入れる
+        }
+    }
+
+    await idbRequest(OUTBOX_STORE, 'readwrite', (store) => store.add(entry));
+    if (self.registration.sync) {
+        await self.registration.sync.register(SYNC_TAG).catch(() => {});
+    }
+    return new Response(
+        JSON.stringify({ queued: true, message: 'オフラインのため、接続が戻ったときに送信します' }),
+        { status: 202, headers: { 'Content-Type': 'application/json' } }
+    );
+}
+
+let replaying = null;
+
+// キューの書き込みを古い順に送信し、すべて送れたら true を返す
+function replayOutbox() {
+    if (!replaying) {
+        replaying = drainOutbox().finally(() => {
+            replaying = null;
+        });
+    }
+    return replaying;
+}
+
+async function drainOutbox() {
+    let sent = 0;
+    const changed = new Set();
+    for (;;) {
+        const next = await idbRequest(OUTBOX_STORE, 'readonly', (store) => store.openCursor())
+            .then((cursor) => cursor && { key: cursor.key, entry: cursor.value });
+        if (!next) {
+            break;
+        }
+        let response;
+        try {
+            response = await fetch(next.entry.url, {
+                method: next.entry.method,
+                headers: next.entry.headers,
+                body: next.entry.body
+            });
+        } catch (error) {
+            // まだオフライン（残りは次の機会に送る）
+            return false;
+        }
+        if (response.status >= 500) {
+            // サーバー側の一時的なエラー（順序を保つため、残りも次の機会に送る）
+            return false;
+        }
+        if (!response.ok) {
+            // 拒否された書き込み（4xx）は再送しても結果が変わらないので、画面に知らせてから取り除く
+            const body = await response.json().catch(() => ({}));
+            notifyClients({
+                type: 'outbox-rejected',
+                method: next.entry.method,
+                url: next.entry.url,
+                status: response.status,
+                error: body.error || response.statusText
+            });
+        } else {
+            sent++;
+        }
+        await idbRequest(OUTBOX_STORE, 'readwrite', (store) => store.delete(next.key));
+        changed.add(next.entry.url);
+    }
+    for (const url of changed) {
+        await invalidateResponses(url);
+    }
+    if (sent > 0) {
+        notifyClients({ type: 'outbox-replayed', count: sent });
+    }
+    return true;
+}
+
+// 書き込みで古くなる保存済みのレスポンスだけを捨てる（/api/tasks/5 → タスク一覧・レポートなど）
+async function invalidateResponses(url) {
+    const collection = new URL(url).pathname.split('/')[2];
+    const prefixes = (AFFECTED_APIS[collection] || ['/api/'])
+        .map((path) => new URL(path, self.location.origin).href);
+    try {
+        const keys = await idbRequest(RESPONSES_STORE, 'readonly', (store) => store.getAllKeys());
+        const stale = keys.filter((key) => prefixes.some((prefix) => key.startsWith(prefix)));
+        if (stale.length > 0) {
+            await idbRequest(RESPONSES_STORE, 'readwrite', (store) => {
+                stale.forEach((key) => store.delete(key));
+                return store.count();
+            });
+        }
+    } catch (error) {
+        // 保存済みのレスポンスは次の再検証で更新される
+    }
+}
+
+// ===================================
+// IndexedDB
+// ===================================
+
+let dbPromise = null;
+
+function openDB() {
+    if (!dbPromise) {
+        dbPromise = new Promise((resolve, reject) => {
+            const request = indexedDB.open(DB_NAME, DB_VERSION);
+            request.onupgradeneeded = () => {
+                const db = request.result;
+                db.createObjectStore(RESPONSES_STORE, { keyPath: 'url' });
+                db.createObjectStore(OUTBOX_STORE, { autoIncrement: true });
+            };
+            request.onsuccess = () => resolve(request.result);
+            request.onerror = () => {
+                dbPromise = null;
+                reject(request.error);
+            };
+        });
+    }
+    return dbPromise;
+}
+
+// ストアに1回の操作を行い、その結果を返す
+async function idbRequest(storeName, mode, operation) {
+    const db = await openDB();
+    return new Promise((resolve, reject) => {
+        const transaction = db.transaction(storeName, mode);
+        const request = operation(transaction.objectStore(storeName));
+        let result;
+        request.onsuccess = () => {
+            result = request.result;
+        };
+        transaction.oncomplete = () => resolve(result);
+        transaction.onerror = () => reject(transaction.error);
+        transaction.onabort = () => reject(transaction.error);
+    });
+}
@@ -3,8 +3,13 @@ DevTodo - Streamlit Application
 個人開発者のためのタスク管理アプリ
 """
 
+import time
+from functools import wraps
+from types import SimpleNamespace
 import streamlit as st
 from supabase import create_client, Client
+from repository import stub
+from repository.supabase import SupabaseRepository
 from datetime import datetime, timedelta
 import plotly.express as px
 import plotly.graph_objects as go
@@ -282,11 +287,34 @@ if 'supabase' not in st.session_state:
     st.session_state.supabase = None
 if 'access_token' not in st.session_state:
     st.session_state.access_token = None
+if 'data_cache' not in st.session_state:
+    st.session_state.data_cache = {}
+if 'task_overrides' not in st.session_state:
+    st.session_state.task_overrides = {}
+if 'task_page' not in st.session_state:
+    st.session_state.task_page = 0
 
 # ===================================
 # Supabase Client
 # ===================================
+def authorize_request(request):
+    """共有クライアントのリクエストに、実行中のセッションのユーザートークンを付ける"""
+    # httpx のイベントフックはクエリを実行したセッションのスクリプトスレッドで呼ばれる
+    token = st.session_state.get('access_token') or SUPABASE_KEY
+    request.headers['Authorization'] = f"Bearer {token}"
+
+@st.cache_resource
 def get_supabase() -> Client:
+    """データ取得用のクライアント（プロセス全体で共有し、HTTP接続プールを再利用）
+    
+    ログイン状態は持たず、認証ヘッダーはリクエストごとに authorize_request で付ける。
+    """
+    client = create_client(SUPABASE_URL, SUPABASE_KEY)
+    client.postgrest.session.event_hooks['request'].append(authorize_request)
+    return client
+
+def get_auth_client() -> Client:
+    """ログイン・サインアップ用のクライアント（認証状態を持つためセッションごと）"""
     if st.session_state.supabase is None:
         st.session_state.supabase = create_client(SUPABASE_URL, SUPABASE_KEY)
     return st.session_state.supabase
@@ -295,8 +323,13 @@ def get_supabase() -> Client:
 # Authentication Functions
 # ===================================
 def login(email: str, password: str) -> bool:
+    if stub.is_enabled():
+        # スタブでは認証せずにログイン済みとして扱う
+        st.session_state.user = SimpleNamespace(id=None, email=email)
+        st.session_state.authenticated = True
+        return True
     try:
-        supabase = get_supabase()
+        supabase = get_auth_client()
         response = supabase.auth.sign_in_with_password({
             "email": email,
             "password": password
@@ -311,7 +344,7 @@ def login(email: str, password: str) -> bool:
 
 def signup(email: str, password: str) -> bool:
     try:
-        supabase = get_supabase()
+        supabase = get_auth_client()
         response = supabase.auth.sign_up({
             "email": email,
             "password": password
@@ -326,13 +359,107 @@ def signup(email: str, password: str) -> bool:
 
 def logout():
     try:
-        supabase = get_supabase()
+        supabase = get_auth_client()
         supabase.auth.sign_out()
     except:
         pass
     st.session_state.authenticated = False
     st.session_state.user = None
     st.session_state.access_token = None
+    st.session_state.data_cache = {}
+
+# ===================================
+# Data Cache
+# ===================================
+# 取得結果をセッション内に保持し、UIだけの再実行ではSupabaseに問い合わせない。
+# 書き込みは返ってきた行をキャッシュ済みの結果に直接反映し、読み直さない。
+CACHE_TTL_SECONDS = 60
+RECONCILE_INTERVAL_SECONDS = 30
+
+def cached(*tables, ttl=CACHE_TTL_SECONDS, patch=None):
+    """取得関数の結果をユーザーIDと引数ごとにキャッシュ
+    
+    tables は依存テーブル。patch はそのテーブルへの変更をキャッシュ済みの結果に
+    反映する関数で、反映できない場合は None を返す（エントリは破棄される）。
+    """
+    def decorator(func):
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            key = (func.__name__, get_user_id(), args, tuple(sorted(kwargs.items())))
+            entry = st.session_state.data_cache.get(key)
+            now = time.monotonic()
+            if entry and now - entry['fetched_at'] < ttl:
+                entry['used_at'] = now
+                return entry['data']
+            data = func(*args, **kwargs)
+            st.session_state.data_cache[key] = {
+                'fetched_at': now,
+                'used_at': now,
+                'tables': tables,
+                'data': data,
+                'fetch': func,
+                'patch': patch,
+                'args': args,
+                'kwargs': kwargs
+            }
+            return data
+        return wrapper
+    return decorator
+
+def invalidate_cache(*tables):
+    """指定テーブルに依存するキャッシュを破棄"""
+    cache = st.session_state.data_cache
+    for key in [k for k, entry in cache.items() if set(entry['tables']) & set(tables)]:
+        del cache[key]
+
+def apply_change(table: str, op: str, row: dict):
+    """書き込み結果（op は insert / update / delete）をキャッシュ済みの結果に反映"""
+    cache = st.session_state.data_cache
+    for key, entry in list(cache.items()):
+        if table not in entry['tables']:
+            continue
+        data = None
+        if entry['patch']:
+            data = entry['patch'](entry['data'], table, op, row, *entry['args'], **entry['kwargs'])
+        if data is None:
+            del cache[key]
+        else:
+            entry['data'] = data
+
+def forget_missing_row(table: str, row_id: int, message: str):
+    """書き込み対象が他のセッションで削除済みだった場合に、キャッシュから外してエラーを表示
+    
+    呼び出し元は直後に再実行するので、st.error ではなく再実行後も残る st.toast で知らせる。
+    """
+    apply_change(table, 'delete', {'id': row_id})
+    st.toast(message, icon="⚠️")
+
+def merge_rows(rows, op: str, row: dict, sort_key, reverse=False, matches=lambda r: True):
+    """行のリストに1行の変更を反映し、並び順を保つ"""
+    rows = [r for r in rows if r['id'] != row['id']]
+    if op != 'delete' and matches(row):
+        rows = sorted(rows + [row], key=sort_key, reverse=reverse)
+    return rows
+
+@st.fragment(run_every=RECONCILE_INTERVAL_SECONDS)
+def reconcile_cache():
+    """ローカルに反映した変更とサーバーとのずれを、定期的な取り直しで解消
+    
+    最近使われたエントリだけを取り直し、使われていないものは破棄する。
+    フラグメントとして実行するため、ページ全体は再描画しない。
+    """
+    cache = st.session_state.data_cache
+    now = time.monotonic()
+    for key, entry in list(cache.items()):
+        if now - entry['used_at'] >= CACHE_TTL_SECONDS:
+            del cache[key]
+        elif now - entry['fetched_at'] >= RECONCILE_INTERVAL_SECONDS:
+            try:
+                entry['data'] = entry['fetch'](*entry['args'], **entry['kwargs'])
+                entry['fetched_at'] = time.monotonic()
+            except Exception:
+                # 次に読まれたときに取り直す（エラーはそこで表示される）
+                del cache[key]
 
 # ===================================
 # Database Functions
@@ -342,143 +469,219 @@ def get_user_id():
         return st.session_state.user.id
     return None
 
+def get_repository():
+    """データアクセス用のリポジトリ（Flask API と同じインターフェース）
+    
+    DEVTODO_BACKEND=stub のときは Supabase の代わりにローカルのスタブを使う。
+    """
+    if stub.is_enabled():
+        if 'stub_repository' not in st.session_state:
+            st.session_state.stub_repository = stub.create_stub_repository()
+        return st.session_state.stub_repository
+    return SupabaseRepository(get_supabase(), get_user_id())
+
 # Projects
+def patch_projects(projects, table, op, row):
+    return merge_rows(projects, op, row, sort_key=lambda p: p['created_at'] or '', reverse=True)
+
+@cached('projects', patch=patch_projects)
 def get_projects():
-    supabase = get_supabase()
-    response = supabase.table('projects').select('*').order('created_at', desc=True).execute()
-    return response.data
+    return get_repository().projects.list()
 
 def create_project(name: str, description: str, color: str):
-    supabase = get_supabase()
-    supabase.table('projects').insert({
+    project = get_repository().projects.create({
         'name': name,
         'description': description,
-        'color': color,
-        'user_id': get_user_id()
-    }).execute()
+        'color': color
+    })
+    apply_change('projects', 'insert', project)
+    return project
 
 def delete_project(project_id: int):
-    supabase = get_supabase()
-    supabase.table('projects').delete().eq('id', project_id).execute()
+    get_repository().projects.delete(project_id)
+    apply_change('projects', 'delete', {'id': project_id})
 
 def update_project(project_id: int, name: str, description: str, color: str):
-    supabase = get_supabase()
-    supabase.table('projects').update({
+    project = get_repository().projects.update(project_id, {
         'name': name,
         'description': description,
         'color': color
-    }).eq('id', project_id).execute()
+    })
+    apply_change('projects', 'update', project)
+    return project
 
 # Tags
+def patch_tags(tags, table, op, row):
+    return merge_rows(tags, op, row, sort_key=lambda t: (-t.get('usage_count', 0), t['name']))
+
+@cached('tags', patch=patch_tags)
 def get_tags():
-    supabase = get_supabase()
-    response = supabase.table('tags').select('*').order('name').execute()
-    return response.data
+    return get_repository().tags.list()
 
 def create_tag(name: str, color: str):
-    supabase = get_supabase()
-    supabase.table('tags').insert({
-        'name': name,
-        'color': color,
-        'user_id': get_user_id()
-    }).execute()
+    tag = get_repository().tags.create({'name': name, 'color': color})
+    apply_change('tags', 'insert', tag)
+    return tag
 
 def delete_tag(tag_id: int):
-    supabase = get_supabase()
-    supabase.table('tags').delete().eq('id', tag_id).execute()
+    get_repository().tags.delete(tag_id)
+    apply_change('tags', 'delete', {'id': tag_id})
 
 # Tasks
-def get_tasks(status_filter=None, project_filter=None):
-    supabase = get_supabase()
-    query = supabase.table('tasks').select('*, projects(name, color)')
-    
-    if status_filter:
-        query = query.eq('status', status_filter)
-    if project_filter:
-        query = query.eq('project_id', project_filter)
+def task_matches(task, status_filter=None, project_filter=None):
+    return (
+        (not status_filter or task['status'] == status_filter)
+        and (not project_filter or task.get('project_id') == project_filter)
+    )
+
+def task_sort_key(task):
+    return (task['priority'] or 0, task['created_at'] or '', task['id'])
+
+def patch_project_embeds(tasks, op, project, project_filter=None):
+    """プロジェクトの変更をタスクの project_name に反映"""
+    if op == 'update':
+        return [
+            {**t, 'project_name': project['name']} if t.get('project_id') == project['id'] else t
+            for t in tasks
+        ]
+    if op == 'delete':
+        # ON DELETE SET NULL と同じく紐付けを外す
+        tasks = [
+            {**t, 'project_id': None, 'project_name': None} if t.get('project_id') == project['id'] else t
+            for t in tasks
+        ]
+        return [t for t in tasks if not project_filter or t.get('project_id') == project_filter]
+    return tasks
+
+def patch_tasks(tasks, table, op, row, status_filter=None, project_filter=None):
+    if table == 'projects':
+        return patch_project_embeds(tasks, op, row, project_filter)
+    return merge_rows(
+        tasks, op, row, sort_key=task_sort_key, reverse=True,
+        matches=lambda t: task_matches(t, status_filter, project_filter)
+    )
+
+def patch_task_page(data, table, op, row, status_filter=None, project_filter=None, page: int = 0, per_page: int = 20):
+    tasks, total = data
+    if table == 'projects':
+        if op == 'delete' and project_filter == row['id']:
+            return None
+        return patch_project_embeds(tasks, op, row, project_filter), total
     
-    response = query.order('created_at', desc=True).execute()
-    return response.data
+    present = any(t['id'] == row['id'] for t in tasks)
+    matches = op != 'delete' and task_matches(row, status_filter, project_filter)
+    if present:
+        tasks = merge_rows(tasks, op, row, sort_key=task_sort_key, reverse=True, matches=lambda t: matches)
+        return tasks, total if matches else total - 1
+    if op == 'insert' and matches and page == 0:
+        return [row] + tasks[:per_page - 1], total + 1
+    if not matches and op != 'delete':
+        return tasks, total
+    # 他のページの行の削除や、新たに条件に一致した行は位置が分からないので取り直す
+    return None
+
+@cached('tasks', 'projects', patch=patch_tasks)
+def get_tasks(status_filter=None, project_filter=None):
+    return get_repository().tasks.list(status=status_filter, project_id=project_filter)
+
+@cached('tasks', 'projects', patch=patch_task_page)
+def get_task_page(status_filter=None, project_filter=None, page: int = 0, per_page: int = 20):
+    """1ページ分のタスクと、絞り込み条件に一致する総件数を1回の問い合わせで取得"""
+    return get_repository().tasks.page(
+        status=status_filter, project_id=project_filter, page=page, per_page=per_page
+    )
 
 def create_task(title: str, description: str, project_id: int, due_date, color: str, status: str):
-    supabase = get_supabase()
-    data = {
+    task = get_repository().tasks.create({
         'title': title,
         'description': description,
         'color': color,
         'status': status,
-        'user_id': get_user_id()
-    }
-    if project_id:
-        data['project_id'] = project_id
-    if due_date:
-        data['due_date'] = str(due_date)
-    
-    supabase.table('tasks').insert(data).execute()
+        'project_id': project_id or None,
+        'due_date': str(due_date) if due_date else None
+    })
+    apply_change('tasks', 'insert', task)
+    return task
+
+TASK_NOT_FOUND_MESSAGE = "タスクが見つかりません（他のセッションで削除された可能性があります）"
 
 def update_task_status(task_id: int, status: str):
-    supabase = get_supabase()
-    data = {'status': status}
-    if status == 'done':
-        data['completed_at'] = datetime.now().isoformat()
-    supabase.table('tasks').update(data).eq('id', task_id).execute()
+    # completed_at は done に変わったときだけリポジトリ側で設定される
+    task = get_repository().tasks.update(task_id, {'status': status})
+    if task is None:
+        forget_missing_row('tasks', task_id, TASK_NOT_FOUND_MESSAGE)
+        return None
+    apply_change('tasks', 'update', task)
+    return task
 
 def delete_task(task_id: int):
-    supabase = get_supabase()
-    supabase.table('tasks').delete().eq('id', task_id).execute()
+    get_repository().tasks.delete(task_id)
+    apply_change('tasks', 'delete', {'id': task_id})
 
 def update_task(task_id: int, title: str, description: str, project_id, due_date, color: str, status: str):
-    supabase = get_supabase()
-    data = {
+    task = get_repository().tasks.update(task_id, {
         'title': title,
         'description': description,
         'color': color,
         'status': status,
-        'project_id': project_id
-    }
-    if due_date:
-        data['due_date'] = str(due_date)
-    else:
-        data['due_date'] = None
-    if status == 'done':
-        data['completed_at'] = datetime.now().isoformat()
-    supabase.table('tasks').update(data).eq('id', task_id).execute()
+        'project_id': project_id,
+        'due_date': str(due_date) if due_date else None
+    })
+    if task is None:
+        forget_missing_row('tasks', task_id, TASK_NOT_FOUND_MESSAGE)
+        return None
+    apply_change('tasks', 'update', task)
+    return task
 
 # Ideas
+def patch_ideas(ideas, table, op, row, search: str = ""):
+    def matches(idea):
+        text = f"{idea['title']}\n{idea.get('content') or ''}".lower()
+        return not search or search.lower() in text
+    return merge_rows(
+        ideas, op, row, sort_key=lambda i: (bool(i['is_pinned']), i['updated_at'] or '', i['id']),
+        reverse=True, matches=matches
+    )
+
+@cached('ideas', patch=patch_ideas)
 def get_ideas(search: str = ""):
-    supabase = get_supabase()
-    query = supabase.table('ideas').select('*')
-    if search:
-        query = query.or_(f"title.ilike.%{search}%,content.ilike.%{search}%")
-    response = query.order('updated_at', desc=True).execute()
-    return response.data
+    return get_repository().ideas.list(search=search or None)
 
 def create_idea(title: str, content: str, color: str):
-    supabase = get_supabase()
-    supabase.table('ideas').insert({
-        'title': title,
-        'content': content,
-        'color': color,
-        'user_id': get_user_id()
-    }).execute()
+    idea = get_repository().ideas.create({'title': title, 'content': content, 'color': color})
+    apply_change('ideas', 'insert', idea)
+    return idea
 
 def delete_idea(idea_id: int):
-    supabase = get_supabase()
-    supabase.table('ideas').delete().eq('id', idea_id).execute()
+    get_repository().ideas.delete(idea_id)
+    apply_change('ideas', 'delete', {'id': idea_id})
 
 def convert_idea_to_task(idea_id: int):
-    supabase = get_supabase()
-    idea = supabase.table('ideas').select('*').eq('id', idea_id).single().execute()
-    if idea.data:
-        create_task(
-            title=idea.data['title'],
-            description=idea.data['content'],
-            project_id=None,
-            due_date=None,
-            color=idea.data['color'] or '#6750A4',
-            status='todo'
-        )
-        delete_idea(idea_id)
+    # 取得・作成・削除はリポジトリ側で1つのトランザクションにまとめる
+    task = get_repository().ideas.convert_to_task(idea_id)
+    if task is None:
+        forget_missing_row('ideas', idea_id, "アイデアが見つかりません（他のセッションで削除された可能性があります）")
+        return None
+    apply_change('tasks', 'insert', task)
+    apply_change('ideas', 'delete', {'id': idea_id})
+    return task
+
+# Reports
+@cached('tasks')
+def count_tasks(status: str = None) -> int:
+    return get_repository().reports.count_tasks(status)
+
+@cached('tasks')
+def get_status_counts():
+    return get_repository().reports.status_counts()
+
+@cached('tasks')
+def get_completion_rate() -> float:
+    return float(get_repository().reports.completion_rate())
+
+@cached('tasks')
+def get_recent_completed_tasks(limit: int = 5):
+    return get_repository().reports.recent_completed(limit)
 
 # ===================================
 # Color Palette
@@ -501,6 +704,8 @@ STATUS_OPTIONS = {
     'archived': 'アーカイブ'
 }
 
+TASKS_PER_PAGE = 20
+
 # ===================================
 # UI Components
 # ===================================
@@ -535,7 +740,35 @@ def show_login_page():
                 elif email and password:
                     signup(email, password)
 
+def matches_task_filters(task):
+    """タスクが一覧の絞り込み条件（ステータス・プロジェクト）に一致するか（None は削除済み）"""
+    if task is None:
+        return False
+    status_filter, project_filter = st.session_state.get('task_page_filters', (None, None))
+    return ((status_filter is None or task['status'] == status_filter)
+            and (project_filter is None or task.get('project_id') == project_filter))
+
+def rerun_task_card(before, after):
+    """カード内で before を after に変更した後に再実行する
+    
+    通常はカードのフラグメントだけを再実行するが、一覧に含まれるかどうかが変わる変更
+    （削除や、絞り込み中のステータス・プロジェクトの変更）はページの総件数とページ分けが
+    変わるので、ページ全体を再実行する。
+    """
+    if matches_task_filters(before) != matches_task_filters(after):
+        st.rerun()
+    st.rerun(scope="fragment")
+
+@st.fragment
 def show_task_card(task, projects):
+    # カード内の操作は原則このフラグメントだけを再実行する（rerun_task_card を参照）。その際の
+    # 引数は最初の描画時のままなので、カード内で更新・削除した結果で置き換える（None は削除済み）
+    overrides = st.session_state.task_overrides
+    if task['id'] in overrides:
+        task = overrides[task['id']]
+        if task is None:
+            return
+    
     status_class = f"status-{task['status']}"
     color = task.get('color', '#6750A4')
     
@@ -546,18 +779,18 @@ def show_task_card(task, projects):
             done = task['status'] == 'done'
             if st.checkbox("", value=done, key=f"task_check_{task['id']}", label_visibility="collapsed"):
                 if not done:
-                    update_task_status(task['id'], 'done')
-                    st.rerun()
+                    overrides[task['id']] = update_task_status(task['id'], 'done')
+                    rerun_task_card(task, overrides[task['id']])
             else:
                 if done:
-                    update_task_status(task['id'], 'todo')
-                    st.rerun()
+                    overrides[task['id']] = update_task_status(task['id'], 'todo')
+                    rerun_task_card(task, overrides[task['id']])
         
         with col2:
             title_style = "text-decoration: line-through; opacity: 0.6;" if done else ""
             project_name = ""
-            if task.get('projects') and task['projects'].get('name'):
-                project_name = f"📁 {task['projects']['name']}"
+            if task.get('project_name'):
+                project_name = f"📁 {task['project_name']}"
             st.markdown(f"""
                 <div style="border-left: 4px solid {color}; padding-left: 12px;">
                     <strong style="{title_style}">{task['title']}</strong>
@@ -569,12 +802,13 @@ def show_task_card(task, projects):
         with col3:
             if st.button("✏️", key=f"edit_task_{task['id']}"):
                 st.session_state[f"editing_task_{task['id']}"] = True
-                st.rerun()
+                st.rerun(scope="fragment")
         
         with col4:
             if st.button("🗑️", key=f"del_task_{task['id']}"):
                 delete_task(task['id'])
-                st.rerun()
+                overrides[task['id']] = None
+                rerun_task_card(task, None)
     
     # 編集ダイアログ
     if st.session_state.get(f"editing_task_{task['id']}", False):
@@ -617,14 +851,15 @@ def show_task_card(task, projects):
                 with col1:
                     if st.form_submit_button("💾 保存", use_container_width=True):
                         if edit_title:
-                            update_task(task['id'], edit_title, edit_description, edit_project_id, edit_due_date, COLORS[edit_color], edit_status)
+                            overrides[task['id']] = update_task(task['id'], edit_title, edit_description, edit_project_id, edit_due_date, COLORS[edit_color], edit_status)
                             st.session_state[f"editing_task_{task['id']}"] = False
-                            st.success("タスクを更新しました！")
-                            st.rerun()
+                            if overrides[task['id']]:
+                                st.success("タスクを更新しました！")
+                            rerun_task_card(task, overrides[task['id']])
                 with col2:
                     if st.form_submit_button("❌ キャンセル", use_container_width=True):
                         st.session_state[f"editing_task_{task['id']}"] = False
-                        st.rerun()
+                        st.rerun(scope="fragment")
 
 def show_tasks_page():
     st.markdown("## 📋 タスク")
@@ -676,17 +911,51 @@ def show_tasks_page():
     if status_filter != "すべて":
         status_key = next((k for k, v in STATUS_OPTIONS.items() if v == status_filter), None)
     
-    tasks = get_tasks(
+    project_filter = project_options.get(selected_project)
+    
+    # 絞り込み条件が変わったら1ページ目に戻す
+    filters = (status_key, project_filter)
+    if st.session_state.get('task_page_filters') != filters:
+        st.session_state.task_page_filters = filters
+        st.session_state.task_page = 0
+    
+    tasks, total = get_task_page(
         status_filter=status_key,
-        project_filter=project_options.get(selected_project)
+        project_filter=project_filter,
+        page=st.session_state.task_page,
+        per_page=TASKS_PER_PAGE
     )
     
+    # ページ全体を描画し直すので、カード単位の上書きは不要になる
+    st.session_state.task_overrides = {}
+    
     if tasks:
         for task in tasks:
             show_task_card(task, projects)
+        show_task_pagination(total)
+    elif total:
+        # 削除などで現在のページが空になった場合は前のページへ
+        st.session_state.task_page = max(0, (total - 1) // TASKS_PER_PAGE)
+        st.rerun()
     else:
         st.info("タスクがありません。「タスクを追加」から始めましょう！")
 
+def show_task_pagination(total: int):
+    page_count = max(1, -(-total // TASKS_PER_PAGE))
+    page = st.session_state.task_page
+    
+    col1, col2, col3 = st.columns([1, 2, 1])
+    with col1:
+        if st.button("◀ 前へ", disabled=page == 0, use_container_width=True):
+            st.session_state.task_page = page - 1
+            st.rerun()
+    with col2:
+        st.markdown(f"<div style='text-align: center;'>{page + 1} / {page_count} ページ（全 {total} 件）</div>", unsafe_allow_html=True)
+    with col3:
+        if st.button("次へ ▶", disabled=page >= page_count - 1, use_container_width=True):
+            st.session_state.task_page = page + 1
+            st.rerun()
+
 def show_projects_page():
     st.markdown("## 📁 プロジェクト")
     
@@ -820,8 +1089,8 @@ def show_ideas_page():
                     col1, col2 = st.columns(2)
                     with col1:
                         if st.button("📋 タスク化", key=f"convert_{idea['id']}"):
-                            convert_idea_to_task(idea['id'])
-                            st.success("タスクに変換しました！")
+                            if convert_idea_to_task(idea['id']):
+                                st.success("タスクに変換しました！")
                             st.rerun()
                     with col2:
                         if st.button("🗑️ 削除", key=f"del_idea_{idea['id']}"):
@@ -833,29 +1102,30 @@ def show_ideas_page():
 def show_reports_page():
     st.markdown("## 📊 レポート")
     
-    tasks = get_tasks()
+    # 集計はSupabase側で行い、タスク行は取得しない
+    total = count_tasks()
     
-    if not tasks:
+    if not total:
         st.info("タスクがないためレポートを表示できません")
         return
     
     # Summary
-    total = len(tasks)
-    done = len([t for t in tasks if t['status'] == 'done'])
-    in_progress = len([t for t in tasks if t['status'] == 'in_progress'])
+    counts = get_status_counts()
+    done = counts.get('done', 0)
+    in_progress = counts.get('in_progress', 0)
     
     col1, col2, col3, col4 = st.columns(4)
     col1.metric("総タスク", total)
     col2.metric("完了", done)
     col3.metric("進行中", in_progress)
-    col4.metric("完了率", f"{(done/total*100):.0f}%" if total > 0 else "0%")
+    col4.metric("完了率", f"{get_completion_rate():.0f}%")
     
     # Status Chart
     st.markdown("### ステータス分布")
-    status_counts = {}
-    for task in tasks:
-        status = STATUS_OPTIONS.get(task['status'], task['status'])
-        status_counts[status] = status_counts.get(status, 0) + 1
+    status_counts = {
+        STATUS_OPTIONS.get(status, status): count
+        for status, count in counts.items()
+    }
     
     fig = px.pie(
         values=list(status_counts.values()),
@@ -867,7 +1137,7 @@ def show_reports_page():
     
     # Recent Completed
     st.markdown("### 最近完了したタスク")
-    completed = [t for t in tasks if t['status'] == 'done'][:5]
+    completed = get_recent_completed_tasks(5)
     if completed:
         for task in completed:
             st.markdown(f"✅ {task['title']}")
@@ -889,6 +1159,8 @@ def main():
             logout()
             st.rerun()
         
+        reconcile_cache()
+        
         st.divider()
         
         page = st.radio(
@@ -18,68 +18,210 @@ DROP POLICY IF EXISTS "Allow anonymous access to ideas" ON ideas;
 
 -- Projects policies
 CREATE POLICY "Users can view their own projects" ON projects
-    FOR SELECT USING (auth.uid() = user_id);
+    FOR SELECT USING ((select auth.uid()) = user_id);
 
 CREATE POLICY "Users can insert their own projects" ON projects
-    FOR INSERT WITH CHECK (auth.uid() = user_id);
+    FOR INSERT WITH CHECK ((select auth.uid()) = user_id);
 
 CREATE POLICY "Users can update their own projects" ON projects
-    FOR UPDATE USING (auth.uid() = user_id);
+    FOR UPDATE USING ((select auth.uid()) = user_id);
 
 CREATE POLICY "Users can delete their own projects" ON projects
-    FOR DELETE USING (auth.uid() = user_id);
+    FOR DELETE USING ((select auth.uid()) = user_id);
 
 -- Tags policies
 CREATE POLICY "Users can view their own tags" ON tags
-    FOR SELECT USING (auth.uid() = user_id);
+    FOR SELECT USING ((select auth.uid()) = user_id);
 
 CREATE POLICY "Users can insert their own tags" ON tags
-    FOR INSERT WITH CHECK (auth.uid() = user_id);
+    FOR INSERT WITH CHECK ((select auth.uid()) = user_id);
 
 CREATE POLICY "Users can update their own tags" ON tags
-    FOR UPDATE USING (auth.uid() = user_id);
+    FOR UPDATE USING ((select auth.uid()) = user_id);
 
 CREATE POLICY "Users can delete their own tags" ON tags
-    FOR DELETE USING (auth.uid() = user_id);
+    FOR DELETE USING ((select auth.uid()) = user_id);
 
 -- Tasks policies
 CREATE POLICY "Users can view their own tasks" ON tasks
-    FOR SELECT USING (auth.uid() = user_id);
+    FOR SELECT USING ((select auth.uid()) = user_id);
 
 CREATE POLICY "Users can insert their own tasks" ON tasks
-    FOR INSERT WITH CHECK (auth.uid() = user_id);
+    FOR INSERT WITH CHECK ((select auth.uid()) = user_id);
 
 CREATE POLICY "Users can update their own tasks" ON tasks
-    FOR UPDATE USING (auth.uid() = user_id);
+    FOR UPDATE USING ((select auth.uid()) = user_id);
 
 CREATE POLICY "Users can delete their own tasks" ON tasks
-    FOR DELETE USING (auth.uid() = user_id);
+    FOR DELETE USING ((select auth.uid()) = user_id);
 
 -- Task_tags policies (based on task ownership)
 CREATE POLICY "Users can view their task_tags" ON task_tags
     FOR SELECT USING (
-        EXISTS (SELECT 1 FROM tasks WHERE tasks.id = task_tags.task_id AND tasks.user_id = auth.uid())
+        EXISTS (SELECT 1 FROM tasks WHERE tasks.id = task_tags.task_id AND tasks.user_id = (select auth.uid()))
     );
 
 CREATE POLICY "Users can insert their task_tags" ON task_tags
     FOR INSERT WITH CHECK (
-        EXISTS (SELECT 1 FROM tasks WHERE tasks.id = task_tags.task_id AND tasks.user_id = auth.uid())
+        EXISTS (SELECT 1 FROM tasks WHERE tasks.id = task_tags.task_id AND tasks.user_id = (select auth.uid()))
     );
 
 CREATE POLICY "Users can delete their task_tags" ON task_tags
     FOR DELETE USING (
-        EXISTS (SELECT 1 FROM tasks WHERE tasks.id = task_tags.task_id AND tasks.user_id = auth.uid())
+        EXISTS (SELECT 1 FROM tasks WHERE tasks.id = task_tags.task_id AND tasks.user_id = (select auth.uid()))
     );
 
 -- Ideas policies
 CREATE POLICY "Users can view their own ideas" ON ideas
-    FOR SELECT USING (auth.uid() = user_id);
+    FOR SELECT USING ((select auth.uid()) = user_id);
 
 CREATE POLICY "Users can insert their own ideas" ON ideas
-    FOR INSERT WITH CHECK (auth.uid() = user_id);
+    FOR INSERT WITH CHECK ((select auth.uid()) = user_id);
 
 CREATE POLICY "Users can update their own ideas" ON ideas
-    FOR UPDATE USING (auth.uid() = user_id);
+    FOR UPDATE USING ((select auth.uid()) = user_id);
 
 CREATE POLICY "Users can delete their own ideas" ON ideas
-    FOR DELETE USING (auth.uid() = user_id);
+    FOR DELETE USING ((select auth.uid()) = user_id);
+
+-- ===================================
+-- Atomic mutation functions (called via rpc)
+-- ===================================
+-- Each function runs as one transaction with the caller's privileges
+-- (SECURITY INVOKER), so the RLS policies above still apply.
+
+-- Convert an idea into a task and delete the idea
+CREATE OR REPLACE FUNCTION convert_idea_to_task(p_idea_id INTEGER)
+RETURNS tasks AS $$
+DECLARE
+    v_idea ideas;
+    v_task tasks;
+BEGIN
+    DELETE FROM ideas WHERE id = p_idea_id RETURNING * INTO v_idea;
+    IF NOT FOUND THEN
+        RAISE EXCEPTION 'Idea not found' USING ERRCODE = 'P0002';
+    END IF;
+
+    INSERT INTO tasks (title, description, color, status, user_id)
+    VALUES (v_idea.title, v_idea.content, COALESCE(v_idea.color, '#6750A4'), 'todo', auth.uid())
+    RETURNING * INTO v_task;
+
+    RETURN v_task;
+END;
+$$ LANGUAGE plpgsql SECURITY INVOKER;
+
+-- Create a task and attach its tags
+CREATE OR REPLACE FUNCTION create_task_with_tags(p_task JSONB, p_tag_ids INTEGER[] DEFAULT '{}')
+RETURNS tasks AS $$
+DECLARE
+    v_task tasks;
+BEGIN
+    INSERT INTO tasks (title, description, color, status, priority, project_id, due_date, user_id)
+    SELECT r.title, r.description, COALESCE(r.color, '#6750A4'), COALESCE(r.status, 'todo'),
+           COALESCE(r.priority, 0), r.project_id, r.due_date, auth.uid()
+    FROM jsonb_populate_record(NULL::tasks, p_task) r
+    RETURNING * INTO v_task;
+
+    INSERT INTO task_tags (task_id, tag_id)
+    SELECT v_task.id, tag_id FROM unnest(p_tag_ids) AS tag_id
+    ON CONFLICT DO NOTHING;
+
+    RETURN v_task;
+END;
+$$ LANGUAGE plpgsql SECURITY INVOKER;
+
+-- Update the fields present in p_changes and, when p_tag_ids is not NULL,
+-- replace the task's tags. completed_at is set when the status becomes done.
+CREATE OR REPLACE FUNCTION update_task_with_tags(p_task_id INTEGER, p_changes JSONB, p_tag_ids INTEGER[] DEFAULT NULL)
+RETURNS tasks AS $$
+DECLARE
+    v_task tasks;
+BEGIN
+    UPDATE tasks t SET
+        title = CASE WHEN p_changes ? 'title' THEN r.title ELSE t.title END,
+        description = CASE WHEN p_changes ? 'description' THEN r.description ELSE t.description END,
+        color = CASE WHEN p_changes ? 'color' THEN r.color ELSE t.color END,
+        status = CASE WHEN p_changes ? 'status' THEN r.status ELSE t.status END,
+        priority = CASE WHEN p_changes ? 'priority' THEN r.priority ELSE t.priority END,
+        project_id = CASE WHEN p_changes ? 'project_id' THEN r.project_id ELSE t.project_id END,
+        due_date = CASE WHEN p_changes ? 'due_date' THEN r.due_date ELSE t.due_date END,
+        completed_at = CASE
+            WHEN p_changes ? 'status' AND r.status = 'done' AND t.status IS DISTINCT FROM 'done' THEN NOW()
+            ELSE t.completed_at
+        END
+    FROM jsonb_populate_record(NULL::tasks, p_changes) r
+    WHERE t.id = p_task_id
+    RETURNING t.* INTO v_task;
+    IF NOT FOUND THEN
+        RAISE EXCEPTION 'Task not found' USING ERRCODE = 'P0002';
+    END IF;
+
+    IF p_tag_ids IS NOT NULL THEN
+        DELETE FROM task_tags WHERE task_id = p_task_id AND tag_id <> ALL(p_tag_ids);
+        INSERT INTO task_tags (task_id, tag_id)
+        SELECT p_task_id, tag_id FROM unnest(p_tag_ids) AS tag_id
+        ON CONFLICT DO NOTHING;
+    END IF;
+
+    RETURN v_task;
+END;
+$$ LANGUAGE plpgsql SECURITY INVOKER;
+
+-- Create several tasks and their tags in one transaction. Each element of
+-- p_items has the fields of create_task_with_tags' p_task plus an optional
+-- "tag_ids" array. Returns the created tasks in the order of p_items.
+CREATE OR REPLACE FUNCTION bulk_create_tasks(p_items JSONB)
+RETURNS SETOF tasks AS $$
+DECLARE
+    v_item JSONB;
+BEGIN
+    FOR v_item IN SELECT value FROM jsonb_array_elements(p_items) WITH ORDINALITY AS i(value, n) ORDER BY n LOOP
+        RETURN NEXT create_task_with_tags(
+            v_item - 'tag_ids',
+            ARRAY(
+                SELECT jsonb_array_elements_text(COALESCE(NULLIF(v_item->'tag_ids', 'null'::JSONB), '[]'::JSONB))::INTEGER
+            )
+        );
+    END LOOP;
+END;
+$$ LANGUAGE plpgsql SECURITY INVOKER;
+
+-- Apply several task updates in one transaction. Each element of p_items is
+-- {"id": ..., changed fields..., "tag_ids": [...] (optional)} with the same
+-- meaning as update_task_with_tags; ids that do not exist are skipped.
+-- Returns the updated tasks (later items see the result of earlier ones).
+CREATE OR REPLACE FUNCTION bulk_update_tasks(p_items JSONB)
+RETURNS SETOF tasks AS $$
+DECLARE
+    v_item JSONB;
+    v_tag_ids INTEGER[];
+BEGIN
+    FOR v_item IN SELECT value FROM jsonb_array_elements(p_items) LOOP
+        v_tag_ids := NULL;
+        IF v_item ? 'tag_ids' THEN
+            v_tag_ids := ARRAY(
+                SELECT jsonb_array_elements_text(COALESCE(NULLIF(v_item->'tag_ids', 'null'::JSONB), '[]'::JSONB))::INTEGER
+            );
+        END IF;
+        BEGIN
+            RETURN NEXT update_task_with_tags((v_item->>'id')::INTEGER, v_item - 'id' - 'tag_ids', v_tag_ids);
+        EXCEPTION WHEN SQLSTATE 'P0002' THEN
+            -- Task not found: leave it out of the result
+            NULL;
+        END;
+    END LOOP;
+END;
+$$ LANGUAGE plpgsql SECURITY INVOKER;
+
+-- Change the status of several tasks at once
+CREATE OR REPLACE FUNCTION bulk_update_task_status(p_task_ids INTEGER[], p_status TEXT)
+RETURNS SETOF tasks AS $$
+    UPDATE tasks SET
+        status = p_status,
+        completed_at = CASE
+            WHEN p_status = 'done' AND status IS DISTINCT FROM 'done' THEN NOW()
+            ELSE completed_at
+        END
+    WHERE id = ANY(p_task_ids)
+    RETURNING *;
+$$ LANGUAGE sql SECURITY INVOKER;
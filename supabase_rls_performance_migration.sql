@@ -0,0 +1,123 @@
+-- DevTodo RLS Performance Migration
+-- Run this SQL in Supabase SQL Editor after supabase_auth_migration.sql
+
+-- ===================================
+-- Sort keys
+-- ===================================
+-- Keyset pagination compares (priority, created_at, id) and
+-- (is_pinned, updated_at, id); a NULL there would make the row compare as
+-- NULL and drop out of every page, so the sort columns are NOT NULL.
+
+UPDATE tasks SET priority = 0 WHERE priority IS NULL;
+ALTER TABLE tasks ALTER COLUMN priority SET NOT NULL;
+UPDATE ideas SET is_pinned = FALSE WHERE is_pinned IS NULL;
+ALTER TABLE ideas ALTER COLUMN is_pinned SET NOT NULL;
+
+-- ===================================
+-- Indexes
+-- ===================================
+-- Every query is filtered by the RLS policy (user_id = current user), so
+-- indexes lead with user_id followed by the app's filter / order keys.
+
+-- Projects: get_projects orders by created_at
+CREATE INDEX IF NOT EXISTS idx_projects_user_created ON projects (user_id, created_at DESC);
+
+-- Tags: get_tags orders by name
+CREATE INDEX IF NOT EXISTS idx_tags_user_name ON tags (user_id, name);
+
+-- Tasks: list order, status filter / counts, project filter, recent completions
+-- The list and its keyset cursor use (priority, created_at, id) DESC, and
+-- recent_completed_tasks orders by completed_at DESC NULLS LAST, id DESC;
+-- the indexes match those orders exactly so they can serve ORDER BY / LIMIT.
+-- (Earlier versions of this file created them under other names.)
+DROP INDEX IF EXISTS idx_tasks_user_created;
+DROP INDEX IF EXISTS idx_tasks_user_completed;
+CREATE INDEX IF NOT EXISTS idx_tasks_user_list ON tasks (user_id, priority DESC, created_at DESC, id DESC);
+CREATE INDEX IF NOT EXISTS idx_tasks_user_status ON tasks (user_id, status);
+CREATE INDEX IF NOT EXISTS idx_tasks_user_project ON tasks (user_id, project_id);
+CREATE INDEX IF NOT EXISTS idx_tasks_user_recent_completed ON tasks (user_id, completed_at DESC NULLS LAST, id DESC) WHERE status = 'done';
+
+-- task_tags policies check ownership with
+-- EXISTS (SELECT 1 FROM tasks WHERE tasks.id = task_tags.task_id AND tasks.user_id = ...);
+-- (id, user_id) answers that from the index alone
+CREATE INDEX IF NOT EXISTS idx_tasks_id_user ON tasks (id, user_id);
+-- Lookups by tag (usage counts, tag filters); the primary key leads with task_id
+CREATE INDEX IF NOT EXISTS idx_task_tags_tag ON task_tags (tag_id, task_id);
+
+-- Ideas: ordered by pin state and last update
+CREATE INDEX IF NOT EXISTS idx_ideas_user_updated ON ideas (user_id, is_pinned DESC, updated_at DESC);
+
+-- ===================================
+-- Policies
+-- ===================================
+-- Wrapping auth.uid() in a sub-select lets Postgres evaluate it once per
+-- query (as an initPlan) instead of once per row.
+
+ALTER POLICY "Users can view their own projects" ON projects
+    USING ((select auth.uid()) = user_id);
+
+ALTER POLICY "Users can insert their own projects" ON projects
+    WITH CHECK ((select auth.uid()) = user_id);
+
+ALTER POLICY "Users can update their own projects" ON projects
+    USING ((select auth.uid()) = user_id);
+
+ALTER POLICY "Users can delete their own projects" ON projects
+    USING ((select auth.uid()) = user_id);
+
+ALTER POLICY "Users can view their own tags" ON tags
+    USING ((select auth.uid()) = user_id);
+
+ALTER POLICY "Users can insert their own tags" ON tags
+    WITH CHECK ((select auth.uid()) = user_id);
+
+ALTER POLICY "Users can update their own tags" ON tags
+    USING ((select auth.uid()) = user_id);
+
+ALTER POLICY "Users can delete their own tags" ON tags
+    USING ((select auth.uid()) = user_id);
+
+ALTER POLICY "Users can view their own tasks" ON tasks
+    USING ((select auth.uid()) = user_id);
+
+ALTER POLICY "Users can insert their own tasks" ON tasks
+    WITH CHECK ((select auth.uid()) = user_id);
+
+ALTER POLICY "Users can update their own tasks" ON tasks
+    USING ((select auth.uid()) = user_id);
+
+ALTER POLICY "Users can delete their own tasks" ON tasks
+    USING ((select auth.uid()) = user_id);
+
+ALTER POLICY "Users can view their task_tags" ON task_tags
+    USING (
+        EXISTS (SELECT 1 FROM tasks WHERE tasks.id = task_tags.task_id AND tasks.user_id = (select auth.uid()))
+    );
+
+ALTER POLICY "Users can insert their task_tags" ON task_tags
+    WITH CHECK (
+        EXISTS (SELECT 1 FROM tasks WHERE tasks.id = task_tags.task_id AND tasks.user_id = (select auth.uid()))
+    );
+
+ALTER POLICY "Users can delete their task_tags" ON task_tags
+    USING (
+        EXISTS (SELECT 1 FROM tasks WHERE tasks.id = task_tags.task_id AND tasks.user_id = (select auth.uid()))
+    );
+
+ALTER POLICY "Users can view their own ideas" ON ideas
+    USING ((select auth.uid()) = user_id);
+
+ALTER POLICY "Users can insert their own ideas" ON ideas
+    WITH CHECK ((select auth.uid()) = user_id);
+
+ALTER POLICY "Users can update their own ideas" ON ideas
+    USING ((select auth.uid()) = user_id);
+
+ALTER POLICY "Users can delete their own ideas" ON ideas
+    USING ((select auth.uid()) = user_id);
+
+ANALYZE projects;
+ANALYZE tags;
+ANALYZE tasks;
+ANALYZE task_tags;
+ANALYZE ideas;
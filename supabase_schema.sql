@@ -84,3 +84,67 @@ CREATE TRIGGER update_tasks_updated_at BEFORE UPDATE ON tasks
 
 CREATE TRIGGER update_ideas_updated_at BEFORE UPDATE ON ideas
     FOR EACH ROW EXECUTE FUNCTION update_updated_at_column();
+
+-- Trigram indexes so the ILIKE '%...%' searches used by the app (including
+-- Japanese text without word boundaries) use an index instead of a full scan
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
+
+CREATE INDEX IF NOT EXISTS idx_ideas_title_trgm ON ideas USING GIN (title gin_trgm_ops);
+CREATE INDEX IF NOT EXISTS idx_ideas_content_trgm ON ideas USING GIN (content gin_trgm_ops);
+CREATE INDEX IF NOT EXISTS idx_tasks_title_trgm ON tasks USING GIN (title gin_trgm_ops);
+CREATE INDEX IF NOT EXISTS idx_tasks_description_trgm ON tasks USING GIN (description gin_trgm_ops);
+
+-- Report aggregates computed in Postgres so the reports page only
+-- transfers a few rows. security_invoker keeps RLS policies applied.
+CREATE OR REPLACE VIEW task_status_counts WITH (security_invoker = true) AS
+    SELECT status, COUNT(*)::INTEGER AS count
+    FROM tasks
+    GROUP BY status;
+
+CREATE OR REPLACE VIEW recent_completed_tasks WITH (security_invoker = true) AS
+    SELECT id, title, color, completed_at
+    FROM tasks
+    WHERE status = 'done'
+    ORDER BY completed_at DESC NULLS LAST, id DESC;
+
+CREATE OR REPLACE FUNCTION task_completion_rate()
+RETURNS NUMERIC AS $$
+    SELECT COALESCE(
+        ROUND(100.0 * COUNT(*) FILTER (WHERE status = 'done') / NULLIF(COUNT(*), 0), 1),
+        0
+    )
+    FROM tasks;
+$$ LANGUAGE sql STABLE SECURITY INVOKER;
+
+-- Daily task counts for the weekly / monthly reports, grouped like the SQLite
+-- rollup tables. [p_start, p_end) are dates in the caller's local time and
+-- p_utc_offset is that time zone's offset from UTC (e.g. '9 hours'), so tasks
+-- are counted on the same local day as the Flask API counts them.
+CREATE OR REPLACE FUNCTION task_daily_stats(p_start DATE, p_end DATE, p_utc_offset INTERVAL DEFAULT INTERVAL '0')
+RETURNS TABLE (day DATE, kind TEXT, project_id INTEGER, color TEXT, count INTEGER) AS $$
+    WITH events AS (
+        SELECT 'created' AS kind, created_at AS occurred_at, project_id, color
+        FROM tasks
+        WHERE created_at >= p_start::TIMESTAMP AT TIME ZONE p_utc_offset
+          AND created_at < p_end::TIMESTAMP AT TIME ZONE p_utc_offset
+        UNION ALL
+        SELECT 'completed', completed_at, project_id, color
+        FROM tasks
+        WHERE completed_at >= p_start::TIMESTAMP AT TIME ZONE p_utc_offset
+          AND completed_at < p_end::TIMESTAMP AT TIME ZONE p_utc_offset
+    )
+    SELECT (occurred_at AT TIME ZONE p_utc_offset)::DATE, kind, project_id, color, COUNT(*)::INTEGER
+    FROM events
+    GROUP BY 1, 2, 3, 4;
+$$ LANGUAGE sql STABLE SECURITY INVOKER;
+
+-- Completed tasks per tag in the same local date range
+CREATE OR REPLACE FUNCTION tag_completion_counts(p_start DATE, p_end DATE, p_utc_offset INTERVAL DEFAULT INTERVAL '0')
+RETURNS TABLE (tag_id INTEGER, count INTEGER) AS $$
+    SELECT tt.tag_id, COUNT(*)::INTEGER
+    FROM tasks t
+    JOIN task_tags tt ON tt.task_id = t.id
+    WHERE t.completed_at >= p_start::TIMESTAMP AT TIME ZONE p_utc_offset
+      AND t.completed_at < p_end::TIMESTAMP AT TIME ZONE p_utc_offset
+    GROUP BY tt.tag_id;
+$$ LANGUAGE sql STABLE SECURITY INVOKER;
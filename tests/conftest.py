@@ -0,0 +1,52 @@
+import os
+import sys
+import tempfile
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# リポジトリ内の data/todo.db に書き込まないよう、モジュールを読み込む前に差し替える
+os.environ['DATABASE_PATH'] = os.path.join(tempfile.mkdtemp(prefix='devtodo-test-'), 'todo.db')
+
+import database
+from database import connect, migrate
+from repository import SQLiteRepository, stub
+from api.report_cache import report_cache
+
+@pytest.fixture
+def conn(tmp_path):
+    """マイグレーション済みの一時DBへの接続"""
+    conn = connect(str(tmp_path / 'todo.db'))
+    migrate(conn)
+    yield conn
+    conn.close()
+
+@pytest.fixture
+def repo(conn):
+    return SQLiteRepository(conn)
+
+@pytest.fixture
+def stub_repo(tmp_path, monkeypatch):
+    """API のハンドラーが使うリポジトリをスタブにする
+    
+    ETag・差分同期の変更ログなど、リポジトリを介さずに get_db() で読む部分も
+    同じファイルを見るよう DATABASE_PATH をスタブのDBに合わせる。
+    """
+    import api.ideas, api.projects, api.reports, api.sync, api.tags, api.tasks
+    
+    path = str(tmp_path / 'stub.db')
+    monkeypatch.setattr(database, 'DATABASE_PATH', path)
+    database.pool.close_all()
+    report_cache.clear()
+    
+    repository = stub.create_stub_repository(path)
+    for module in (api.ideas, api.projects, api.reports, api.sync, api.tags, api.tasks):
+        monkeypatch.setattr(module, 'get_repository', lambda: repository)
+    yield repository
+    repository.conn.close()
+    database.pool.close_all()
+
+@pytest.fixture
+def client(stub_repo):
+    from app import create_app
+    return create_app().test_client()
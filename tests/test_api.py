@@ -0,0 +1,172 @@
+"""Flask API をスタブのバックエンドで動かすテスト"""
+import database
+from repository import Repository
+from api.report_cache import report_cache
+from repository.supabase import SupabaseSyncRepository
+import api.sync
+
+def create_tasks(client, count, **fields):
+    response = client.post('/api/tasks/bulk', json=[
+        {'title': f'Task {i}', **fields} for i in range(count)
+    ])
+    assert response.status_code == 201
+    return [result['task'] for result in response.get_json()['results']]
+
+def test_requests_reuse_pooled_connections(client):
+    """リクエストごとの接続はプールから借りて close_db で返し、次のリクエストで再利用する"""
+    client.get('/api/tasks')
+    first = database.pool.stats()
+    assert first['in_use'] == 0
+    assert first['idle'] >= 1
+    
+    client.get('/api/projects')
+    second = client.get('/health').get_json()['db_pool']
+    assert second['in_use'] == 0
+    assert second['created'] == first['created']
+    assert second['reused'] > first['reused']
+    
+    conn = database.pool.acquire()
+    try:
+        assert conn.execute('PRAGMA journal_mode').fetchone()[0] == 'wal'
+        assert conn.execute('PRAGMA busy_timeout').fetchone()[0] == database.BUSY_TIMEOUT_MS
+    finally:
+        database.pool.release(conn)
+
+def test_task_crud(client):
+    project = client.post('/api/projects', json={'name': 'P'}).get_json()
+    tag = client.post('/api/tags', json={'name': 'api'}).get_json()
+    
+    response = client.post('/api/tasks', json={
+        'title': 'Write tests', 'project_id': project['id'], 'tag_ids': [tag['id']]
+    })
+    assert response.status_code == 201
+    task = response.get_json()
+    assert task['project_name'] == 'P'
+    assert [t['name'] for t in task['tags']] == ['api']
+    
+    updated = client.put(f"/api/tasks/{task['id']}", json={'status': 'done'}).get_json()
+    assert updated['status'] == 'done'
+    assert updated['completed_at']
+    
+    assert client.delete(f"/api/tasks/{task['id']}").status_code == 200
+    assert client.get(f"/api/tasks/{task['id']}").status_code == 404
+
+def test_duplicate_tag_is_rejected(client):
+    client.post('/api/tags', json={'name': 'dup'})
+    response = client.post('/api/tags', json={'name': 'dup'})
+    assert response.status_code == 400
+    assert response.get_json() == {'error': 'Tag already exists'}
+
+def test_bulk_update_and_delete_validate_ids(client):
+    first, second = create_tasks(client, 2)
+    
+    response = client.patch('/api/tasks/bulk', json=[
+        {'id': str(first['id']), 'status': 'done'}, {'id': 'x'}, {'id': 999}
+    ])
+    assert response.status_code == 200
+    assert [r['status'] for r in response.get_json()['results']] == [200, 400, 404]
+    assert client.patch('/api/tasks/bulk', json=[{'id': None}]).status_code == 400
+    
+    response = client.delete('/api/tasks/bulk', json=[second['id'], 'junk'])
+    assert [r['status'] for r in response.get_json()['results']] == [200, 400]
+    assert client.delete('/api/tasks/bulk', json=['junk']).status_code == 400
+
+def walk_pages(client, path, key, limit=2):
+    """cursor をたどって全ページの行を集める"""
+    rows, cursor = [], None
+    while True:
+        url = f'{path}?limit={limit}' + (f'&cursor={cursor}' if cursor else '')
+        page = client.get(url).get_json()
+        rows += page[key]
+        cursor = page['next_cursor']
+        if not cursor:
+            return rows
+
+def test_cursor_walk_matches_full_list(client):
+    """並び順の列に null を送った行も、ページをたどった結果に含まれる"""
+    create_tasks(client, 3, priority=1)
+    client.post('/api/tasks', json={'title': 'No priority', 'priority': None})
+    create_tasks(client, 2)
+    client.post('/api/ideas', json={'title': 'No pin', 'is_pinned': None})
+    client.post('/api/ideas', json={'title': 'Pinned', 'is_pinned': 1})
+    
+    tasks = client.get('/api/tasks').get_json()
+    assert len(tasks) == 6
+    assert walk_pages(client, '/api/tasks', 'tasks') == tasks
+    
+    ideas = client.get('/api/ideas').get_json()
+    assert walk_pages(client, '/api/ideas', 'ideas', limit=1) == ideas
+
+def test_list_etag_and_stream(client):
+    create_tasks(client, 5)
+    
+    response = client.get('/api/tasks')
+    etag = response.headers['ETag']
+    assert client.get('/api/tasks', headers={'If-None-Match': etag}).status_code == 304
+    # ストリーミングでも本文は jsonify と同じ
+    assert client.get('/api/tasks?stream=1').get_data() == response.get_data()
+    
+    create_tasks(client, 1)
+    assert client.get('/api/tasks', headers={'If-None-Match': etag}).status_code == 200
+
+def test_reports(client):
+    tasks = create_tasks(client, 3)
+    client.patch('/api/tasks/bulk', json=[{'id': tasks[0]['id'], 'status': 'done'}])
+    
+    weekly = client.get('/api/reports/weekly').get_json()
+    assert weekly['completed_count'] == 1
+    assert [t['id'] for t in weekly['completed_tasks']] == [tasks[0]['id']]
+    assert weekly['created_count'] == 3
+    assert client.get('/api/reports/weekly?stream=1').get_data() == client.get('/api/reports/weekly').get_data()
+    
+    monthly = client.get('/api/reports/monthly').get_json()
+    assert monthly['completed_count'] == 1
+    assert monthly['created_count'] == 3
+    
+    summary = client.get('/api/reports/summary').get_json()
+    assert summary['total_tasks'] == 3
+    assert summary['status_counts'] == {'done': 1, 'todo': 2}
+
+def test_report_cache_is_invalidated_by_writes(client, stub_repo, monkeypatch):
+    """同じレポートはキャッシュから返し、書き込み後は table_versions の変化で計算し直す"""
+    calls = []
+    summary = stub_repo.reports.summary
+    monkeypatch.setattr(stub_repo.reports, 'summary', lambda: calls.append(1) or summary())
+    create_tasks(client, 2)
+    
+    first = client.get('/api/reports/summary')
+    hits = report_cache.stats()['hits']
+    second = client.get('/api/reports/summary')
+    assert second.get_data() == first.get_data()
+    assert len(calls) == 1
+    assert report_cache.stats()['hits'] == hits + 1
+    
+    create_tasks(client, 1)
+    third = client.get('/api/reports/summary')
+    assert len(calls) == 2
+    assert third.get_json()['total_tasks'] == first.get_json()['total_tasks'] + 1
+
+def test_sync_full_then_delta(client):
+    first, second = create_tasks(client, 2)
+    
+    full = client.get('/api/sync').get_json()
+    assert full['full'] is True
+    assert len(full['changes']['tasks']) == 2
+    
+    client.put(f"/api/tasks/{first['id']}", json={'title': 'Renamed'})
+    client.delete(f"/api/tasks/{second['id']}")
+    delta = client.get(f"/api/sync?since={full['token']}").get_json()
+    assert delta['full'] is False
+    assert [t['title'] for t in delta['changes']['tasks']] == ['Renamed']
+    assert delta['deleted']['tasks'] == [second['id']]
+
+def test_unsupported_backend_returns_501(client, stub_repo, monkeypatch):
+    repository = Repository(
+        stub_repo.projects, stub_repo.tags, stub_repo.tasks, stub_repo.ideas, stub_repo.reports,
+        sync=SupabaseSyncRepository()
+    )
+    monkeypatch.setattr(api.sync, 'get_repository', lambda: repository)
+    
+    response = client.get('/api/sync')
+    assert response.status_code == 501
+    assert 'not supported' in response.get_json()['error']
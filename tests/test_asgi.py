@@ -0,0 +1,49 @@
+import pytest
+from starlette.testclient import TestClient
+import asgi
+import database
+from api.report_cache import report_cache
+from api.streaming import STREAM_BATCH_SIZE
+
+@pytest.fixture
+def asgi_client(tmp_path, monkeypatch):
+    monkeypatch.setattr(database, 'DATABASE_PATH', str(tmp_path / 'asgi.db'))
+    report_cache.clear()
+    with TestClient(asgi.app) as client:
+        yield client
+
+def test_stream_matches_list_across_batches(asgi_client):
+    """バッチの境界をまたいでも ?stream=1 の本文はストリーミングしない場合と同じ"""
+    count = STREAM_BATCH_SIZE * 2 + 1
+    items = [{'title': f'Task {i}', 'priority': i % 3} for i in range(count)]
+    assert asgi_client.post('/api/tasks/bulk', json=items).status_code == 201
+    
+    listed = asgi_client.get('/api/tasks')
+    streamed = asgi_client.get('/api/tasks?stream=1')
+    assert streamed.content == listed.content
+    assert len(streamed.json()) == count
+    
+    stats = asgi_client.get('/health').json()['db_pool']
+    assert stats['in_use'] == 0
+
+def test_stream_releases_connection_between_batches(asgi_client):
+    """ストリーミング中のクライアントが次のチャンクを読むまで、接続はプールに返っている"""
+    items = [{'title': f'Task {i}'} for i in range(STREAM_BATCH_SIZE * 3)]
+    asgi_client.post('/api/tasks/bulk', json=items)
+    
+    async def read_slowly():
+        in_use = []
+        response = asgi.stream_json(
+            lambda repo, after, limit: repo.tasks.list(limit=limit, after=after),
+            sort_key=lambda t: (t['priority'], t['created_at'], t['id'])
+        )
+        chunks = []
+        async for chunk in response.body_iterator:
+            chunks.append(chunk)
+            in_use.append(asgi.db.stats()['in_use'])
+        return in_use, ''.join(chunks)
+    
+    in_use, body = asgi_client.portal.call(read_slowly)
+    assert set(in_use) == {0}
+    assert len(in_use) == 3 + 2
+    assert body == asgi_client.get('/api/tasks').text
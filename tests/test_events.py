@@ -0,0 +1,32 @@
+import queue
+import time
+from events import ChangeFeed
+
+def test_failing_subscriber_does_not_stop_delivery(client):
+    """購読者が例外を出しても、他の購読者に同じ通知が届き、以降の通知も届く"""
+    feed = ChangeFeed(interval=0.05)
+    queues = [queue.Queue(), queue.Queue()]
+    
+    def failing_subscriber(received):
+        def callback(event):
+            received.put(event)
+            raise RuntimeError('subscriber failed')
+        return callback
+    
+    unsubscribes = [feed.subscribe(failing_subscriber(received)) for received in queues]
+    # ポーリングのスレッドが現在の位置を読むのを待つ
+    time.sleep(0.2)
+    try:
+        task = client.post('/api/tasks', json={'title': 'first'}).get_json()
+        firsts = [received.get(timeout=5) for received in queues]
+        assert [event['id'] for event in firsts] == [task['id'], task['id']]
+        
+        # change_log は同じ行の変更をまとめるので、前の通知が届いてから書き込む
+        client.delete(f"/api/tasks/{task['id']}")
+        for received, first in zip(queues, firsts):
+            second = received.get(timeout=5)
+            assert (second['id'], second['op']) == (task['id'], 'delete')
+            assert second['version'] > first['version']
+    finally:
+        for unsubscribe in unsubscribes:
+            unsubscribe()
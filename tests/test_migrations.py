@@ -0,0 +1,69 @@
+from database import connect, migrate, get_schema_version, MIGRATIONS
+
+EXPECTED_INDEXES = {
+    'idx_tasks_status_priority_created', 'idx_tasks_priority_created', 'idx_tasks_project_id',
+    'idx_tasks_completed_at', 'idx_tasks_created_at', 'idx_task_tags_tag_task',
+    'idx_ideas_pinned_updated', 'idx_change_log_entity',
+}
+
+def baseline_db(path):
+    """スキーマバージョン管理の導入前（init_db が CREATE TABLE だけをしていた頃）のDB"""
+    conn = connect(path)
+    for step in MIGRATIONS[0][2]:
+        conn.execute(step)
+    conn.execute("INSERT INTO projects (name) VALUES ('P')")
+    conn.execute("INSERT INTO tags (name) VALUES ('t')")
+    # 当時の completed_at はローカル時刻の isoformat()
+    conn.execute('''
+        INSERT INTO tasks (title, status, priority, project_id, completed_at)
+        VALUES ('done', 'done', 1, 1, '2026-01-02T10:00:00.123456')
+    ''')
+    conn.execute("INSERT INTO tasks (title, priority) VALUES ('no priority', NULL)")
+    conn.execute('INSERT INTO task_tags (task_id, tag_id) VALUES (1, 1)')
+    conn.execute("INSERT INTO ideas (title, is_pinned) VALUES ('idea', NULL)")
+    conn.commit()
+    return conn
+
+def test_migrate_baseline_db(tmp_path):
+    conn = baseline_db(str(tmp_path / 'old.db'))
+    try:
+        assert migrate(conn) == [version for version, _, _ in MIGRATIONS]
+        assert get_schema_version(conn) == MIGRATIONS[-1][0]
+        
+        indexes = {row['name'] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'index'")}
+        assert EXPECTED_INDEXES <= indexes
+        
+        # 既存の行も移行されている
+        completed_at = conn.execute('SELECT completed_at FROM tasks WHERE id = 1').fetchone()[0]
+        assert 'T' not in completed_at
+        assert conn.execute('SELECT COUNT(*) FROM tasks WHERE priority IS NULL').fetchone()[0] == 0
+        assert conn.execute('SELECT COUNT(*) FROM ideas WHERE is_pinned IS NULL').fetchone()[0] == 0
+        assert conn.execute(
+            "SELECT SUM(count) FROM task_daily_stats WHERE kind = 'completed'"
+        ).fetchone()[0] == 1
+        assert conn.execute('SELECT SUM(count) FROM tag_daily_stats').fetchone()[0] == 1
+        assert conn.execute('SELECT COUNT(*) FROM change_log').fetchone()[0] > 0
+        
+        # 2回目は何も適用しない
+        assert migrate(conn) == []
+        assert get_schema_version(conn) == MIGRATIONS[-1][0]
+    finally:
+        conn.close()
+
+def test_fresh_and_upgraded_db_have_same_schema(tmp_path):
+    """新規作成したDBと旧DBから移行したDBのスキーマは同じ"""
+    def schema(conn):
+        return sorted(
+            (row['type'], row['name'], row['sql'])
+            for row in conn.execute("SELECT type, name, sql FROM sqlite_master WHERE name NOT LIKE 'sqlite_%'")
+        )
+    
+    fresh = connect(str(tmp_path / 'fresh.db'))
+    upgraded = baseline_db(str(tmp_path / 'old.db'))
+    try:
+        migrate(fresh)
+        migrate(upgraded)
+        assert schema(fresh) == schema(upgraded)
+    finally:
+        fresh.close()
+        upgraded.close()
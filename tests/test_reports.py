@@ -0,0 +1,54 @@
+import time
+from datetime import date, datetime, timedelta, timezone
+import pytest
+
+@pytest.fixture
+def tokyo(monkeypatch):
+    """サーバーのローカル時刻を JST（UTC+9）にする"""
+    monkeypatch.setenv('TZ', 'Asia/Tokyo')
+    time.tzset()
+    yield
+    monkeypatch.undo()
+    time.tzset()
+
+def complete_at(conn, repo, local_time):
+    """ローカル時刻 local_time に完了したタスクを作る（completed_at は UTC で保存）"""
+    task = repo.tasks.create({'title': 'done'})
+    completed_at = local_time.astimezone(timezone.utc).strftime('%Y-%m-%d %H:%M:%S')
+    conn.execute(
+        "UPDATE tasks SET status = 'done', completed_at = ? WHERE id = ?",
+        (completed_at, task['id'])
+    )
+    conn.commit()
+    return task['id']
+
+def test_weekly_completed_tasks_use_completed_at_index(conn, repo):
+    statements = []
+    conn.set_trace_callback(statements.append)
+    repo.reports.weekly()
+    conn.set_trace_callback(None)
+    
+    query = next(sql for sql in statements if 'FROM tasks' in sql and 'completed_at >=' in sql)
+    plan = ' '.join(row['detail'] for row in conn.execute('EXPLAIN QUERY PLAN ' + query))
+    assert 'idx_tasks_completed_at' in plan
+
+def test_weekly_buckets_by_local_date(tokyo, conn, repo):
+    # JST の 0:30 は UTC では前日の 15:30
+    task_id = complete_at(conn, repo, datetime.combine(date.today(), datetime.min.time()) + timedelta(minutes=30))
+    
+    report = repo.reports.weekly()
+    
+    assert [t['id'] for t in report['completed_tasks']] == [task_id]
+    counts = {day['date']: day['count'] for day in report['daily_data']}
+    assert counts[date.today().isoformat()] == 1
+    assert sum(counts.values()) == 1
+
+def test_monthly_buckets_by_local_date(tokyo, conn, repo):
+    first_day = date.today().replace(day=1)
+    complete_at(conn, repo, datetime.combine(first_day, datetime.min.time()) + timedelta(minutes=30))
+    
+    report = repo.reports.monthly(first_day.year, first_day.month)
+    
+    assert report['completed_count'] == 1
+    previous = first_day - timedelta(days=1)
+    assert repo.reports.monthly(previous.year, previous.month)['completed_count'] == 0
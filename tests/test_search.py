@@ -0,0 +1,56 @@
+"""FTS5 trigram 検索と LIKE フォールバックのテスト"""
+def traced(conn, fn):
+    """fn() の結果と、実行されたSQLを返す"""
+    statements = []
+    conn.set_trace_callback(statements.append)
+    try:
+        return fn(), '\n'.join(statements)
+    finally:
+        conn.set_trace_callback(None)
+
+def test_search_uses_fts_for_terms_of_three_or_more_characters(conn, repo):
+    """3文字以上の語は日本語・英字とも FTS 索引で引く"""
+    repo.tasks.create({'title': '請求書を送る', 'description': 'Send the invoice'})
+    repo.tasks.create({'title': '会議の準備', 'description': 'Prepare slides'})
+    repo.ideas.create({'title': 'データベース設計', 'content': 'schema draft'})
+    
+    tasks, sql = traced(conn, lambda: repo.tasks.search('請求書'))
+    assert 'tasks_fts MATCH' in sql
+    assert [t['title'] for t in tasks] == ['請求書を送る']
+    assert '<mark>請求書</mark>' in tasks[0]['snippet']
+    
+    tasks, sql = traced(conn, lambda: repo.tasks.search('INVOICE'))
+    assert 'tasks_fts MATCH' in sql
+    assert [t['title'] for t in tasks] == ['請求書を送る']
+    
+    ideas, sql = traced(conn, lambda: repo.ideas.search('ベース'))
+    assert 'ideas_fts MATCH' in sql
+    assert [i['title'] for i in ideas] == ['データベース設計']
+
+def test_search_falls_back_to_like_for_short_terms(conn, repo):
+    """trigram に満たない語は LIKE で探す"""
+    repo.tasks.create({'title': '会議の準備', 'description': ''})
+    repo.tasks.create({'title': '請求書', 'description': ''})
+    
+    tasks, sql = traced(conn, lambda: repo.tasks.search('会議'))
+    assert 'MATCH' not in sql
+    assert 'LIKE' in sql
+    assert [t['title'] for t in tasks] == ['会議の準備']
+    assert tasks[0]['snippet'] == '<mark>会議</mark>の準備'
+
+def test_fts_index_follows_updates_and_deletes(repo):
+    """更新・削除はトリガーで FTS 索引に反映される"""
+    task = repo.tasks.create({'title': 'Draft proposal'})
+    idea = repo.ideas.create({'title': 'Mobile widget', 'content': ''})
+    
+    repo.tasks.update(task['id'], {'title': 'Final report'})
+    assert repo.tasks.search('proposal') == []
+    assert [t['id'] for t in repo.tasks.search('report')] == [task['id']]
+    
+    repo.ideas.update(idea['id'], {'content': 'home screen'})
+    assert [i['id'] for i in repo.ideas.search('screen')] == [idea['id']]
+    
+    repo.tasks.delete(task['id'])
+    repo.ideas.delete(idea['id'])
+    assert repo.tasks.search('report') == []
+    assert repo.ideas.search('widget') == []
@@ -0,0 +1,87 @@
+"""Streamlit アプリのセッション内キャッシュへの書き込み結果の反映のテスト"""
+import pytest
+
+st = pytest.importorskip('streamlit')
+
+def task(id, priority=0, created_at='2024-01-01 00:00:00', status='todo', project_id=None):
+    return {
+        'id': id, 'title': f'Task {id}', 'priority': priority, 'created_at': created_at,
+        'status': status, 'project_id': project_id
+    }
+
+@pytest.fixture
+def app(repo, monkeypatch):
+    """スタブのリポジトリで動かす streamlit_app（キャッシュは空の状態から始める）"""
+    monkeypatch.setenv('DEVTODO_BACKEND', 'stub')
+    import streamlit_app
+    st.session_state.stub_repository = repo
+    st.session_state.data_cache = {}
+    yield streamlit_app
+    del st.session_state.stub_repository
+    st.session_state.data_cache = {}
+
+def test_merge_rows_keeps_sort_order(app):
+    rows = [task(3, priority=1), task(1, created_at='2024-01-02 00:00:00'), task(2)]
+    
+    rows = app.merge_rows(rows, 'insert', task(4, priority=2), sort_key=app.task_sort_key, reverse=True)
+    assert [r['id'] for r in rows] == [4, 3, 1, 2]
+    
+    rows = app.merge_rows(rows, 'update', task(2, priority=3), sort_key=app.task_sort_key, reverse=True)
+    assert [r['id'] for r in rows] == [2, 4, 3, 1]
+    
+    rows = app.merge_rows(rows, 'delete', {'id': 4}, sort_key=app.task_sort_key, reverse=True)
+    assert [r['id'] for r in rows] == [2, 3, 1]
+    
+    done = task(5, status='done')
+    rows = app.merge_rows(
+        rows, 'insert', done, sort_key=app.task_sort_key, reverse=True,
+        matches=lambda t: app.task_matches(t, status_filter='todo')
+    )
+    assert [r['id'] for r in rows] == [2, 3, 1]
+
+def test_patch_task_page_updates_row_on_page(app):
+    page = ([task(2), task(1)], 2)
+    
+    tasks, total = app.patch_task_page(page, 'tasks', 'update', task(1, priority=1))
+    assert [t['id'] for t in tasks] == [1, 2]
+    assert total == 2
+    
+    # 絞り込み条件から外れた行はページから消え、総件数も減る
+    tasks, total = app.patch_task_page(page, 'tasks', 'update', task(1, status='done'), status_filter='todo')
+    assert [t['id'] for t in tasks] == [2]
+    assert total == 1
+
+def test_patch_task_page_inserts_on_first_page(app):
+    page = ([task(2), task(1)], 3)
+    
+    tasks, total = app.patch_task_page(page, 'tasks', 'insert', task(3), per_page=2)
+    assert [t['id'] for t in tasks] == [3, 2]
+    assert total == 4
+    
+    # 2ページ目以降には位置が分からないので取り直す
+    assert app.patch_task_page(page, 'tasks', 'insert', task(3), page=1, per_page=2) is None
+    
+    # 条件に一致しない行は一覧を変えない
+    assert app.patch_task_page(page, 'tasks', 'insert', task(3, status='done'), status_filter='todo') == page
+
+def test_patch_task_page_refetches_when_deleting_row_on_other_page(app):
+    page = ([task(2), task(1)], 3)
+    assert app.patch_task_page(page, 'tasks', 'delete', {'id': 9}) is None
+    
+    tasks, total = app.patch_task_page(page, 'tasks', 'delete', {'id': 2})
+    assert [t['id'] for t in tasks] == [1]
+    assert total == 2
+
+def test_update_of_deleted_task_drops_it_from_cache(app, repo):
+    """他のセッションで削除されたタスクの更新は、例外にせずキャッシュから外す"""
+    kept = repo.tasks.create({'title': 'Kept'})
+    gone = repo.tasks.create({'title': 'Gone'})
+    assert [t['id'] for t in app.get_task_page()[0]] == [gone['id'], kept['id']]
+    
+    repo.tasks.delete(gone['id'])
+    assert app.update_task_status(gone['id'], 'done') is None
+    assert app.update_task(gone['id'], 'Gone', '', None, None, '#6750A4', 'done') is None
+    
+    tasks, total = app.get_task_page()
+    assert [t['id'] for t in tasks] == [kept['id']]
+    assert total == 1
@@ -0,0 +1,116 @@
+"""Supabase バックエンドが送る PostgREST リクエストのテスト（HTTP はモック）"""
+import json
+from datetime import date, timedelta
+import httpx
+import pytest
+from supabase import create_client
+from repository import UnsupportedOperation
+from repository.supabase import SupabaseRepository
+
+class FakePostgrest:
+    """パスごとに用意した JSON を返し、受け取ったリクエストを記録する"""
+    
+    def __init__(self, responses):
+        self.responses = responses
+        self.requests = []
+    
+    def __call__(self, request):
+        path = request.url.path.split('/rest/v1/')[1]
+        body = json.loads(request.content) if request.content else None
+        self.requests.append((request.method, path, body))
+        return httpx.Response(200, json=self.responses.get(path, []))
+
+@pytest.fixture
+def fake():
+    return FakePostgrest({})
+
+@pytest.fixture
+def supabase_repo(fake):
+    client = create_client('http://localhost:54321', 'eyJhbGciOiJIUzI1NiJ9.e30.x')
+    client.postgrest.session._transport = httpx.MockTransport(fake)
+    return SupabaseRepository(client, 'user-1')
+
+def test_bulk_create_is_one_rpc(fake, supabase_repo):
+    fake.responses['rpc/bulk_create_tasks'] = [{'id': 7}, {'id': 8}]
+    fake.responses['tasks'] = [
+        {'id': 8, 'title': 'b', 'projects': None, 'tags': []},
+        {'id': 7, 'title': 'a', 'projects': None, 'tags': [{'id': 1, 'name': 'x', 'color': '#111'}]},
+    ]
+    
+    result = supabase_repo.tasks.bulk_create([{'title': 'a', 'tag_ids': [1]}, {'title': 'b', 'priority': None}])
+    
+    assert [r[1] for r in fake.requests if r[0] == 'POST'] == ['rpc/bulk_create_tasks']
+    items = fake.requests[0][2]['p_items']
+    assert [(i['title'], i['priority'], i['tag_ids']) for i in items] == [('a', 0, [1]), ('b', 0, [])]
+    assert [t['id'] for t in result] == [7, 8]
+    assert result[0]['tags'][0]['name'] == 'x'
+
+def test_bulk_update_is_one_rpc(fake, supabase_repo):
+    fake.responses['rpc/bulk_update_tasks'] = [{'id': 1}, {'id': 2}]
+    fake.responses['tasks'] = [
+        {'id': 1, 'title': 'a', 'projects': None, 'tags': []},
+        {'id': 2, 'title': 'b', 'projects': {'name': 'P'}, 'tags': []},
+    ]
+    
+    result = supabase_repo.tasks.bulk_update([
+        {'id': 1, 'status': 'done', 'title': None},
+        {'id': 2, 'project_id': None, 'tag_ids': None},
+        {'id': 3, 'title': 'missing'},
+    ])
+    
+    rpcs = [r for r in fake.requests if r[1].startswith('rpc/')]
+    assert rpcs == [('POST', 'rpc/bulk_update_tasks', {'p_items': [
+        {'id': 1, 'status': 'done'},
+        {'id': 2, 'project_id': None, 'tag_ids': []},
+        {'id': 3, 'title': 'missing'},
+    ]})]
+    assert [t and t['id'] for t in result] == [1, 2, None]
+    assert result[1]['project_name'] == 'P'
+
+def test_weekly_report(fake, supabase_repo):
+    week_start = date.today() - timedelta(days=date.today().weekday())
+    fake.responses['rpc/task_daily_stats'] = [
+        {'day': week_start.isoformat(), 'kind': 'created', 'project_id': None, 'color': None, 'count': 3},
+        {'day': week_start.isoformat(), 'kind': 'completed', 'project_id': 1, 'color': '#111', 'count': 2},
+        {'day': week_start.isoformat(), 'kind': 'completed', 'project_id': None, 'color': None, 'count': 1},
+    ]
+    fake.responses['tasks'] = [{'id': 5, 'title': 'done', 'completed_at': '2026-01-01T00:00:00+00:00'}]
+    fake.responses['task_status_counts'] = [{'status': 'done', 'count': 3}]
+    
+    report = supabase_repo.reports.weekly()
+    
+    assert report['created_count'] == 3
+    assert report['daily_data'][0] == {'date': week_start.isoformat(), 'day_name': '月', 'count': 3}
+    assert sum(day['count'] for day in report['daily_data']) == 3
+    assert [t['id'] for t in report['completed_tasks']] == [5]
+    
+    _, _, params = next(r for r in fake.requests if r[1] == 'rpc/task_daily_stats')
+    assert params['p_start'] == week_start.isoformat()
+    assert params['p_end'] == (week_start + timedelta(days=7)).isoformat()
+    assert params['p_utc_offset'].endswith(' seconds')
+
+def test_monthly_report(fake, supabase_repo):
+    fake.responses['rpc/task_daily_stats'] = [
+        {'day': '2026-03-02', 'kind': 'completed', 'project_id': 2, 'color': '#111', 'count': 2},
+        {'day': '2026-03-10', 'kind': 'completed', 'project_id': None, 'color': None, 'count': 1},
+        {'day': '2026-03-10', 'kind': 'created', 'project_id': 1, 'color': '#111', 'count': 4},
+    ]
+    fake.responses['rpc/tag_completion_counts'] = [{'tag_id': 7, 'count': 2}]
+    fake.responses['projects'] = [
+        {'id': 1, 'name': 'A', 'color': '#111'}, {'id': 2, 'name': 'B', 'color': '#222'}
+    ]
+    fake.responses['tags'] = [{'id': 3, 'name': 'x', 'color': '#333'}, {'id': 7, 'name': 'y', 'color': '#777'}]
+    
+    report = supabase_repo.reports.monthly(2026, 3)
+    
+    assert report['period'] == {'year': 2026, 'month': 3, 'start': '2026-03-01', 'end': '2026-03-31'}
+    assert report['completed_count'] == 3
+    assert report['created_count'] == 4
+    assert [(p['id'], p['completed_count']) for p in report['project_stats']] == [(2, 2), (1, 0)]
+    assert [(t['id'], t['completed_count']) for t in report['tag_stats']] == [(7, 2), (3, 0)]
+    assert report['weekly_data'] == [{'week': '09', 'count': 2}, {'week': '10', 'count': 1}]
+    assert report['color_stats'] == [{'color': '#111', 'count': 2}, {'color': None, 'count': 1}]
+
+def test_sync_is_unsupported(supabase_repo):
+    with pytest.raises(UnsupportedOperation):
+        supabase_repo.sync.changes(0)
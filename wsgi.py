@@ -0,0 +1,35 @@
+"""
+DevTodo - 本番用 WSGI エントリーポイント
+
+    gunicorn -c gunicorn.conf.py wsgi:app
+
+ワーカープロセス数・スレッド数は環境変数 WEB_CONCURRENCY / THREADS で指定する。
+gunicorn が使えない Windows では waitress のスレッドプールで配信する。
+"""
+
+import os
+import sys
+from app import create_app, HOST, PORT, WORKERS, THREADS, EVENTS_PORT, CORS_ORIGINS
+
+CONFIG_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'gunicorn.conf.py')
+
+app = create_app()
+
+def serve():
+    """本番モードで起動（デバッグは無効）"""
+    try:
+        from gunicorn.app.wsgiapp import WSGIApplication
+    except ImportError:
+        # fork できない環境では1プロセス・複数スレッドで配信
+        # （SSE はスレッドを使わないようイベントサーバーで受ける）
+        from waitress import serve as waitress_serve
+        from events import serve_in_background
+        serve_in_background(HOST, EVENTS_PORT, CORS_ORIGINS)
+        waitress_serve(app, host=HOST, port=PORT, threads=WORKERS * THREADS)
+        return
+    
+    sys.argv = ['gunicorn', '--config', CONFIG_PATH, 'wsgi:app']
+    WSGIApplication().run()
+
+if __name__ == '__main__':
+    serve()